@@ -48,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'documents.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -96,10 +97,117 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_PAGINATION_CLASS': 'documents.pagination.CustomPagination',
     'PAGE_SIZE': 5,
-
+    'DEFAULT_RENDERER_CLASSES': [
+        'documents.renderers.ORJSONRenderer',
+        'documents.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
+# Large PDFs are extracted by a chord of page-range subtasks, which needs a result backend.
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/1')
+
+# Per-request query count and timings: response headers when enabled (DEBUG by
+# default), log records on the documents.metrics logger always.
+DOCUMENTS_METRICS_HEADERS = os.getenv('DOCUMENTS_METRICS_HEADERS', str(DEBUG)) == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'documents.metrics': {
+            'handlers': ['console'],
+            'level': os.getenv('DOCUMENTS_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if os.getenv('REDIS_CACHE_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL'),
+    }
+
+# Cache alias and TTL (seconds) for cached GET responses of the documents API.
+DOCUMENTS_RESPONSE_CACHE_ALIAS = 'default'
+DOCUMENTS_RESPONSE_CACHE_TIMEOUT = int(os.getenv('DOCUMENTS_RESPONSE_CACHE_TIMEOUT', '300'))
+
+# Number of documents per Celery message when work is enqueued in bulk.
+DOCUMENTS_TASK_BATCH_SIZE = int(os.getenv('DOCUMENTS_TASK_BATCH_SIZE', '100'))
+
+# Write background work to the documents_taskoutbox table in the request's
+# transaction; `manage.py dispatch_outbox --loop` relays it to Celery.
+DOCUMENTS_TASK_OUTBOX = os.getenv('DOCUMENTS_TASK_OUTBOX', 'True') == 'True'
+
+# Soft-deleted rows are hard deleted, with their texts and unshared files, this
+# many days after deletion; the purge_deleted_rows task runs daily under celery beat.
+DOCUMENTS_PURGE_RETENTION_DAYS = float(os.getenv('DOCUMENTS_PURGE_RETENTION_DAYS', '30'))
+DOCUMENTS_PURGE_BATCH_SIZE = int(os.getenv('DOCUMENTS_PURGE_BATCH_SIZE', '500'))
+
+CELERY_BEAT_SCHEDULE = {
+    'purge-deleted-rows': {
+        'task': 'documents.tasks.purge_deleted_rows',
+        'schedule': 24 * 60 * 60,
+    },
+    'resume-reindex-jobs': {
+        'task': 'documents.tasks.resume_reindex_jobs',
+        'schedule': 10 * 60,
+    },
+}
+
+# Rows a reindex job deletes or re-extracts per task run when a type's visibility changes.
+DOCUMENTS_REINDEX_CHUNK_SIZE = int(os.getenv('DOCUMENTS_REINDEX_CHUNK_SIZE', '500'))
+# Seconds a reindex job waits for an older job of the same type to finish its chunk.
+DOCUMENTS_REINDEX_RETRY_SECONDS = int(os.getenv('DOCUMENTS_REINDEX_RETRY_SECONDS', '5'))
+
+# Rows fetched per server-side cursor round trip by the streaming export.
+DOCUMENTS_EXPORT_CHUNK_SIZE = int(os.getenv('DOCUMENTS_EXPORT_CHUNK_SIZE', '2000'))
+# Texts loaded per query when the export includes them; each one can be megabytes.
+DOCUMENTS_EXPORT_TEXT_CHUNK_SIZE = int(os.getenv('DOCUMENTS_EXPORT_TEXT_CHUNK_SIZE', '50'))
+
+# Largest chunk accepted by the resumable upload endpoint (bytes).
+DOCUMENTS_UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('DOCUMENTS_UPLOAD_MAX_CHUNK_SIZE', str(8 * 1024 * 1024)))
+
+# The bulk upload endpoint accepts many files per request.
+DATA_UPLOAD_MAX_NUMBER_FILES = int(os.getenv('DATA_UPLOAD_MAX_NUMBER_FILES', '1000'))
+
+# Store identical uploads once: a new upload whose SHA-256 matches a stored file
+# points at the existing file instead of writing the bytes again.
+DOCUMENTS_STORAGE_DEDUP = os.getenv('DOCUMENTS_STORAGE_DEDUP', 'False') == 'True'
+
+# Pages extracted between releases of the PDF reader's object cache.
+PDF_EXTRACTION_CHUNK_PAGES = int(os.getenv('PDF_EXTRACTION_CHUNK_PAGES', '50'))
+
+# PDFs with more pages than the threshold are split into ranges of
+# PDF_PARALLEL_RANGE_PAGES pages that are extracted by parallel subtasks.
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.getenv('PDF_PARALLEL_PAGE_THRESHOLD', '500'))
+PDF_PARALLEL_RANGE_PAGES = int(os.getenv('PDF_PARALLEL_RANGE_PAGES', '200'))
+
+# Text search configuration used for the tsvector index, and how many UTF-8 bytes of
+# each extracted text get indexed (Postgres caps a tsvector at 1MB).
+DOCUMENTS_SEARCH_CONFIG = os.getenv('DOCUMENTS_SEARCH_CONFIG', 'simple')
+DOCUMENTS_SEARCH_MAX_BYTES = int(os.getenv('DOCUMENTS_SEARCH_MAX_BYTES', '1000000'))
+
+# Codec new extracted texts are stored with: '' (plain text), 'zlib' or 'zstd' (needs
+# the zstandard package). `manage.py compress_texts` converts existing rows and
+# `manage.py bench_text_compression` measures the size/CPU trade-off.
+DOCUMENTS_TEXT_COMPRESSION = os.getenv('DOCUMENTS_TEXT_COMPRESSION', '')
+DOCUMENTS_TEXT_COMPRESSION_LEVEL = int(os.getenv('DOCUMENTS_TEXT_COMPRESSION_LEVEL', '0')) or None
+
+# Most pages one request to documents/<pk>/text/ may return.
+DOCUMENTS_TEXT_MAX_PAGES = int(os.getenv('DOCUMENTS_TEXT_MAX_PAGES', '50'))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -1,12 +1,17 @@
 from django.contrib import admin
 
-from documents.models import Document, Participant, DocumentType, DocumentCategory, UploadedTextFile
+from documents.models import Document, Participant, DocumentType, DocumentCategory, UploadedTextFile, TaskOutbox, \
+    UploadSession, ReindexJob, UploadedTextPage
 
 admin.site.register(Participant)
 admin.site.register(Document)
 admin.site.register(DocumentType)
 admin.site.register(DocumentCategory)
 admin.site.register(UploadedTextFile)
+admin.site.register(UploadedTextPage)
+admin.site.register(TaskOutbox)
+admin.site.register(UploadSession)
+admin.site.register(ReindexJob)
 
 
 
@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def create_search_index(sender, using='default', **kwargs):
+    from documents.services.search import SearchService
+    SearchService.ensure_schema(using)
 
 
 class DocumentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'documents'
+
+    def ready(self):
+        from documents.instrumentation import install_query_recorder
+        from documents.models import Document, DocumentCategory, DocumentType, Participant
+        from documents.services.cache import ResponseCacheService
+
+        post_migrate.connect(create_search_index, sender=self)
+        connection_created.connect(install_query_recorder)
+        for model in (Participant, DocumentCategory, DocumentType, Document):
+            post_save.connect(ResponseCacheService.invalidate_instance, sender=model)
+            post_delete.connect(ResponseCacheService.invalidate_instance, sender=model)
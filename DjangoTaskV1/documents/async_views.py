@@ -0,0 +1,131 @@
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .models import DocumentCategory, DocumentType, Document
+from .pagination import CustomPagination
+from .renderers import MessagePackRenderer, ORJSONRenderer
+from .serializers import DocumentCategorySerializer, DocumentTypeSerializer, DocumentSerializer
+
+
+# Read-only variants of the list/retrieve endpoints on the async ORM: under ASGI a
+# request waiting on the database does not hold a worker thread. They render with
+# the API's orjson/msgpack renderers (?format= and Accept) and take the same
+# ?fields=/?omit= and ordering. Conditional GET (ETag/Last-Modified), the response
+# cache, cursor pagination and the browsable API are left to the sync endpoints:
+# they are built on DRF's sync view machinery.
+class AsyncReadView(View):
+    http_method_names = ['get', 'head', 'options']
+    queryset = None
+    serializer_class = None
+    renderer_classes = (ORJSONRenderer, MessagePackRenderer)
+    content_negotiation_class = DefaultContentNegotiation
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def serialize(self, instance, **kwargs):
+        return self.serializer_class(instance, context={'request': self.request}, **kwargs).data
+
+    def render(self, data, status=200):
+        renderers = [renderer() for renderer in self.renderer_classes]
+        try:
+            renderer, media_type = self.content_negotiation_class().select_renderer(Request(self.request), renderers)
+        except NotAcceptable as e:
+            renderer, media_type = renderers[0], renderers[0].media_type
+            data, status = {"detail": str(e.detail)}, e.status_code
+
+        response = HttpResponse(renderer.render(data, media_type), status=status, content_type=media_type)
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+
+class AsyncListView(AsyncReadView):
+    paginator_class = CustomPagination
+
+    def get_page_size(self, request):
+        paginator = self.paginator_class
+        try:
+            size = int(request.GET.get(paginator.page_size_query_param, paginator.page_size))
+        except ValueError:
+            return paginator.page_size
+        return min(size, paginator.max_page_size) if size > 0 else paginator.page_size
+
+    async def get(self, request, *args, **kwargs):
+        page_query_param = self.paginator_class.page_query_param
+        size = self.get_page_size(request)
+        try:
+            page = int(request.GET.get(page_query_param, 1))
+        except ValueError:
+            page = 0
+
+        queryset = self.get_queryset()
+        count = await queryset.acount()
+        pages = max((count + size - 1) // size, 1)
+        if not 1 <= page <= pages:
+            return self.render({"detail": "Invalid page."}, status=404)
+
+        offset = (page - 1) * size
+        objects = [obj async for obj in queryset[offset:offset + size]]
+
+        url = request.build_absolute_uri()
+        previous_url = None
+        if page > 1:
+            previous_url = (
+                remove_query_param(url, page_query_param) if page == 2
+                else replace_query_param(url, page_query_param, page - 1)
+            )
+
+        return self.render({
+            'count': count,
+            'next': replace_query_param(url, page_query_param, page + 1) if page < pages else None,
+            'previous': previous_url,
+            'results': self.serialize(objects, many=True),
+        })
+
+
+class AsyncRetrieveView(AsyncReadView):
+    async def get(self, request, pk, *args, **kwargs):
+        instance = await self.get_queryset().filter(pk=pk).afirst()
+        if instance is None:
+            return self.render(
+                {"detail": f"No {self.queryset.model._meta.object_name} matches the given query."}, status=404
+            )
+        return self.render(self.serialize(instance))
+
+
+class AsyncDocumentCategoryListView(AsyncListView):
+    queryset = (
+        DocumentCategory.objects.filter(is_deleted=False)
+        .select_related('participant').prefetch_related('types').order_by('id')
+    )
+    serializer_class = DocumentCategorySerializer
+
+
+class AsyncDocumentCategoryRetrieveView(AsyncRetrieveView):
+    queryset = DocumentCategory.objects.filter(is_deleted=False).select_related('participant').prefetch_related('types')
+    serializer_class = DocumentCategorySerializer
+
+
+class AsyncDocumentTypeListView(AsyncListView):
+    queryset = DocumentType.objects.filter(is_deleted=False).select_related('category__participant').order_by('id')
+    serializer_class = DocumentTypeSerializer
+
+
+class AsyncDocumentTypeRetrieveView(AsyncRetrieveView):
+    queryset = DocumentType.objects.filter(is_deleted=False).select_related('category__participant')
+    serializer_class = DocumentTypeSerializer
+
+
+class AsyncDocumentListView(AsyncListView):
+    queryset = Document.objects.filter(is_deleted=False).order_by('id')
+    serializer_class = DocumentSerializer
+
+
+class AsyncDocumentRetrieveView(AsyncRetrieveView):
+    queryset = Document.objects.filter(is_deleted=False)
+    serializer_class = DocumentSerializer
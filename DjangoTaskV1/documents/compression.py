@@ -0,0 +1,42 @@
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+CODECS = ('zlib', 'zstd')
+
+
+def get_compression():
+    compression = getattr(settings, 'DOCUMENTS_TEXT_COMPRESSION', '')
+    if compression and compression not in CODECS:
+        raise ImproperlyConfigured(f"DOCUMENTS_TEXT_COMPRESSION must be one of {CODECS} or empty.")
+    return compression
+
+
+def get_level(compression):
+    return getattr(settings, 'DOCUMENTS_TEXT_COMPRESSION_LEVEL', None) or {'zlib': 6, 'zstd': 3}[compression]
+
+
+def get_zstd():
+    # zstandard is optional; only deployments that pick zstd need it installed.
+    try:
+        import zstandard
+    except ImportError:
+        raise ImproperlyConfigured("zstd text compression needs the zstandard package.")
+    return zstandard
+
+
+def compress(text, compression, level=None):
+    data = text.encode()
+    level = level or get_level(compression)
+    if compression == 'zstd':
+        return get_zstd().ZstdCompressor(level=level).compress(data)
+    return zlib.compress(data, level)
+
+
+def decompress(data, compression):
+    data = bytes(data)
+    if compression == 'zstd':
+        # Frames written by compress() carry their size, so one call is enough.
+        return get_zstd().ZstdDecompressor().decompress(data).decode()
+    return zlib.decompress(data).decode()
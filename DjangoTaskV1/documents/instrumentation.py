@@ -0,0 +1,77 @@
+import contextvars
+import time
+
+_metrics = contextvars.ContextVar('documents_request_metrics', default=None)
+_serializer_depth = contextvars.ContextVar('documents_serializer_depth', default=0)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.started = time.perf_counter()
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.query_count += 1
+
+    def as_dict(self):
+        return {
+            'query_count': self.query_count,
+            'db_time_ms': round(self.db_time * 1000, 2),
+            'serializer_time_ms': round(self.serializer_time * 1000, 2),
+            'total_time_ms': round(self.total_time * 1000, 2),
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    # Installed on every connection, so queries are counted whichever thread runs
+    # them: sync_to_async carries the request's context into the ORM thread.
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def start_request_metrics():
+    metrics = RequestMetrics()
+    return metrics, _metrics.set(metrics)
+
+
+def stop_request_metrics(token):
+    _metrics.reset(token)
+
+
+def get_request_metrics():
+    return _metrics.get()
+
+
+class InstrumentedSerializerMixin:
+    def to_representation(self, instance):
+        metrics = _metrics.get()
+        depth = _serializer_depth.get()
+        if metrics is None or depth:
+            return super().to_representation(instance)
+
+        # Only the outermost serializer is timed; nested and list children run inside it.
+        token = _serializer_depth.set(depth + 1)
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            _serializer_depth.reset(token)
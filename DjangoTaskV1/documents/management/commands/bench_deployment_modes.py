@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings, setup_test_environment
+from django.urls import reverse
+
+from documents.models import Document, DocumentCategory, DocumentType
+
+# (sync route, async route, model, detail) for every read endpoint with an async variant.
+ROUTES = [
+    ('document-category-list-create', 'async-document-category-list', DocumentCategory, False),
+    ('document-category-detail', 'async-document-category-detail', DocumentCategory, True),
+    ('document-type-list-create', 'async-document-type-list', DocumentType, False),
+    ('document-type-detail', 'async-document-type-detail', DocumentType, True),
+    ('document-list-create', 'async-document-list', Document, False),
+    ('document-detail', 'async-document-detail', Document, True),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/s, latency and memory of the read endpoints served as WSGI (threads), "
+        "ASGI with the sync views, and ASGI with the async views, at high concurrency."
+    )
+
+    MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help="Requests per mode.")
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--modes', nargs='+', choices=self.MODES, default=list(self.MODES))
+        parser.add_argument('--size', type=int, default=20)
+        parser.add_argument('--cache', action='store_true',
+                            help="Keep the response cache on; the async views do not use it.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        logging.getLogger('documents.metrics').setLevel(logging.WARNING)
+
+        rng = random.Random(options['seed'])
+        ids = {
+            model: list(model.objects.filter(is_deleted=False).order_by('?').values_list('id', flat=True)[:1000])
+            for _, _, model, _ in ROUTES
+        }
+        if not all(ids.values()):
+            raise CommandError("No data to benchmark; run generate_synthetic_data first.")
+        pages = {
+            model: min(5, (model.objects.filter(is_deleted=False).count() - 1) // options['size'] + 1)
+            for model in ids
+        }
+
+        # The same request mix is replayed in every mode.
+        plan = []
+        for _ in range(options['requests']):
+            sync_name, async_name, model, detail = rng.choice(ROUTES)
+            kwargs = {'pk': rng.choice(ids[model])} if detail else None
+            params = {} if detail else {'size': options['size'], 'page': rng.randint(1, pages[model])}
+            plan.append((reverse(sync_name, kwargs=kwargs), reverse(async_name, kwargs=kwargs), params))
+
+        caches = None if options['cache'] else {
+            'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+        }
+
+        self.stdout.write(
+            f"{'mode':<11} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} "
+            f"{'peak MB':>8} {'threads':>8}"
+        )
+        for mode in options['modes']:
+            with override_settings(CACHES=caches) if caches else override_settings():
+                self.report(mode, *self.measure(mode, plan, options['concurrency']))
+
+    def measure(self, mode, plan, concurrency):
+        peak_threads = threading.active_count()
+        stop = threading.Event()
+
+        def watch_threads():
+            nonlocal peak_threads
+            while not stop.is_set():
+                peak_threads = max(peak_threads, threading.active_count())
+                time.sleep(0.01)
+
+        watcher = threading.Thread(target=watch_threads)
+        watcher.start()
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            if mode == 'wsgi':
+                results = self.run_wsgi(plan, concurrency)
+            else:
+                results = asyncio.run(self.run_asgi(plan, concurrency, use_async=mode == 'asgi-async'))
+        finally:
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            stop.set()
+            watcher.join()
+            connections.close_all()
+
+        # The watcher itself is not a serving thread.
+        return results, elapsed, peak, peak_threads - 1
+
+    def run_wsgi(self, plan, concurrency):
+        local = threading.local()
+
+        def send(request):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            path, _, params = request
+            started = time.perf_counter()
+            response = local.client.get(path, params)
+            return (time.perf_counter() - started) * 1000, response.status_code
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(send, plan))
+
+    async def run_asgi(self, plan, concurrency, use_async):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(request):
+            sync_path, async_path, params = request
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(async_path if use_async else sync_path, params)
+                return (time.perf_counter() - started) * 1000, response.status_code
+
+        return await asyncio.gather(*(send(request) for request in plan))
+
+    def report(self, mode, results, elapsed, peak, threads):
+        timings = sorted(timing for timing, _ in results)
+        errors = sum(1 for _, status in results if status >= 400)
+        p50 = timings[len(timings) // 2]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f"{mode:<11} {len(results):>6} {errors:>6} {len(results) / elapsed:>8.1f} {p50:>9.2f} "
+            f"{p99:>9.2f} {peak / 2 ** 20:>8.2f} {threads:>8}"
+        )
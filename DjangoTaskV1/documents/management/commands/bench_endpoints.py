@@ -0,0 +1,297 @@
+import logging
+import random
+import statistics
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment
+from django.urls import reverse
+
+from documents import urls as document_urls
+from documents.models import Document, DocumentCategory, DocumentType, Participant, ReindexJob, UploadSession, UploadedTextFile
+from documents.services.search import SearchService
+from documents.synthetic import build_pdf
+from documents.tasks import extract_documents
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every route in documents/urls.py at a fixed concurrency and report "
+        "p50/p95/p99 latency and throughput per route."
+    )
+
+    # Write routes driven by --include-writes.
+    WRITE_ROUTES = ('document-bulk-create',)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per route.")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--base-url',
+                            help="Benchmark a running server instead of the in-process test client.")
+        parser.add_argument('--routes', nargs='+', help="Only run these url names.")
+        parser.add_argument('--size', type=int, default=20)
+        parser.add_argument('--search-term', default='w0p0l0n0')
+        parser.add_argument('--texts', type=int, default=200,
+                            help="Extract and index texts until this many documents have one.")
+        parser.add_argument('--include-writes', action='store_true',
+                            help="Also drive write-only routes; this inserts documents.")
+        parser.add_argument('--sample', type=int, default=1000, help="Ids sampled per model.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['base_url'] and options['include_writes']:
+            raise CommandError("Write routes are only supported with the in-process client.")
+        if not options['base_url']:
+            setup_test_environment()
+            logging.getLogger('documents.metrics').setLevel(logging.WARNING)
+
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        categories = DocumentCategory.objects.filter(is_deleted=False)
+        types = DocumentType.objects.filter(is_deleted=False)
+        documents = Document.objects.filter(is_deleted=False)
+        self.samples = {
+            'participant': self.sample_ids(Participant.objects.all()),
+            'category': self.sample_ids(categories),
+            'type': self.sample_ids(types),
+            'document': self.sample_ids(documents),
+        }
+        if not all(self.samples.values()):
+            raise CommandError("No data to benchmark; run generate_synthetic_data first.")
+
+        self.seed_texts()
+        # Routes whose sample is empty are skipped, as there is nothing to request.
+        self.samples.update({
+            'text': self.sample_ids(UploadedTextFile.objects.filter(page_count__gt=0), 'document_id', 'page_count'),
+            'reindex_type': self.sample_ids(ReindexJob.objects.all(), 'document_type_id'),
+            'reindex_job': self.sample_ids(ReindexJob.objects.all()),
+            'upload_session': self.sample_ids(UploadSession.objects.all()),
+        })
+        # The list views take no filters, so they are driven across their pages instead.
+        self.page_counts = {
+            kind: max((queryset.count() + options['size'] - 1) // options['size'], 1)
+            for kind, queryset in (('category', categories), ('type', types), ('document', documents))
+        }
+
+        scenarios = self.get_scenarios()
+        self.stdout.write(
+            f"{'route':<32} {'reqs':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'p99 ms':>9} {'req/s':>8} {'hit %':>6}"
+        )
+        for pattern in document_urls.urlpatterns:
+            name = pattern.name
+            if options['routes'] and name not in options['routes']:
+                continue
+            if name not in scenarios:
+                if self.handles_get(pattern):
+                    reason = "no scenario"
+                elif name in self.WRITE_ROUTES:
+                    reason = "write-only, use --include-writes"
+                else:
+                    reason = "write-only"
+                self.stdout.write(f"{name:<32} skipped ({reason})")
+                continue
+            try:
+                # Build every request up front so the workers only measure the server.
+                requests = [scenarios[name]() for _ in range(options['requests'])]
+            except IndexError:
+                self.stdout.write(f"{name:<32} skipped (no data)")
+                continue
+            self.report(name, self.run(requests))
+
+    def handles_get(self, pattern):
+        view_class = pattern.callback.view_class
+        return 'get' in view_class.http_method_names and hasattr(view_class, 'get')
+
+    def seed_texts(self):
+        # Search and page reads need extracted texts; generate_synthetic_data only
+        # writes the PDFs. Identical pool files are extracted once and reused.
+        SearchService.ensure_schema()
+        missing = self.options['texts'] - UploadedTextFile.objects.values('document_id').distinct().count()
+        if missing <= 0:
+            return
+        document_ids = list(
+            Document.objects.filter(is_deleted=False, is_active=True, uploadedtextfile__isnull=True)
+            .filter(Q(document_type__public_visible=True) | Q(document_type__private_visible=True))
+            .filter(file__endswith='.pdf')
+            .order_by('?')
+            .values_list('id', flat=True)[:missing]
+        )
+        self.stdout.write(f"Extracting texts of {len(document_ids)} documents")
+        # Extracted in process: no worker needs to be running for the chord of a long PDF.
+        with override_settings(PDF_PARALLEL_PAGE_THRESHOLD=float('inf')):
+            extract_documents(document_ids)
+
+    def sample_ids(self, queryset, *fields):
+        fields = fields or ('id',)
+        rows = queryset.order_by('?').values_list(*fields, flat=len(fields) == 1)
+        return list(rows[:self.options['sample']])
+
+    def pick(self, kind):
+        return self.rng.choice(self.samples[kind])
+
+    def pick_page(self, kind):
+        return self.rng.randint(1, self.page_counts[kind])
+
+    def text_pages_request(self):
+        document_id, page_count = self.pick('text')
+        start_page = self.rng.randint(1, page_count)
+        return 'GET', reverse('document-text-pages', kwargs={'pk': document_id}), {
+            'start_page': start_page, 'end_page': min(start_page + 4, page_count)
+        }
+
+    def get_scenarios(self):
+        size = self.options['size']
+        scenarios = {
+            'document-category-list-create': lambda: (
+                'GET', reverse('document-category-list-create'), {'page': self.pick_page('category'), 'size': size}
+            ),
+            'document-category-detail': lambda: (
+                'GET', reverse('document-category-detail', kwargs={'pk': self.pick('category')}), {}
+            ),
+            'document-type-list-create': lambda: (
+                'GET', reverse('document-type-list-create'), {'page': self.pick_page('type'), 'size': size}
+            ),
+            'document-type-detail': lambda: (
+                'GET', reverse('document-type-detail', kwargs={'pk': self.pick('type')}), {}
+            ),
+            'reindex-job-list': lambda: (
+                'GET', reverse('reindex-job-list', kwargs={'pk': self.pick('reindex_type')}), {'size': size}
+            ),
+            'reindex-job-detail': lambda: (
+                'GET', reverse('reindex-job-detail', kwargs={'pk': self.pick('reindex_job')}), {}
+            ),
+            'document-list-create': lambda: (
+                'GET', reverse('document-list-create'), {'page': self.pick_page('document'), 'size': size}
+            ),
+            'document-export': lambda: (
+                'GET', reverse('document-export'), {'participant_id': self.pick('participant')}
+            ),
+            'upload-session-detail': lambda: (
+                'GET', reverse('upload-session-detail', kwargs={'pk': self.pick('upload_session')}), {}
+            ),
+            'document-detail': lambda: (
+                'GET', reverse('document-detail', kwargs={'pk': self.pick('document')}), {}
+            ),
+            'document-text-pages': self.text_pages_request,
+            'category-doc-type-stats': lambda: (
+                'GET', reverse('category-doc-type-stats'), {'category_id': self.pick('category')}
+            ),
+            'document-search': lambda: (
+                'GET', reverse('document-search'), {'q': self.options['search_term'], 'size': size}
+            ),
+            'async-document-category-list': lambda: (
+                'GET', reverse('async-document-category-list'), {'page': self.pick_page('category'), 'size': size}
+            ),
+            'async-document-category-detail': lambda: (
+                'GET', reverse('async-document-category-detail', kwargs={'pk': self.pick('category')}), {}
+            ),
+            'async-document-type-list': lambda: (
+                'GET', reverse('async-document-type-list'), {'page': self.pick_page('type'), 'size': size}
+            ),
+            'async-document-type-detail': lambda: (
+                'GET', reverse('async-document-type-detail', kwargs={'pk': self.pick('type')}), {}
+            ),
+            'async-document-list': lambda: (
+                'GET', reverse('async-document-list'), {'page': self.pick_page('document'), 'size': size}
+            ),
+            'async-document-detail': lambda: (
+                'GET', reverse('async-document-detail', kwargs={'pk': self.pick('document')}), {}
+            ),
+        }
+
+        if self.options['include_writes']:
+            pdf = build_pdf(1, words_per_page=50)
+            types = {
+                document_type.id: document_type
+                for document_type in DocumentType.objects.select_related('category')
+                .filter(id__in=self.samples['type'])
+            }
+
+            def bulk_create():
+                document_type = types[self.pick('type')]
+                return 'POST', reverse('document-bulk-create'), {
+                    'company': document_type.category.company,
+                    'participant': document_type.category.participant_id,
+                    'document_type': document_type.id,
+                    'files': [SimpleUploadedFile(f'bench-{n}.pdf', pdf, 'application/pdf') for n in range(5)],
+                }
+
+            scenarios['document-bulk-create'] = bulk_create
+
+        return scenarios
+
+    def run(self, requests):
+        pending = iter(requests)
+        lock = threading.Lock()
+        results = []
+
+        def worker():
+            client = None if self.options['base_url'] else Client()
+            try:
+                while True:
+                    with lock:
+                        request = next(pending, None)
+                    if request is None:
+                        return
+                    result = self.send(client, *request)
+                    with lock:
+                        results.append(result)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, time.perf_counter() - started
+
+    def send(self, client, method, path, params):
+        started = time.perf_counter()
+        if client is not None:
+            if method == 'GET':
+                response = client.get(path, params)
+            else:
+                response = client.post(path, params)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            status, cache = response.status_code, response.get('X-Cache')
+        else:
+            status, cache = self.send_remote(path, params)
+        return (time.perf_counter() - started) * 1000, status, cache
+
+    def send_remote(self, path, params):
+        url = f"{self.options['base_url'].rstrip('/')}{path}?{urlencode(params)}"
+        try:
+            with urlopen(Request(url)) as response:
+                response.read()
+                return response.status, response.headers.get('X-Cache')
+        except HTTPError as error:
+            return error.code, None
+
+    def report(self, name, outcome):
+        results, elapsed = outcome
+        timings = [timing for timing, _, _ in results]
+        errors = sum(1 for _, status, _ in results if status >= 400)
+        hits = sum(1 for _, _, cache in results if cache == 'HIT')
+
+        if len(timings) > 1:
+            percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+            p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+        else:
+            p50 = p95 = p99 = timings[0] if timings else 0.0
+
+        self.stdout.write(
+            f"{name:<32} {len(results):>6} {errors:>6} {p50:>9.2f} {p95:>9.2f} {p99:>9.2f} "
+            f"{len(results) / elapsed if elapsed else 0.0:>8.1f} {hits * 100 / len(results) if results else 0.0:>6.1f}"
+        )
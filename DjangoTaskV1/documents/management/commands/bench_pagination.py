@@ -0,0 +1,89 @@
+import logging
+import statistics
+import time
+from base64 import b64encode
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+from django.urls import reverse
+
+from documents.models import Document, DocumentCategory, DocumentType, Participant
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed documents inside a rolled back transaction and compare deep-page latency "
+        "of page-number and cursor pagination on the documents list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=50000)
+        parser.add_argument('--size', type=int, default=100)
+        parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 250, 500])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        logging.getLogger('documents.metrics').setLevel(logging.WARNING)
+
+        # Repeated requests would otherwise be served from the response cache and
+        # never reach the paginator.
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with override_settings(CACHES=caches), transaction.atomic():
+            self.seed(options['documents'])
+            self.run(options['size'], options['pages'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        participant = Participant.objects.create(first_name="Bench", last_name="Mark", status="active")
+        category = DocumentCategory.objects.create(company=1, participant=participant, title="Bench")
+        doc_type = DocumentType.objects.create(
+            category=category, title="Bench", private_visible=False, public_visible=False, is_active=True
+        )
+        Document.objects.bulk_create(
+            (
+                Document(
+                    company=1,
+                    participant=participant,
+                    document_type=doc_type,
+                    file=f'files/documents/bench-{n}.pdf',
+                    is_active=False
+                )
+                for n in range(count)
+            ),
+            batch_size=5000,
+        )
+        self.stdout.write(f"Seeded {count} documents")
+
+    def run(self, size, pages, repeat):
+        client = Client()
+        url = reverse('document-list-create')
+        ids = list(Document.objects.filter(is_deleted=False).order_by('id').values_list('id', flat=True))
+
+        self.stdout.write(f"{'page':>6} {'mode':>7} {'median ms':>10} {'queries':>8}")
+        for page in pages:
+            offset = (page - 1) * size
+            if offset >= len(ids):
+                continue
+
+            cursor_params = {'pagination': 'cursor', 'size': size}
+            if offset:
+                token = urlencode({'p': str(ids[offset - 1])}).encode('ascii')
+                cursor_params['cursor'] = b64encode(token).decode('ascii')
+
+            for mode, params in (('page', {'page': page, 'size': size}), ('cursor', cursor_params)):
+                timings = []
+                for _ in range(repeat):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        response = client.get(url, params)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    assert response.status_code == 200, response.content
+                    assert response.data['results'][0]['id'] == ids[offset]
+
+                self.stdout.write(
+                    f"{page:>6} {mode:>7} {statistics.median(timings):>10.2f} {len(queries):>8}"
+                )
@@ -0,0 +1,58 @@
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.services.extraction import PdfExtractionService
+from documents.synthetic import build_pdf
+
+
+def extract_range(data, start, end):
+    return PdfExtractionService.extract_range(io.BytesIO(data), start, end)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure wall time of page-range extraction of one large PDF as the number of "
+        "worker processes grows, the way the extraction chord spreads ranges over workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=2000)
+        parser.add_argument('--words-per-page', type=int, default=200)
+        parser.add_argument('--range-pages', type=int, default=None,
+                            help="Pages per range; defaults to PDF_PARALLEL_RANGE_PAGES.")
+        parser.add_argument('--workers', type=int, nargs='+',
+                            default=sorted({1, 2, 4, os.cpu_count() or 1}))
+
+    def handle(self, *args, **options):
+        data = build_pdf(options['pages'], words_per_page=options['words_per_page'])
+        ranges = PdfExtractionService.get_page_ranges(options['pages'], options['range_pages'])
+
+        started = time.perf_counter()
+        expected, _ = PdfExtractionService.extract_text(io.BytesIO(data))
+        serial = time.perf_counter() - started
+
+        self.stdout.write(f"{options['pages']} pages in {len(ranges)} ranges, {os.cpu_count()} cores")
+        self.stdout.write(f"{'workers':>8} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+        self.stdout.write(f"{'serial':>8} {serial:>9.2f} {options['pages'] / serial:>9.1f} {1.0:>8.2f}")
+
+        for workers in options['workers']:
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(
+                    extract_range,
+                    [data] * len(ranges),
+                    [start for start, _ in ranges],
+                    [end for _, end in ranges],
+                ))
+            elapsed = time.perf_counter() - started
+
+            if "".join(parts) != expected:
+                raise CommandError(f"Reassembled text differs from serial extraction with {workers} workers")
+
+            self.stdout.write(
+                f"{workers:>8} {elapsed:>9.2f} {options['pages'] / elapsed:>9.1f} {serial / elapsed:>8.2f}"
+            )
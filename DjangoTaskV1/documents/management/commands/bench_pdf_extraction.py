@@ -0,0 +1,73 @@
+import io
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from PyPDF2 import PdfReader
+
+from documents.services.extraction import PdfExtractionService
+from documents.synthetic import build_pdf
+
+
+def extract_concatenated(file):
+    reader = PdfReader(file)
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() or ""
+    return text
+
+
+def extract_streaming(file):
+    text, _ = PdfExtractionService.extract_text(file)
+    return text
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare peak memory and throughput of concatenated vs streaming PDF text extraction. "
+        "Overhead is the peak minus the extracted text and the reader's cross-reference index, "
+        "which every PdfReader keeps and which grows with the object count."
+    )
+
+    MODES = {
+        'concat': extract_concatenated,
+        'streaming': extract_streaming,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, nargs='+', default=[500, 1000, 2000, 4000])
+        parser.add_argument('--words-per-page', type=int, default=200)
+        parser.add_argument('--modes', nargs='+', choices=list(self.MODES), default=list(self.MODES))
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'pages':>7} {'mode':>10} {'seconds':>9} {'pages/s':>9} {'text MB':>9} "
+            f"{'peak MB':>9} {'xref MB':>9} {'overhead MB':>12}"
+        )
+
+        for page_count in options['pages']:
+            data = build_pdf(page_count, words_per_page=options['words_per_page'])
+            xref_mb = self.measure_xref(data)
+
+            for mode in options['modes']:
+                tracemalloc.start()
+                started = time.perf_counter()
+                text = self.MODES[mode](io.BytesIO(data))
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                text_mb = len(text.encode()) / 2 ** 20
+                peak_mb = peak / 2 ** 20
+                self.stdout.write(
+                    f"{page_count:>7} {mode:>10} {elapsed:>9.2f} {page_count / elapsed:>9.1f} "
+                    f"{text_mb:>9.2f} {peak_mb:>9.2f} {xref_mb:>9.2f} {peak_mb - text_mb - xref_mb:>12.2f}"
+                )
+
+    def measure_xref(self, data):
+        tracemalloc.start()
+        reader = PdfReader(io.BytesIO(data))
+        PdfExtractionService.get_page_count(reader)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size / 2 ** 20
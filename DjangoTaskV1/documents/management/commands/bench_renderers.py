@@ -0,0 +1,101 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import setup_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from documents.models import Document, DocumentCategory, DocumentType, Participant
+from documents.renderers import MessagePackRenderer, ORJSONRenderer
+from documents.serializers import CategoryWithDocTypeStatsSerializer, DocumentSerializer
+from documents.services.category import CategoryService
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed data inside a rolled back transaction and compare serialization time of full and "
+        "sparse fieldsets, and render time and payload size of the JSON, orjson and msgpack renderers."
+    )
+
+    RENDERERS = {
+        'json': JSONRenderer,
+        'orjson': ORJSONRenderer,
+        'msgpack': MessagePackRenderer,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=200)
+        parser.add_argument('--types-per-category', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--document-fields', default='id,file')
+        parser.add_argument('--stats-omit', default='types')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        with transaction.atomic():
+            self.seed(options)
+            documents = list(Document.objects.filter(is_deleted=False).order_by('id')[:options['page_size']])
+            categories = list(CategoryService.get_filtered_categories_with_types())
+
+            self.stdout.write(
+                f"{'payload':<28} {'serialize ms':>13} {'renderer':>9} {'render ms':>10} {'KB':>9}"
+            )
+            self.run('documents', DocumentSerializer, documents, {}, options['repeat'])
+            self.run('documents sparse', DocumentSerializer, documents,
+                     {'fields': options['document_fields']}, options['repeat'])
+            self.run('category stats', CategoryWithDocTypeStatsSerializer, categories, {}, options['repeat'])
+            self.run('category stats sparse', CategoryWithDocTypeStatsSerializer, categories,
+                     {'omit': options['stats_omit']}, options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        participant = Participant.objects.create(first_name="Bench", last_name="Mark", status="active")
+        categories = DocumentCategory.objects.bulk_create([
+            DocumentCategory(company=1, participant=participant, title=f"Bench {n}")
+            for n in range(options['categories'])
+        ])
+        types = DocumentType.objects.bulk_create([
+            DocumentType(
+                category=category, title=f"Bench {n}", private_visible=True, public_visible=False, is_active=True
+            )
+            for category in categories
+            for n in range(options['types_per_category'])
+        ])
+        Document.objects.bulk_create([
+            Document(
+                company=1,
+                participant=participant,
+                document_type=types[n % len(types)],
+                file=f'files/documents/bench-{n}.pdf',
+                is_active=False
+            )
+            for n in range(options['page_size'])
+        ])
+
+    def run(self, label, serializer_class, objects, params, repeat):
+        request = Request(APIRequestFactory().get('/', params))
+        context = {'request': request}
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serializer_class(objects, many=True, context=context).data
+            timings.append((time.perf_counter() - started) * 1000)
+        serialize_ms = statistics.median(timings)
+
+        for name, renderer_class in self.RENDERERS.items():
+            renderer = renderer_class()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                payload = renderer.render(data)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(
+                f"{label:<28} {serialize_ms:>13.2f} {name:>9} {statistics.median(timings):>10.2f} "
+                f"{len(payload) / 1024:>9.1f}"
+            )
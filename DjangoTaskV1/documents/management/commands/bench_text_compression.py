@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+
+from documents.compression import compress, decompress, get_zstd
+from documents.models import UploadedTextFile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare stored size and compression/decompression time of each text codec and level, on a "
+        "sample of the stored extracted texts or, without any, on generated contract-like text."
+    )
+
+    LEVELS = {
+        'zlib': (1, 6, 9),
+        'zstd': (1, 3, 9, 19),
+    }
+
+    WORDS = (
+        "the of and to in a shall be by this agreement party parties or any for with such as under "
+        "on is that not which all may at its from other to be provided notice section terms "
+        "including without limitation obligations rights date effective contractor company services "
+        "payment invoice days written consent hereunder thereof accordance applicable law liability "
+        "confidential information termination period breach remedy amount fee schedule exhibit"
+    ).split()
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', type=int, default=200, help="Stored texts to benchmark.")
+        parser.add_argument('--pages', type=int, default=50, help="Pages per generated text.")
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        texts = [
+            text_file.text
+            for text_file in UploadedTextFile.objects.order_by('-id')[:options['sample']]
+            if text_file.text
+        ]
+        if not texts:
+            self.stdout.write("No stored texts; benchmarking generated text.")
+            texts = [self.generate_text(options['pages'], seed) for seed in range(options['sample'] // 10 or 1)]
+
+        raw_size = sum(len(text.encode()) for text in texts)
+        self.stdout.write(f"{len(texts)} texts, {raw_size / 1024 / 1024:.2f} MB of UTF-8")
+        self.stdout.write(
+            f"{'codec':<8} {'level':>5} {'ratio':>7} {'MB':>8} {'compress MB/s':>14} {'decompress MB/s':>16}"
+        )
+
+        for codec, levels in self.LEVELS.items():
+            if codec == 'zstd':
+                try:
+                    get_zstd()
+                except ImproperlyConfigured as e:
+                    self.stdout.write(f"{codec:<8} skipped: {e}")
+                    continue
+
+            for level in levels:
+                compress_times, decompress_times = [], []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    payloads = [compress(text, codec, level) for text in texts]
+                    compress_times.append(time.perf_counter() - started)
+
+                    started = time.perf_counter()
+                    for payload in payloads:
+                        decompress(payload, codec)
+                    decompress_times.append(time.perf_counter() - started)
+
+                size = sum(len(payload) for payload in payloads)
+                megabytes = raw_size / 1024 / 1024
+                self.stdout.write(
+                    f"{codec:<8} {level:>5} {raw_size / size:>6.2f}x {size / 1024 / 1024:>8.2f} "
+                    f"{megabytes / statistics.median(compress_times):>14.1f} "
+                    f"{megabytes / statistics.median(decompress_times):>16.1f}"
+                )
+
+    def generate_text(self, pages, seed):
+        # Extracted PDF text: short wrapped lines of a skewed vocabulary, with numbered
+        # clauses, amounts and dates, and a header and footer repeated on every page.
+        rng = random.Random(seed)
+        weights = [1 / (rank + 1) for rank in range(len(self.WORDS))]
+        lines = []
+        for page in range(1, pages + 1):
+            lines.append(f"MASTER SERVICES AGREEMENT No. {1000 + seed} CONFIDENTIAL")
+            for clause in range(rng.randint(4, 8)):
+                lines.append(f"{page}.{clause + 1} " + " ".join(rng.choices(self.WORDS, weights, k=6)))
+                for _ in range(rng.randint(3, 9)):
+                    words = rng.choices(self.WORDS, weights, k=rng.randint(8, 14))
+                    if rng.random() < 0.2:
+                        words.append(f"{rng.randint(1, 99999):,}.{rng.randint(0, 99):02d} USD")
+                    if rng.random() < 0.1:
+                        words.append(f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/20{rng.randint(10, 30)}")
+                    lines.append(" ".join(words))
+            lines.append(f"Page {page} of {pages}")
+        return "\n".join(lines)
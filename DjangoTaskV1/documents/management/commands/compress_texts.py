@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from documents.compression import CODECS, get_compression
+from documents.models import UploadedTextFile, UploadedTextPage
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert stored extracted texts to the configured compression (or another one) in batches. "
+        "Interrupted runs resume where they stopped: converted rows are skipped."
+    )
+
+    MODELS = {
+        'uploaded': UploadedTextFile,
+        'pages': UploadedTextPage,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compression', choices=('none',) + CODECS,
+                            help="Defaults to DOCUMENTS_TEXT_COMPRESSION; 'none' stores plain text again.")
+        parser.add_argument('--models', nargs='+', choices=list(self.MODELS), default=list(self.MODELS))
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        codec = options['compression'] or get_compression() or 'none'
+        codec = '' if codec == 'none' else codec
+
+        for name in options['models']:
+            model = self.MODELS[name]
+            queryset = model.objects.exclude(compression=codec).order_by('id')
+            last_id = 0
+            converted = 0
+            size_before = 0
+            size_after = 0
+
+            while True:
+                with transaction.atomic():
+                    batch = list(queryset.filter(id__gt=last_id)[:options['batch_size']])
+                    if not batch:
+                        break
+
+                    for row in batch:
+                        size_before += self.stored_size(row)
+                        row.set_text(row.text, codec)
+                        size_after += self.stored_size(row)
+                    model.objects.bulk_update(batch, ['raw_text', 'compressed_text', 'compression'])
+
+                converted += len(batch)
+                last_id = batch[-1].id
+                self.stdout.write(f"{name}: converted {converted} rows")
+
+            ratio = f" ({size_after / size_before:.1%} of the original size)" if size_before else ""
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {converted} rows now stored as {codec or 'plain text'}, "
+                f"{size_before / 1024:.1f} KB -> {size_after / 1024:.1f} KB{ratio}"
+            ))
+
+    def stored_size(self, row):
+        if row.compression:
+            return len(row.compressed_text)
+        return len(row.raw_text.encode())
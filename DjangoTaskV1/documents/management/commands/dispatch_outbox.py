@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from documents.services.outbox import OutboxService
+
+
+class Command(BaseCommand):
+    help = "Relay background work from the task outbox to Celery in deduplicated batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=1000, help="Outbox rows relayed per round.")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Document ids per task; defaults to DOCUMENTS_TASK_BATCH_SIZE.")
+        parser.add_argument('--loop', action='store_true', help="Keep relaying until interrupted.")
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when the outbox is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            relayed = OutboxService.relay(options['limit'], options['batch_size'])
+            if relayed:
+                self.stdout.write(f"Relayed {relayed} outbox rows")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,156 @@
+import json
+import logging
+import re
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment
+from django.urls import reverse
+
+from documents.models import Document, DocumentCategory, DocumentType, Participant
+
+# Scans a query needs by design: an unfiltered list counts every live row.
+EXPECTED_SCANS = {
+    ('document-list-create', 'documents_document'),
+    ('document-type-list-create', 'documents_documenttype'),
+    ('document-category-list-create', 'documents_documentcategory'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Capture the SQL each read endpoint runs, EXPLAIN it against the current (seeded) database and "
+        "fail when a plan scans a large table sequentially."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-rows', type=int, default=10000,
+                            help="Tables with at least this many rows count as large.")
+        parser.add_argument('--routes', nargs='+', help="Only explain these url names.")
+        parser.add_argument('--allow', nargs='+', default=[], metavar='ROUTE:TABLE',
+                            help="Accept a sequential scan of TABLE for ROUTE.")
+        parser.add_argument('--show-plans', action='store_true')
+        parser.add_argument('--size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        logging.getLogger('documents.metrics').setLevel(logging.WARNING)
+
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f"EXPLAIN parsing is not implemented for {connection.vendor}.")
+
+        large_tables = self.get_large_tables(options['min_rows'])
+        if connection.vendor == 'postgresql':
+            # Fresh statistics, so the plans are the ones production would get.
+            with connection.cursor() as cursor:
+                for table in large_tables:
+                    cursor.execute(f"ANALYZE {connection.ops.quote_name(table)}")
+
+        allowed = set(EXPECTED_SCANS) | {tuple(item.split(':', 1)) for item in options['allow']}
+        failures = []
+        for name, path, params in self.get_scenarios(options['size']):
+            if options['routes'] and name not in options['routes']:
+                continue
+
+            for sql, sql_params in self.capture(path, params):
+                plan, scanned = self.explain(sql, sql_params)
+                degraded = sorted(table for table in scanned if table in large_tables and (name, table) not in allowed)
+                status = f"SEQ SCAN {', '.join(degraded)}" if degraded else "ok"
+                self.stdout.write(f"{name:<32} {status:<40} {sql[:80]}")
+                if options['show_plans'] or degraded:
+                    for line in plan:
+                        self.stdout.write(f"    {line}")
+                if degraded:
+                    failures.append((name, degraded))
+
+        if failures:
+            raise CommandError(
+                f"{len(failures)} queries scan large tables sequentially: "
+                + "; ".join(f"{name} ({', '.join(tables)})" for name, tables in failures)
+            )
+        self.stdout.write(self.style.SUCCESS("No sequential scans on large tables."))
+
+    def get_large_tables(self, min_rows):
+        return {
+            model._meta.db_table
+            for model in apps.get_app_config('documents').get_models()
+            if model.objects.count() >= min_rows
+        }
+
+    def get_scenarios(self, size):
+        document = Document.objects.filter(is_deleted=False).order_by('id').first()
+        category = DocumentCategory.objects.filter(is_deleted=False).order_by('id').first()
+        document_type = DocumentType.objects.filter(is_deleted=False).order_by('id').first()
+        participant = Participant.objects.order_by('id').first()
+        if document is None or category is None or document_type is None:
+            raise CommandError("No data to explain; run generate_synthetic_data first.")
+
+        # The hot filters of every read endpoint; the async routes run the same SQL.
+        return [
+            ('document-category-list-create', reverse('document-category-list-create'), {'size': size}),
+            ('document-category-detail', reverse('document-category-detail', args=[category.id]), {}),
+            ('document-type-list-create', reverse('document-type-list-create'), {'size': size}),
+            ('document-type-detail', reverse('document-type-detail', args=[document_type.id]), {}),
+            ('document-list-create', reverse('document-list-create'), {'size': size}),
+            ('document-list-create', reverse('document-list-create'), {'size': size, 'pagination': 'cursor'}),
+            ('document-detail', reverse('document-detail', args=[document.id]), {}),
+            ('category-doc-type-stats', reverse('category-doc-type-stats'),
+             {'participant_id': participant.id, 'has_active_type': 'true'}),
+            ('category-doc-type-stats', reverse('category-doc-type-stats'), {'category_id': category.id}),
+            ('document-export', reverse('document-export'),
+             {'participant_id': participant.id, 'include_text': 'true'}),
+            ('document-export', reverse('document-export'), {'company': document.company}),
+            ('document-search', reverse('document-search'), {'q': 'w0p0l0n0', 'participant_id': participant.id}),
+        ]
+
+    def capture(self, path, params):
+        queries = []
+
+        def record(execute, sql, sql_params, many, context):
+            if not many and sql.lstrip().upper().startswith('SELECT'):
+                queries.append((sql, sql_params))
+            return execute(sql, sql_params, many, context)
+
+        # Cached responses run no SQL.
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with override_settings(CACHES=caches), connection.execute_wrapper(record):
+            response = Client().get(path, params)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+
+        if response.status_code >= 400:
+            raise CommandError(f"GET {path} returned {response.status_code}.")
+        return queries
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                lines, scanned = [], set()
+                self.walk_postgres_plan(plan[0]['Plan'], 0, lines, scanned)
+                return lines, scanned
+
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            # Subqueries name their tables by alias: FROM "documents_document" U0.
+            aliases = dict((alias, table) for table, alias in re.findall(r'"(\w+)" ([A-Z]\d+)\b', sql))
+            lines, scanned = [], set()
+            for _, _, _, detail in cursor.fetchall():
+                lines.append(detail)
+                # "SCAN t" reads the whole table; "SCAN t USING [COVERING] INDEX i" walks an index.
+                match = re.fullmatch(r'SCAN (\w+)(?: AS \w+)?', detail)
+                if match:
+                    scanned.add(aliases.get(match.group(1), match.group(1)))
+            return lines, scanned
+
+    def walk_postgres_plan(self, node, depth, lines, scanned):
+        relation = node.get('Relation Name')
+        lines.append(f"{'  ' * depth}{node['Node Type']}{f' on {relation}' if relation else ''}")
+        if node['Node Type'] == 'Seq Scan':
+            scanned.add(relation)
+        for child in node.get('Plans', []):
+            self.walk_postgres_plan(child, depth + 1, lines, scanned)
@@ -0,0 +1,130 @@
+import hashlib
+import random
+from collections import Counter
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from documents.models import Document, DocumentCategory, DocumentType, Participant
+from documents.synthetic import build_pdf
+
+
+class Command(BaseCommand):
+    help = "Generate participants, categories, types, documents and synthetic PDFs at production-like volumes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=100)
+        parser.add_argument('--categories-per-participant', type=int, default=3)
+        parser.add_argument('--types-per-category', type=int, default=4)
+        parser.add_argument('--documents', type=int, default=100000)
+        parser.add_argument('--companies', type=int, default=10)
+        parser.add_argument('--pdf-pool', type=int, default=20,
+                            help="Distinct synthetic PDFs written to storage and shared by the documents.")
+        parser.add_argument('--pdf-pages-min', type=int, default=1)
+        parser.add_argument('--pdf-pages-max', type=int, default=200)
+        parser.add_argument('--words-per-page', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            participants = Participant.objects.bulk_create(
+                (
+                    Participant(
+                        first_name=f"First{n}",
+                        last_name=f"Last{n}",
+                        status=rng.choice(Participant.STATUS_CHOICES)[0]
+                    )
+                    for n in range(options['participants'])
+                ),
+                batch_size=batch_size,
+            )
+            self.stdout.write(f"Created {len(participants)} participants")
+
+            categories = DocumentCategory.objects.bulk_create(
+                (
+                    DocumentCategory(
+                        company=rng.randint(1, options['companies']),
+                        participant=participant,
+                        title=f"Category {n}"
+                    )
+                    for participant in participants
+                    for n in range(options['categories_per_participant'])
+                ),
+                batch_size=batch_size,
+            )
+            self.stdout.write(f"Created {len(categories)} categories")
+
+            document_types = DocumentType.objects.bulk_create(
+                (
+                    DocumentType(
+                        category=category,
+                        title=f"Type {n}",
+                        private_visible=rng.random() < 0.5,
+                        public_visible=rng.random() < 0.5,
+                        is_active=rng.random() < 0.8
+                    )
+                    for category in categories
+                    for n in range(options['types_per_category'])
+                ),
+                batch_size=batch_size,
+            )
+            self.stdout.write(f"Created {len(document_types)} document types")
+
+        pool = self.write_pdf_pool(rng, options)
+        counts = self.create_documents(rng, document_types, pool, options)
+
+        for document_type in document_types:
+            document_type.document_count = counts[document_type.id]
+        DocumentType.objects.bulk_update(document_types, ['document_count'], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Created {sum(counts.values())} documents"))
+
+    def write_pdf_pool(self, rng, options):
+        pool = []
+        for n in range(options['pdf_pool']):
+            pages = rng.randint(options['pdf_pages_min'], options['pdf_pages_max'])
+            content = build_pdf(pages, words_per_page=options['words_per_page'], seed=n)
+            name = default_storage.save(f'files/documents/synthetic/pool-{n}-{pages}p.pdf', ContentFile(content))
+            pool.append((name, hashlib.sha256(content).hexdigest()))
+        self.stdout.write(f"Wrote {len(pool)} synthetic PDFs")
+        return pool
+
+    def create_documents(self, rng, document_types, pool, options):
+        batch_size = options['batch_size']
+        categories = {
+            category.id: category
+            for category in DocumentCategory.objects.filter(id__in={t.category_id for t in document_types})
+        }
+        counts = Counter()
+        activated = set()
+        remaining = options['documents']
+
+        while remaining > 0:
+            batch = []
+            for _ in range(min(batch_size, remaining)):
+                document_type = rng.choice(document_types)
+                category = categories[document_type.category_id]
+                is_active = document_type.id not in activated
+                activated.add(document_type.id)
+                counts[document_type.id] += 1
+                file, content_hash = rng.choice(pool)
+                batch.append(Document(
+                    company=category.company,
+                    participant_id=category.participant_id,
+                    document_type=document_type,
+                    file=file,
+                    content_hash=content_hash,
+                    is_active=is_active
+                ))
+
+            Document.objects.bulk_create(batch)
+            remaining -= len(batch)
+            self.stdout.write(f"Inserted {options['documents'] - remaining} documents")
+
+        return counts
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from documents.services.purge import PurgeService
+
+
+class Command(BaseCommand):
+    help = (
+        "Hard delete soft-deleted documents, types and categories past the retention period, "
+        "together with their extracted texts and the stored files no other document shares."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=float,
+                            help="Defaults to DOCUMENTS_PURGE_RETENTION_DAYS.")
+        parser.add_argument('--batch-size', type=int, help="Defaults to DOCUMENTS_PURGE_BATCH_SIZE.")
+        parser.add_argument('--max-batches', type=int, help="Per kind of row; unlimited by default.")
+
+    def handle(self, *args, **options):
+        retention = None
+        if options['retention_days'] is not None:
+            retention = timedelta(days=options['retention_days'])
+
+        purged = PurgeService.purge(
+            retention=retention, batch_size=options['batch_size'], max_batches=options['max_batches']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {purged['documents']} documents, {purged['types']} types, {purged['categories']} categories"
+        ))
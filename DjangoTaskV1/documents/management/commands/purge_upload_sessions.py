@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from documents.models import UploadSession
+from documents.services.upload import UploadService
+
+
+class Command(BaseCommand):
+    help = "Delete resumable uploads that were never finalized, together with their stored chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=float, default=24)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['older_than_hours'])
+        sessions = UploadSession.objects.filter(document__isnull=True, created_at__lt=cutoff)
+
+        purged = 0
+        for session_id in sessions.values_list('id', flat=True).iterator():
+            UploadService.discard_parts(session_id)
+            UploadSession.objects.filter(id=session_id).delete()
+            purged += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} upload sessions"))
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from documents.models import Document, DocumentType
+from documents.services.cache import ResponseCacheService
+
+
+class Command(BaseCommand):
+    help = "Recompute DocumentType.document_count from the documents table, or only verify it."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Report drift without fixing it.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = DocumentType.objects.annotate(
+            actual_count=Count('document', filter=Q(document__is_deleted=False))
+        ).order_by('id')
+
+        last_id = 0
+        checked = 0
+        drifted = []
+
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+
+            stale = [doc_type for doc_type in batch if doc_type.document_count != doc_type.actual_count]
+            for doc_type in stale:
+                self.stdout.write(
+                    f"Type {doc_type.id}: stored {doc_type.document_count}, actual {doc_type.actual_count}"
+                )
+
+            if stale and not options['verify']:
+                self.rebuild(stale)
+
+            drifted.extend(doc_type.id for doc_type in stale)
+            checked += len(batch)
+            last_id = batch[-1].id
+
+        if options['verify'] and drifted:
+            raise CommandError(f"{len(drifted)} of {checked} document types have drifted counters")
+
+        action = "Verified" if options['verify'] else "Rebuilt"
+        self.stdout.write(self.style.SUCCESS(f"{action} counters for {checked} document types"))
+
+    def rebuild(self, doc_types):
+        # Counted inside the UPDATE itself, so an increment committed after the scan
+        # above is not overwritten by a stale number.
+        live_count = (
+            Document.objects.filter(document_type=OuterRef('pk'), is_deleted=False)
+            .order_by()
+            .values('document_type')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        DocumentType.objects.filter(id__in=[doc_type.id for doc_type in doc_types]).update(
+            document_count=Coalesce(Subquery(live_count), 0),
+            updated_at=timezone.now()
+        )
+        ResponseCacheService.invalidate(
+            'categories', 'types',
+            *{ResponseCacheService.category_scope(doc_type.category_id) for doc_type in doc_types}
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from documents.models import UploadedTextFile
+from documents.services.search import SearchService
+
+
+class Command(BaseCommand):
+    help = "Create the full-text search index if needed and (re)index every extracted text."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        SearchService.ensure_schema()
+
+        batch_size = options['batch_size']
+        queryset = UploadedTextFile.objects.filter(document__is_deleted=False).order_by('id')
+        last_id = 0
+        indexed = 0
+
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            SearchService.index_text_files(batch)
+            last_id = batch[-1].id
+            indexed += len(batch)
+            self.stdout.write(f"Indexed {indexed} texts")
+
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({indexed} texts)"))
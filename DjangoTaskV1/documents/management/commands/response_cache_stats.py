@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from documents.services.cache import ResponseCacheService
+from documents.urls import urlpatterns
+
+
+class Command(BaseCommand):
+    help = "Show response cache hit/miss counters per documents endpoint."
+
+    def handle(self, *args, **options):
+        endpoints = [pattern.name for pattern in urlpatterns if pattern.name]
+        stats = ResponseCacheService.get_stats(endpoints)
+
+        self.stdout.write(f"{'endpoint':<32} {'hits':>8} {'misses':>8} {'hit ratio':>10}")
+        for endpoint, counters in stats.items():
+            if counters['hits'] or counters['misses']:
+                self.stdout.write(
+                    f"{endpoint:<32} {counters['hits']:>8} {counters['misses']:>8} {counters['hit_ratio']:>10.1%}"
+                )
@@ -0,0 +1,62 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from documents.instrumentation import start_request_metrics, stop_request_metrics
+
+logger = logging.getLogger('documents.metrics')
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    headers = {
+        'query_count': 'X-Query-Count',
+        'db_time_ms': 'X-DB-Time-ms',
+        'serializer_time_ms': 'X-Serializer-Time-ms',
+        'total_time_ms': 'X-Total-Time-ms',
+    }
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        metrics, token = start_request_metrics()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_request_metrics(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token = start_request_metrics()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_request_metrics(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        values = metrics.as_dict()
+        match = request.resolver_match
+        view = match.view_name if match else request.path
+
+        if getattr(settings, 'DOCUMENTS_METRICS_HEADERS', settings.DEBUG):
+            for key, header in self.headers.items():
+                response[header] = str(values[key])
+
+        logger.info(
+            "%s %s %s queries=%s db=%sms serializer=%sms total=%sms",
+            request.method, view, response.status_code, values['query_count'],
+            values['db_time_ms'], values['serializer_time_ms'], values['total_time_ms'],
+            extra=dict(values, view=view, method=request.method, status_code=response.status_code),
+        )
+        return response
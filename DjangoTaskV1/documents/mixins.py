@@ -0,0 +1,135 @@
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Manager, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from documents.services.cache import ResponseCacheService
+
+
+class CachedResponseMixin:
+    cache_scopes = ()
+
+    def get_cache_scopes(self):
+        return self.cache_scopes
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        endpoint = request.resolver_match.url_name
+        key = ResponseCacheService.build_key(endpoint, request, kwargs, self.get_cache_scopes())
+
+        data = ResponseCacheService.get(key)
+        if data is not None:
+            ResponseCacheService.record(endpoint, hit=True)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        ResponseCacheService.record(endpoint, hit=False)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            ResponseCacheService.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class ConditionalGetMixin:
+    # Goes in front of CachedResponseMixin: the validators are memoized under the same
+    # cache scopes, so a repeated poll gets its 304 without touching the database.
+    modified_fields = ('updated_at',)
+    conditional_object = None
+
+    def get_modified_fields(self):
+        return self.modified_fields
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None and self.paginator.use_cursor(request):
+            # Keyset pages skip the count query, which the validators would bring back.
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(super().list, self.get_list_state, False, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, self.get_object_state, True, request, *args, **kwargs)
+
+    def get_object(self):
+        if self.conditional_object is not None:
+            return self.conditional_object
+        return super().get_object()
+
+    def get_list_state(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = self.get_modified_fields()
+        # Filtering on pk keeps joins made by the view's own filters from narrowing the
+        # related timestamps, e.g. to the active types only.
+        state = queryset.model.objects.filter(pk__in=queryset.values('pk')).aggregate(
+            count=Count('pk', distinct=True),
+            **{f'{field}__max': Max(field) for field in fields}
+        )
+        if self.paginator is not None:
+            self.paginator.known_count = state['count']
+
+        timestamps = [state[f'{field}__max'] for field in fields if state[f'{field}__max']]
+        return state['count'], max(timestamps, default=None)
+
+    def get_object_state(self):
+        # The object is fetched once (with the view's select/prefetch) and reused by
+        # retrieve(), so a detail view still costs no extra query.
+        self.conditional_object = self.get_object()
+        timestamps = [
+            value for field in self.get_modified_fields()
+            for value in self.get_field_values(self.conditional_object, field)
+        ]
+        return len(timestamps), max(timestamps, default=None)
+
+    def get_field_values(self, instance, path):
+        values = [instance]
+        for name in path.split('__'):
+            related = []
+            for obj in values:
+                value = getattr(obj, name)
+                if isinstance(value, Manager):
+                    related.extend(value.all())
+                elif value is not None:
+                    related.append(value)
+            values = related
+        return values
+
+    def get_validators(self, state, detail):
+        count, modified = state
+        etag = hashlib.md5(
+            f"{count}:{modified.isoformat() if modified else ''}:{self.request.accepted_media_type}".encode()
+        ).hexdigest()
+
+        # A list also changes when rows leave it, which no remaining timestamp records,
+        # so only the ETag (which covers the row count) validates lists.
+        last_modified = timegm(modified.utctimetuple()) if detail and modified else None
+        return quote_etag(etag), last_modified
+
+    def conditional_response(self, handler, get_state, detail, request, *args, **kwargs):
+        endpoint = request.resolver_match.url_name
+        key = ResponseCacheService.build_key(f"{endpoint}:validators", request, kwargs, self.get_cache_scopes())
+
+        state = ResponseCacheService.get(key)
+        if state is None:
+            state = get_state()
+            ResponseCacheService.set(key, state)
+
+        etag, last_modified = self.get_validators(state, detail)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ['Accept'])
+        return response
@@ -1,5 +1,9 @@
+import uuid
+
 from django.db import models
 
+from documents.compression import compress, decompress, get_compression
+
 class Participant(models.Model):
     STATUS_CHOICES = [
         ('active', 'Active'),
@@ -10,6 +14,8 @@ class Participant(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    # The name is part of the category and type strings, so their validators track it.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
@@ -26,6 +32,16 @@ class DocumentCategory (models.Model):
     participant = models.ForeignKey(Participant, on_delete=models.CASCADE)
     title = models.CharField(max_length=100)
     is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['participant', 'id'], condition=models.Q(is_deleted=False),
+                name='category_participant_live_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.company} {self.participant} {self.title}"
@@ -37,6 +53,17 @@ class DocumentType(models.Model):
     public_visible = models.BooleanField()
     is_active = models.BooleanField()
     is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    document_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['category', 'is_active'], condition=models.Q(is_deleted=False),
+                name='type_category_live_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.category} {self.title}"
@@ -49,14 +76,168 @@ class Document(models.Model):
     file = models.FileField(upload_to='files/documents')
     is_active = models.BooleanField()
     is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['document_type'],
+                condition=models.Q(is_active=True, is_deleted=False),
+                name='unique_active_document_per_type',
+            ),
+        ]
+        # The unique constraint above already indexes the active document of a type.
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(is_deleted=False), name='document_live_idx'),
+            models.Index(
+                fields=['document_type', 'is_active'], condition=models.Q(is_deleted=False),
+                name='document_type_live_idx',
+            ),
+            models.Index(
+                fields=['participant', 'id'], condition=models.Q(is_deleted=False),
+                name='document_participant_live_idx',
+            ),
+            models.Index(
+                fields=['company', 'id'], condition=models.Q(is_deleted=False),
+                name='document_company_live_idx',
+            ),
+            models.Index(fields=['deleted_at'], condition=models.Q(is_deleted=True), name='document_purge_idx'),
+        ]
 
     def __str__(self):
         return f"{self.company} {self.participant} {self.document_type}"
 
-class UploadedTextFile (models.Model):
-    text = models.TextField()
+class CompressedText(models.Model):
+    """Extracted text stored as is or compressed, per DOCUMENTS_TEXT_COMPRESSION.
+
+    `text` reads and writes either form; the compressed bytes are decoded on first
+    access. Queries go through `raw_text`, which is empty for compressed rows.
+    """
+    COMPRESSION_CHOICES = [
+        ('', 'None'),
+        ('zlib', 'zlib'),
+        ('zstd', 'Zstandard'),
+    ]
+
+    raw_text = models.TextField(db_column='text', blank=True)
+    compressed_text = models.BinaryField(null=True, blank=True, editable=False)
+    compression = models.CharField(max_length=8, choices=COMPRESSION_CHOICES, blank=True, default='')
+
+    class Meta:
+        abstract = True
+
+    @property
+    def text(self):
+        if not self.compression:
+            return self.raw_text
+        # Cached against the bytes it came from, so refresh_from_db() invalidates it.
+        source, text = getattr(self, '_decoded', (None, None))
+        if source is not self.compressed_text:
+            text = decompress(self.compressed_text, self.compression)
+            self._decoded = (self.compressed_text, text)
+        return text
+
+    @text.setter
+    def text(self, value):
+        self.set_text(value, get_compression())
+
+    def set_text(self, value, codec):
+        self.compression = codec
+        self.raw_text = '' if codec else value
+        self.compressed_text = compress(value, codec) if codec else None
+        self._decoded = (self.compressed_text, value)
+
+
+class UploadedTextFile (CompressedText):
     document_type = models.ForeignKey(DocumentType, on_delete=models.CASCADE)
     document = models.ForeignKey(Document, on_delete=models.CASCADE)
+    page_count = models.PositiveIntegerField(default=0)
+    # Hash of the bytes the text was extracted from; the document's own hash changes
+    # when its file is replaced.
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['document', '-id'], name='textfile_document_latest_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.document_type} {self.document}"
+
+
+class UploadedTextPage(CompressedText):
+    text_file = models.ForeignKey(UploadedTextFile, on_delete=models.CASCADE, related_name='pages')
+    number = models.PositiveIntegerField()
+    # Offset of the page in the text file's full text.
+    start = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['text_file', 'number'], name='textpage_file_number_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.text_file_id} p{self.number}"
+
+
+class TaskOutbox(models.Model):
+    KIND_CHOICES = [
+        ('extract', 'Extract text'),
+        ('delete', 'Delete text'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    document_id = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.document_id}"
+
+
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.IntegerField()
+    participant = models.ForeignKey(Participant, on_delete=models.CASCADE)
+    document_type = models.ForeignKey(DocumentType, on_delete=models.CASCADE)
+    is_active = models.BooleanField(default=False)
+    file_name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    document = models.OneToOneField(Document, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.file_name} {self.received}/{self.size}"
+
+
+class ReindexJob(models.Model):
+    ACTION_CHOICES = [
+        ('extract', 'Extract text'),
+        ('delete', 'Delete text'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('superseded', 'Superseded'),
+    ]
+
+    document_type = models.ForeignKey(DocumentType, on_delete=models.CASCADE, related_name='reindex_jobs')
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total = models.PositiveIntegerField(null=True, blank=True)
+    processed = models.PositiveIntegerField(default=0)
+    last_id = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['document_type', '-id'], name='reindex_job_type_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.document_type} {self.document}"
\ No newline at end of file
+        return f"{self.action} {self.document_type_id} {self.status}"
@@ -1,6 +1,68 @@
-from rest_framework.pagination import PageNumberPagination
+from functools import partial
+
+from django.core.paginator import Paginator
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+
+
+class CountedPaginator(Paginator):
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            # Paginator.count is a cached_property; a total the view already has
+            # saves the COUNT query.
+            self.count = count
+
+
+class CustomCursorPagination(CursorPagination):
+    page_size = 5
+    page_size_query_param = 'size'
+    max_page_size = 100
+    ordering = 'id'
+
 
 class CustomPagination(PageNumberPagination):
     page_size = 5
     page_size_query_param = 'size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+    mode_query_param = 'pagination'
+    cursor_pagination_class = CustomCursorPagination
+
+    cursor_paginator = None
+    known_count = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor' or
+            self.cursor_pagination_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+        self.cursor_paginator = None
+        self.django_paginator_class = partial(CountedPaginator, count=self.known_count)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response_schema(schema)
+        return super().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        cursor_parameters = self.cursor_pagination_class().get_schema_operation_parameters(view)
+        return super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Set to 'cursor' for keyset pagination ordered by id (no count query).",
+                'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+            },
+        ] + [parameter for parameter in cursor_parameters if parameter['name'] == 'cursor']
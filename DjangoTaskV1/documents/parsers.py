@@ -0,0 +1,17 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from documents.services.upload import UploadService
+
+
+class ChunkParser(BaseParser):
+    media_type = 'application/octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return b''
+        limit = UploadService.get_max_chunk_size()
+        data = stream.read(limit + 1)
+        if len(data) > limit:
+            raise ParseError(f"Chunks may not exceed {limit} bytes.")
+        return data
@@ -2,10 +2,12 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from documents.serializers import DocumentCategorySerializer, CategoryWithDocTypeStatsSerializer, \
     GetDocumentCategorySerializer
+from documents.schemas.document import conditional_get_parameters, sparse_fieldset_parameters
 
 category_list_create_schema = extend_schema(
     summary="List all document categories",
-    responses=DocumentCategorySerializer(many=True)
+    parameters=conditional_get_parameters,
+    responses={200: DocumentCategorySerializer(many=True), 304: None}
 )
 
 category_create_schema = extend_schema(
@@ -16,7 +18,8 @@ category_create_schema = extend_schema(
 
 category_retrieve_schema = extend_schema(
     summary="Retrieve a document category",
-    responses=GetDocumentCategorySerializer
+    parameters=conditional_get_parameters,
+    responses={200: GetDocumentCategorySerializer, 304: None}
 )
 
 category_update_schema = extend_schema(
@@ -54,6 +57,8 @@ category_with_type_and_count_schema = extend_schema(
         OpenApiParameter("participant_id", OpenApiTypes.INT, OpenApiParameter.QUERY),
         OpenApiParameter("category_id", OpenApiTypes.INT, OpenApiParameter.QUERY),
         OpenApiParameter("has_active_type", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+        *sparse_fieldset_parameters,
+        *conditional_get_parameters,
     ],
-    responses=CategoryWithDocTypeStatsSerializer(many=True)
+    responses={200: CategoryWithDocTypeStatsSerializer(many=True), 304: None}
 )
\ No newline at end of file
@@ -1,10 +1,26 @@
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from documents.serializers import DocumentSerializer
+from documents.serializers import DocumentSerializer, DocumentBulkUploadSerializer
+
+sparse_fieldset_parameters = [
+    OpenApiParameter("fields", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="Comma separated fields to return; all fields when omitted."),
+    OpenApiParameter("omit", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="Comma separated fields to leave out."),
+]
+
+conditional_get_parameters = [
+    OpenApiParameter("If-None-Match", OpenApiTypes.STR, OpenApiParameter.HEADER,
+                     description="ETag of a previous response; 304 when nothing changed since."),
+    OpenApiParameter("If-Modified-Since", OpenApiTypes.STR, OpenApiParameter.HEADER,
+                     description="HTTP date; 304 when the object has not changed since. Detail views only."),
+]
 
 document_list_schema = extend_schema(
     summary="List all documents",
-    responses=DocumentSerializer(many=True)
+    parameters=[*sparse_fieldset_parameters, *conditional_get_parameters],
+    responses={200: DocumentSerializer(many=True), 304: None}
 )
 
 document_create_schema = extend_schema(
@@ -15,7 +31,8 @@ document_create_schema = extend_schema(
 
 document_retrieve_schema = extend_schema(
     summary="Retrieve a document",
-    responses=DocumentSerializer
+    parameters=[*sparse_fieldset_parameters, *conditional_get_parameters],
+    responses={200: DocumentSerializer, 304: None}
 )
 
 document_update_schema = extend_schema(
@@ -33,4 +50,34 @@ document_partial_update_schema = extend_schema(
 document_delete_schema = extend_schema(
     summary="Soft delete a document",
     responses={204: None}
-)
\ No newline at end of file
+)
+
+document_bulk_create_schema = extend_schema(
+    summary="Upload many documents in one multipart request",
+    description=(
+        "Send every file under `files`. Metadata (`company`, `participant`, `document_type`, "
+        "`is_active`) can be given once for all files, or per file as a JSON list in `metadata` "
+        "with one object per file in the same order."
+    ),
+    request={'multipart/form-data': DocumentBulkUploadSerializer},
+    responses=DocumentSerializer(many=True)
+)
+
+document_export_schema = extend_schema(
+    summary="Stream every matching document as NDJSON or CSV",
+    description=(
+        "Rows carry the participant, document type and category of each document, and with "
+        "`include_text=true` the extracted text. The response is streamed, so any number of "
+        "rows can be exported in one request."
+    ),
+    parameters=[
+        OpenApiParameter("export_format", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=['ndjson', 'csv']),
+        OpenApiParameter("company", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("participant_id", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("include_text", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+    ],
+    responses={
+        (200, 'application/x-ndjson'): OpenApiTypes.STR,
+        (200, 'text/csv'): OpenApiTypes.STR,
+    }
+)
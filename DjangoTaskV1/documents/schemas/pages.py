@@ -0,0 +1,18 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+from documents.serializers import DocumentTextPagesSerializer
+
+document_text_pages_schema = extend_schema(
+    summary="Get a page range of a document's extracted text",
+    description=(
+        "Pages are numbered from 1 and the range is inclusive; `end_page` defaults to `start_page` "
+        "and is clipped to the page count. `start` and `end` are the character offsets of each "
+        "page in the full text."
+    ),
+    parameters=[
+        OpenApiParameter("start_page", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("end_page", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    ],
+    responses=DocumentTextPagesSerializer
+)
@@ -0,0 +1,17 @@
+from drf_spectacular.utils import extend_schema
+
+from documents.serializers import ReindexJobSerializer
+
+reindex_job_list_schema = extend_schema(
+    summary="List the text reindex jobs of a document type",
+    description=(
+        "A job is queued whenever the type stops or starts being extractable. `processed` "
+        "counts the rows handled out of `total`; a newer job marks older ones `superseded`."
+    ),
+    responses=ReindexJobSerializer(many=True)
+)
+
+reindex_job_retrieve_schema = extend_schema(
+    summary="Get the progress of a reindex job",
+    responses=ReindexJobSerializer
+)
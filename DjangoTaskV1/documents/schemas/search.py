@@ -0,0 +1,17 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+from documents.serializers import DocumentSearchResultSerializer
+
+document_search_schema = extend_schema(
+    summary="Full-text search over extracted document text",
+    parameters=[
+        OpenApiParameter("q", OpenApiTypes.STR, OpenApiParameter.QUERY, required=True),
+        OpenApiParameter("participant_id", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("company", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("document_type_id", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("size", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    ],
+    responses={200: DocumentSearchResultSerializer(many=True), 400: None, 501: None}
+)
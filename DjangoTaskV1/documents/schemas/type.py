@@ -1,9 +1,11 @@
 from drf_spectacular.utils import extend_schema
+from documents.schemas.document import conditional_get_parameters
 from documents.serializers import DocumentTypeSerializer
 
 document_type_list_schema = extend_schema(
     summary="List all document types",
-    responses=DocumentTypeSerializer(many=True),
+    parameters=conditional_get_parameters,
+    responses={200: DocumentTypeSerializer(many=True), 304: None},
 )
 
 document_type_create_schema = extend_schema(
@@ -14,7 +16,8 @@ document_type_create_schema = extend_schema(
 
 document_type_retrieve_schema = extend_schema(
     summary="Retrieve a document type",
-    responses=DocumentTypeSerializer,
+    parameters=conditional_get_parameters,
+    responses={200: DocumentTypeSerializer, 304: None},
 )
 
 document_type_update_schema = extend_schema(
@@ -0,0 +1,41 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+from documents.serializers import UploadSessionSerializer, DocumentSerializer
+
+upload_session_create_schema = extend_schema(
+    summary="Start a chunked, resumable upload",
+    description=(
+        "Declare the document metadata, `file_name` and total `size`. Send the bytes with "
+        "PUT on the returned session, then finalize it to create the document."
+    ),
+    request=UploadSessionSerializer,
+    responses=UploadSessionSerializer
+)
+
+upload_session_retrieve_schema = extend_schema(
+    summary="Get the upload progress",
+    description="`received` is the offset the next chunk must start at when resuming.",
+    responses=UploadSessionSerializer
+)
+
+upload_session_chunk_schema = extend_schema(
+    summary="Upload the next chunk",
+    description=(
+        "The body is the raw chunk (`application/octet-stream`). `Upload-Offset` must equal the "
+        "bytes received so far; a mismatch returns 409 with the expected offset."
+    ),
+    parameters=[
+        OpenApiParameter("Upload-Offset", OpenApiTypes.INT, OpenApiParameter.HEADER, required=True),
+        OpenApiParameter("Upload-Checksum", OpenApiTypes.STR, OpenApiParameter.HEADER,
+                         description="Optional SHA-256 hex digest of the chunk."),
+    ],
+    request={'application/octet-stream': OpenApiTypes.BINARY},
+    responses=UploadSessionSerializer
+)
+
+upload_session_finalize_schema = extend_schema(
+    summary="Finish the upload and create the document",
+    request=None,
+    responses=DocumentSerializer
+)
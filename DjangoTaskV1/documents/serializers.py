@@ -1,13 +1,40 @@
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from documents.models import Document, DocumentCategory, DocumentType
+from documents.instrumentation import InstrumentedSerializerMixin
+from documents.models import (
+    Document, DocumentCategory, DocumentType, Participant, ReindexJob, UploadedTextPage, UploadSession
+)
 from documents.services.category import DocumentCategoryService
 
+class SparseFieldsetMixin:
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def is_sparse_root(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD') or not self.is_sparse_root():
+            return fields
+
+        params = getattr(request, 'query_params', request.GET)
+        only = {name.strip() for name in params.get(self.fields_query_param, '').split(',') if name.strip()}
+        omit = {name.strip() for name in params.get(self.omit_query_param, '').split(',') if name.strip()}
+
+        for name in list(fields):
+            if (only and name not in only) or name in omit:
+                fields.pop(name)
+        return fields
+
+
 class DocumentRequestId(serializers.Serializer):
     id = serializers.IntegerField()
 
-class DocumentTypeSerializer(serializers.ModelSerializer):
+class DocumentTypeSerializer(SparseFieldsetMixin, InstrumentedSerializerMixin, serializers.ModelSerializer):
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=DocumentCategory.objects.filter(is_deleted=False),
         source='category',
@@ -31,13 +58,30 @@ class DocumentTypeSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'is_deleted']
 
-class GetDocumentCategorySerializer(serializers.ModelSerializer):
+class CategoryDocumentTypeSerializer(DocumentTypeSerializer):
+    id = serializers.IntegerField(required=False)
+    category_id = None
+    category = None
+    document_count = None
+
+    class Meta(DocumentTypeSerializer.Meta):
+        fields = [
+            'id',
+            'title',
+            'private_visible',
+            'public_visible',
+            'is_active',
+        ]
+        read_only_fields = []
+
+
+class GetDocumentCategorySerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = DocumentCategory
         fields = ['id', 'company', 'participant', 'title', 'is_deleted']
 
-class DocumentCategorySerializer(serializers.ModelSerializer):
-    types = DocumentTypeSerializer(many=True, write_only=True)
+class DocumentCategorySerializer(SparseFieldsetMixin, InstrumentedSerializerMixin, serializers.ModelSerializer):
+    types = CategoryDocumentTypeSerializer(many=True, write_only=True)
     document_types = DocumentTypeSerializer(source='types', many=True, read_only=True)
 
     class Meta:
@@ -52,7 +96,7 @@ class DocumentCategorySerializer(serializers.ModelSerializer):
         return DocumentCategoryService.update_category_with_types(instance, validated_data)
 
 
-class DocumentSerializer(serializers.ModelSerializer):
+class DocumentSerializer(SparseFieldsetMixin, InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Document
         fields = [
@@ -66,25 +110,118 @@ class DocumentSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'is_deleted']
 
+
+class UploadedDocumentSerializer(DocumentSerializer):
+    file = serializers.FileField(read_only=True)
+
+
+class UploadSessionSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    document_type = serializers.PrimaryKeyRelatedField(queryset=DocumentType.objects.filter(is_deleted=False))
+    size = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id',
+            'company',
+            'participant',
+            'document_type',
+            'is_active',
+            'file_name',
+            'size',
+            'received',
+            'document',
+        ]
+        read_only_fields = ['id', 'received', 'document']
+
+
+class ReindexJobSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ReindexJob
+        fields = [
+            'id',
+            'document_type',
+            'action',
+            'status',
+            'total',
+            'processed',
+            'created_at',
+            'updated_at',
+            'finished_at',
+        ]
+
+
+class DocumentBulkUploadSerializer(serializers.Serializer):
+    files = serializers.ListField(child=serializers.FileField(), allow_empty=False)
+    metadata = serializers.JSONField(required=False)
+    company = serializers.IntegerField(required=False)
+    participant = serializers.IntegerField(required=False)
+    document_type = serializers.IntegerField(required=False)
+    is_active = serializers.BooleanField(required=False, default=False)
+
+    item_fields = ('company', 'participant', 'document_type')
+
     def validate(self, attrs):
-        doc_type = attrs.get("document_type")
+        files = attrs['files']
+        metadata = attrs.get('metadata') or [{} for _ in files]
+
+        if not isinstance(metadata, list) or len(metadata) != len(files):
+            raise serializers.ValidationError({"metadata": ["Expected one metadata object per file."]})
 
-        if doc_type:
-            has_active = Document.objects.filter(
-                document_type=doc_type,
-                is_active=True,
-                is_deleted=False
-            ).exists()
+        items = []
+        errors = {}
+        for index, (file, meta) in enumerate(zip(files, metadata)):
+            if not isinstance(meta, dict):
+                errors[index] = ["Expected an object."]
+                continue
 
-            if not has_active:
-                attrs["is_active"] = True
-            else:
-                attrs["is_active"] = attrs.get("is_active", False)
+            item = {'file': file, 'is_active': attrs['is_active']}
+            item_errors = []
+            if 'is_active' in meta:
+                # Metadata values may arrive as multipart strings such as "false" or "0".
+                try:
+                    item['is_active'] = serializers.BooleanField().to_internal_value(meta['is_active'])
+                except serializers.ValidationError:
+                    item_errors.append("A valid boolean is required for is_active.")
+            invalid = []
+            for field in self.item_fields:
+                try:
+                    item[field] = int(meta.get(field, attrs.get(field)))
+                except (TypeError, ValueError):
+                    invalid.append(field)
+            if invalid:
+                item_errors.append(f"A valid integer is required for {', '.join(invalid)}.")
+            if item_errors:
+                errors[index] = item_errors
+            items.append(item)
 
+        if errors:
+            raise serializers.ValidationError({"metadata": errors})
+
+        participants = Participant.objects.in_bulk({item['participant'] for item in items})
+        document_types = DocumentType.objects.filter(is_deleted=False).in_bulk(
+            {item['document_type'] for item in items}
+        )
+
+        for index, item in enumerate(items):
+            item_errors = []
+            item['participant'] = participants.get(item['participant'])
+            item['document_type'] = document_types.get(item['document_type'])
+            if item['participant'] is None:
+                item_errors.append("Invalid participant.")
+            if item['document_type'] is None:
+                item_errors.append("Invalid or deleted document type.")
+            if item_errors:
+                errors[index] = item_errors
+
+        if errors:
+            raise serializers.ValidationError({"metadata": errors})
+
+        attrs['items'] = items
         return attrs
 
 
-class DocumentTypeWithCountSerializer(serializers.ModelSerializer):
+class DocumentTypeWithCountSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     document_count = serializers.IntegerField()
 
     class Meta:
@@ -99,7 +236,7 @@ class DocumentTypeWithCountSerializer(serializers.ModelSerializer):
         ]
 
 
-class CategoryWithDocTypeStatsSerializer(serializers.ModelSerializer):
+class CategoryWithDocTypeStatsSerializer(SparseFieldsetMixin, InstrumentedSerializerMixin, serializers.ModelSerializer):
     types = serializers.SerializerMethodField()
 
     class Meta:
@@ -114,3 +251,28 @@ class CategoryWithDocTypeStatsSerializer(serializers.ModelSerializer):
 
     def get_types(self, obj):
         return DocumentTypeWithCountSerializer(obj.types.all(), many=True).data
+
+
+class DocumentSearchResultSerializer(InstrumentedSerializerMixin, serializers.Serializer):
+    rank = serializers.FloatField()
+    text_file_id = serializers.IntegerField()
+    document = DocumentSerializer()
+
+
+class UploadedTextPageSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    end = serializers.SerializerMethodField()
+    text = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = UploadedTextPage
+        fields = ['number', 'start', 'end', 'text']
+
+    def get_end(self, obj) -> int:
+        return obj.start + len(obj.text)
+
+
+class DocumentTextPagesSerializer(serializers.Serializer):
+    document = serializers.IntegerField()
+    text_file = serializers.IntegerField()
+    page_count = serializers.IntegerField()
+    pages = UploadedTextPageSerializer(many=True)
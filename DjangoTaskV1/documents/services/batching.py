@@ -0,0 +1,52 @@
+import contextvars
+
+from django.db import transaction
+
+from documents.services.outbox import OutboxService
+
+_current_batcher = contextvars.ContextVar('documents_task_batcher', default=None)
+
+
+class TaskBatcher:
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or OutboxService.get_batch_size()
+        self.pending = {kind: {} for kind in OutboxService.TASKS}
+        self.token = None
+
+    @staticmethod
+    def enqueue(kind, document_ids):
+        batcher = _current_batcher.get()
+        if batcher is not None:
+            batcher.add(kind, document_ids)
+        else:
+            TaskBatcher.dispatch(kind, document_ids)
+
+    @staticmethod
+    def dispatch(kind, document_ids, batch_size=None):
+        document_ids = list(document_ids)
+        if not document_ids:
+            return
+
+        # The outbox rows commit or roll back with the caller's transaction;
+        # without the outbox, tasks are sent once the rows they read are committed.
+        if OutboxService.is_enabled():
+            OutboxService.add(kind, document_ids)
+        else:
+            transaction.on_commit(lambda: OutboxService.send(kind, document_ids, batch_size))
+
+    def add(self, kind, document_ids):
+        self.pending[kind].update(dict.fromkeys(document_ids))
+
+    def flush(self):
+        for kind, document_ids in self.pending.items():
+            TaskBatcher.dispatch(kind, document_ids, self.batch_size)
+            document_ids.clear()
+
+    def __enter__(self):
+        self.token = _current_batcher.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current_batcher.reset(self.token)
+        if exc_type is None:
+            self.flush()
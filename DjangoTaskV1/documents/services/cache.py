@@ -0,0 +1,143 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete
+
+from documents.models import Document, DocumentCategory, DocumentType, Participant
+
+
+class ResponseCacheService:
+    PREFIX = 'documents'
+
+    @staticmethod
+    def get_cache():
+        return caches[getattr(settings, 'DOCUMENTS_RESPONSE_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def get_timeout():
+        return getattr(settings, 'DOCUMENTS_RESPONSE_CACHE_TIMEOUT', 300)
+
+    @staticmethod
+    def version_key(scope):
+        return f"{ResponseCacheService.PREFIX}:version:{scope}"
+
+    @staticmethod
+    def get_versions(scopes):
+        cache = ResponseCacheService.get_cache()
+        keys = [ResponseCacheService.version_key(scope) for scope in scopes]
+        versions = cache.get_many(keys)
+
+        for key in keys:
+            if key not in versions:
+                # A fresh, time based version can never collide with responses cached
+                # under a version that was evicted from the cache.
+                cache.add(key, time.time_ns(), timeout=None)
+                versions[key] = cache.get(key)
+
+        return [versions[key] for key in keys]
+
+    @staticmethod
+    def bump(scopes):
+        cache = ResponseCacheService.get_cache()
+        for scope in scopes:
+            key = ResponseCacheService.version_key(scope)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, time.time_ns(), timeout=None)
+
+    @staticmethod
+    def invalidate(*scopes):
+        # Bump now so this request's own reads miss, and again after commit so
+        # a response cached by a concurrent reader before the commit is dropped.
+        ResponseCacheService.bump(scopes)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: ResponseCacheService.bump(scopes))
+
+    @staticmethod
+    def category_scope(category_id):
+        return f"category:{category_id}"
+
+    @staticmethod
+    def get_instance_scopes(instance):
+        # The scopes whose responses show the instance, either itself or as the string
+        # of a related row (a participant's name is part of its categories' strings).
+        if isinstance(instance, Participant):
+            category_ids = DocumentCategory.objects.filter(participant_id=instance.pk).values_list('id', flat=True)
+            return ['categories', 'types', *map(ResponseCacheService.category_scope, category_ids)]
+        if isinstance(instance, DocumentCategory):
+            return ['categories', 'types', ResponseCacheService.category_scope(instance.pk)]
+        if isinstance(instance, DocumentType):
+            return ['types', ResponseCacheService.category_scope(instance.category_id)]
+        if isinstance(instance, Document):
+            if Document.document_type.is_cached(instance):
+                category_id = instance.document_type.category_id
+            else:
+                category_id = (
+                    DocumentType.objects.filter(id=instance.document_type_id)
+                    .values_list('category_id', flat=True).first()
+                )
+            return ['documents', ResponseCacheService.category_scope(category_id)]
+        return []
+
+    @staticmethod
+    def invalidate_instance(sender, instance, **kwargs):
+        # Connected to post_save/post_delete, so writes that bypass the services (the
+        # admin, a plain save()) drop the cached responses and validators too. The
+        # services still invalidate themselves: update() and bulk_update() send no
+        # signals. Purging soft-deleted rows changes no response.
+        if kwargs.get('signal') is post_delete and getattr(instance, 'is_deleted', False):
+            return
+        ResponseCacheService.invalidate(*ResponseCacheService.get_instance_scopes(instance))
+
+    @staticmethod
+    def build_key(endpoint, request, view_kwargs, scopes):
+        query_params = request.query_params
+        payload = json.dumps(
+            {
+                'host': request.get_host(),
+                'params': sorted((key, query_params.getlist(key)) for key in query_params),
+                'kwargs': sorted(view_kwargs.items()),
+                'versions': ResponseCacheService.get_versions(scopes),
+            },
+            default=str,
+        )
+        digest = hashlib.md5(payload.encode()).hexdigest()
+        return f"{ResponseCacheService.PREFIX}:response:{endpoint}:{digest}"
+
+    @staticmethod
+    def get(key):
+        return ResponseCacheService.get_cache().get(key)
+
+    @staticmethod
+    def set(key, data):
+        ResponseCacheService.get_cache().set(key, data, ResponseCacheService.get_timeout())
+
+    @staticmethod
+    def stats_key(endpoint, outcome):
+        return f"{ResponseCacheService.PREFIX}:stats:{endpoint}:{outcome}"
+
+    @staticmethod
+    def record(endpoint, hit):
+        cache = ResponseCacheService.get_cache()
+        key = ResponseCacheService.stats_key(endpoint, 'hit' if hit else 'miss')
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+    @staticmethod
+    def get_stats(endpoints):
+        cache = ResponseCacheService.get_cache()
+        stats = {}
+        for endpoint in endpoints:
+            hits = cache.get(ResponseCacheService.stats_key(endpoint, 'hit'), 0)
+            misses = cache.get(ResponseCacheService.stats_key(endpoint, 'miss'), 0)
+            stats[endpoint] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+            }
+        return stats
@@ -1,52 +1,109 @@
-from django.db.models import Count, Q, Prefetch
+import copy
 
-from documents.models import DocumentCategory, DocumentType
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from documents.models import Document, DocumentCategory, DocumentType
+from documents.services.cache import ResponseCacheService
+from documents.services.document import DocumentService
+from documents.services.reindex import ReindexService
+from documents.services.type import DocumentTypeService
 
 
 class DocumentCategoryService:
     @staticmethod
     def create_category_with_types(validated_data):
         types_data = validated_data.pop('types', [])
-        category = DocumentCategory.objects.create(**validated_data)
-        for type_data in types_data:
-            type_data.pop('category', None)
-            DocumentType.objects.create(category=category, **type_data)
+
+        with transaction.atomic():
+            category = DocumentCategory.objects.create(**validated_data)
+            DocumentType.objects.bulk_create([
+                DocumentType(category=category, **DocumentCategoryService.clean_type_data(type_data))
+                for type_data in types_data
+            ])
+            DocumentCategoryService.invalidate_cache(category.id)
         return category
 
+    @staticmethod
+    def invalidate_cache(category_id):
+        ResponseCacheService.invalidate('categories', 'types', ResponseCacheService.category_scope(category_id))
+
+    @staticmethod
+    def clean_type_data(type_data):
+        type_data = dict(type_data)
+        type_data.pop('id', None)
+        type_data.pop('category', None)
+        return type_data
+
     @staticmethod
     def update_category_with_types(instance, validated_data):
         types_data = validated_data.pop('types', None)
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
-        if types_data is not None:
-            sent_type_ids = [t.get('id') for t in types_data if t.get('id') is not None]
-    
-            instance.types.exclude(id__in=sent_type_ids).delete()
-
-            for type_data in types_data:
-                type_id = type_data.pop('id', None)
-                type_data.pop('category', None)
-
-                if type_id:
-                    try:
-                        doc_type = instance.types.get(id=type_id)
-                        for attr, value in type_data.items():
-                            setattr(doc_type, attr, value)
-                        doc_type.save()
-                    except DocumentType.DoesNotExist:
-                        continue
-                else:
-                    DocumentType.objects.create(category=instance, **type_data)
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            if types_data is not None:
+                DocumentCategoryService.sync_types(instance, types_data)
+
+            DocumentCategoryService.invalidate_cache(instance.id)
 
         return instance
 
+    @staticmethod
+    def sync_types(category, types_data):
+        sent_type_ids = [t.get('id') for t in types_data if t.get('id') is not None]
+
+        # Omitted types are soft-deleted like the type destroy endpoint does, so their
+        # documents, counts and cached responses follow and the purge removes them.
+        DocumentTypeService.soft_delete_types(category.types.filter(is_deleted=False).exclude(id__in=sent_type_ids))
+        existing = category.types.in_bulk(sent_type_ids)
+
+        to_update = []
+        to_create = []
+        transitions = []
+        updated_fields = set()
+        for type_data in types_data:
+            type_id = type_data.get('id')
+            values = DocumentCategoryService.clean_type_data(type_data)
+
+            if type_id:
+                doc_type = existing.get(type_id)
+                if doc_type is None:
+                    continue
+                old_type = copy.copy(doc_type)
+                for attr, value in values.items():
+                    setattr(doc_type, attr, value)
+                updated_fields.update(values)
+                to_update.append(doc_type)
+                transitions.append((old_type, doc_type))
+            else:
+                to_create.append(DocumentType(category=category, **values))
+
+        if to_update and updated_fields:
+            # bulk_update() skips auto_now, and the timestamp versions conditional GETs.
+            now = timezone.now()
+            for doc_type in to_update:
+                doc_type.updated_at = now
+            DocumentType.objects.bulk_update(to_update, sorted(updated_fields | {'updated_at'}))
+        if to_create:
+            DocumentType.objects.bulk_create(to_create)
+        ReindexService.schedule_visibility_changes(transitions)
+
     @staticmethod
     def soft_delete_category(instance):
-        instance.is_deleted = True
-        instance.save()
+        now = timezone.now()
+        with transaction.atomic():
+            instance.is_deleted = True
+            instance.deleted_at = now
+            instance.save()
+            instance.types.filter(is_deleted=False).update(
+                is_deleted=True, deleted_at=now, updated_at=now, document_count=0
+            )
+            DocumentService.soft_delete_documents(Document.objects.filter(document_type__category=instance), now)
+            DocumentCategoryService.invalidate_cache(instance.id)
 
 
 
@@ -67,10 +124,6 @@ class CategoryService:
                 types__is_deleted=False
             ).distinct()
 
-        annotated_types = DocumentType.objects.filter(is_deleted=False).annotate(
-            document_count=Count('document', filter=Q(document__is_deleted=False))
-        )
-
         return queryset.prefetch_related(
-            Prefetch('types', queryset=annotated_types)
+            Prefetch('types', queryset=DocumentType.objects.filter(is_deleted=False))
         )
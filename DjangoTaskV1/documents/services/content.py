@@ -0,0 +1,93 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Max, Prefetch
+
+from documents.models import Document, UploadedTextFile, UploadedTextPage
+
+
+class ContentService:
+    @staticmethod
+    def storage_dedup_enabled():
+        return getattr(settings, 'DOCUMENTS_STORAGE_DEDUP', False)
+
+    @staticmethod
+    def hash_file(file):
+        digest = hashlib.sha256()
+        for chunk in file.chunks():
+            digest.update(chunk)
+        file.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def prepare_uploads(files):
+        # With storage dedup enabled each upload is replaced by the name of identical
+        # bytes that are already stored, so every distinct content is written once.
+        hashes = [ContentService.hash_file(file) for file in files]
+        if not ContentService.storage_dedup_enabled():
+            return list(zip(hashes, files))
+
+        # Files that only soft-deleted documents point at are left to the purge.
+        stored = dict(
+            Document.objects.filter(content_hash__in=set(hashes), is_deleted=False)
+            .exclude(file='')
+            .values_list('content_hash', 'file')
+        )
+        field = Document._meta.get_field('file')
+
+        prepared = []
+        for content_hash, file in zip(hashes, files):
+            if content_hash not in stored:
+                stored[content_hash] = field.storage.save(
+                    field.generate_filename(None, file.name), file, max_length=field.max_length
+                )
+            prepared.append((content_hash, stored[content_hash]))
+        return prepared
+
+    @staticmethod
+    def find_stored(content_hash):
+        if not ContentService.storage_dedup_enabled():
+            return None
+        return (
+            Document.objects.filter(content_hash=content_hash, is_deleted=False)
+            .exclude(file='')
+            .values_list('file', flat=True)
+            .first()
+        )
+
+    @staticmethod
+    def prepare_upload(file):
+        [(content_hash, file)] = ContentService.prepare_uploads([file])
+        return {'content_hash': content_hash, 'file': file}
+
+    @staticmethod
+    def ensure_hash(document):
+        if not document.content_hash and document.file:
+            with document.file.storage.open(document.file.name, 'rb') as file:
+                document.content_hash = ContentService.hash_file(file)
+            Document.objects.filter(id=document.id).update(content_hash=document.content_hash)
+        return document.content_hash
+
+    @staticmethod
+    def get_cached_texts(content_hashes):
+        # Text is reused from the pages of the latest text file extracted from the same
+        # bytes; the full text is joined from them rather than read a second time. Text
+        # files saved before pages or hashes were kept are skipped, so their bytes are
+        # extracted again.
+        latest_ids = (
+            UploadedTextFile.objects.filter(content_hash__in=set(content_hashes))
+            .values('content_hash')
+            .annotate(latest_id=Max('id'))
+            .values('latest_id')
+        )
+        text_files = (
+            UploadedTextFile.objects.filter(id__in=latest_ids)
+            .only('content_hash', 'page_count')
+            .prefetch_related(Prefetch('pages', queryset=UploadedTextPage.objects.order_by('number')))
+        )
+        texts = {}
+        for text_file in text_files:
+            page_texts = [page.text for page in text_file.pages.all()]
+            if text_file.page_count and len(page_texts) == text_file.page_count:
+                texts[text_file.content_hash] = ("".join(page_texts), page_texts)
+        return texts
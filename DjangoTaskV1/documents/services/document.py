@@ -1,27 +1,264 @@
-from documents.models import Document
-from documents.tasks import extract_and_save_pdf_text, delete_uploaded_text
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from rest_framework import serializers
+
+from documents.models import Document, DocumentType
+from documents.services.batching import TaskBatcher
+from documents.services.cache import ResponseCacheService
+from documents.services.content import ContentService
 
 class DocumentService:
     @staticmethod
-    def ensure_single_active(document_type):
-        old_active = Document.objects.filter(
+    def lock_document_types(document_type_ids):
+        # Row locks on the types serialize concurrent activations of the same type;
+        # ordering by id keeps multi-type lockers from deadlocking each other.
+        list(
+            DocumentType.objects.select_for_update()
+            .filter(id__in=document_type_ids)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    @staticmethod
+    def deactivate_active(document_type_ids, exclude_id=None):
+        document_type_ids = list(document_type_ids)
+        if not document_type_ids:
+            return []
+
+        placeholders = ', '.join(['%s'] * len(document_type_ids))
+        sql = (
+            f"UPDATE {Document._meta.db_table} SET is_active = %s, updated_at = %s "
+            f"WHERE document_type_id IN ({placeholders}) AND is_active = %s AND is_deleted = %s"
+        )
+        params = [False, timezone.now(), *document_type_ids, True, False]
+        if exclude_id is not None:
+            sql += " AND id <> %s"
+            params.append(exclude_id)
+        sql += " RETURNING id, document_type_id"
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    @staticmethod
+    def adjust_document_counts(deltas):
+        deltas = {type_id: delta for type_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        DocumentType.objects.filter(id__in=deltas).update(
+            document_count=Case(
+                *[
+                    When(id=type_id, then=Greatest(F('document_count') + delta, Value(0)))
+                    for type_id, delta in deltas.items()
+                ],
+                default=F('document_count'),
+                output_field=IntegerField(),
+            ),
+            updated_at=timezone.now(),
+        )
+
+    @staticmethod
+    def invalidate_cache(*document_types):
+        ResponseCacheService.invalidate('documents', *{
+            ResponseCacheService.category_scope(document_type.category_id) for document_type in document_types
+        })
+
+    @staticmethod
+    def has_active(document_type):
+        return Document.objects.filter(
             document_type=document_type,
             is_active=True,
             is_deleted=False
-        ).first()
+        ).exists()
+
+    @staticmethod
+    def ensure_single_active(document_type, exclude_id=None):
+        replaced = [
+            document_id for document_id, _ in
+            DocumentService.deactivate_active([document_type.id], exclude_id=exclude_id)
+        ]
+        if replaced and (document_type.public_visible or document_type.private_visible):
+            DocumentService.delete_uploaded_texts(replaced)
+        return replaced
+
+    @staticmethod
+    def save_active_document(serializer, document_type, requested_active, **save_kwargs):
+        instance = serializer.instance
+
+        with transaction.atomic():
+            DocumentService.lock_document_types([document_type.id])
 
-        if old_active:
-            old_active.is_active = False
-            old_active.save()
+            if requested_active:
+                DocumentService.ensure_single_active(
+                    document_type, exclude_id=instance.id if instance else None
+                )
+                is_active = True
+            else:
+                is_active = not DocumentService.has_active(document_type)
 
-            if document_type.public_visible or document_type.private_visible:
-                delete_uploaded_text.delay(old_active.id)
+            try:
+                with transaction.atomic():
+                    document = serializer.save(is_active=is_active, **save_kwargs)
+            except IntegrityError:
+                raise serializers.ValidationError(
+                    {"is_active": ["Another active document exists for this document type."]}
+                )
+
+        return document
+
+    @staticmethod
+    def create_document(serializer, **save_kwargs):
+        document_type = serializer.validated_data['document_type']
+
+        with transaction.atomic():
+            document = DocumentService.save_active_document(
+                serializer,
+                document_type,
+                serializer.validated_data.get('is_active', False),
+                **(save_kwargs or ContentService.prepare_upload(serializer.validated_data['file']))
+            )
+            DocumentService.adjust_document_counts({document_type.id: 1})
+            DocumentService.invalidate_cache(document_type)
+            DocumentService.save_uploaded_text(document)
+
+        return document
+
+    @staticmethod
+    def update_document(serializer):
+        instance = serializer.instance
+        data = serializer.validated_data
+        save_kwargs = ContentService.prepare_upload(data['file']) if data.get('file') else {}
+        was_active = instance.is_active
+        old_type = instance.document_type
+        old_file = instance.file.name
+
+        if 'is_active' not in data and 'document_type' not in data:
+            with transaction.atomic():
+                document = serializer.save(**save_kwargs)
+                DocumentService.invalidate_cache(document.document_type)
+                DocumentService.refresh_uploaded_text(document, was_active, document.file.name != old_file)
+            return document
+
+        document_type = data.get('document_type', instance.document_type)
+
+        with transaction.atomic():
+            document = DocumentService.save_active_document(
+                serializer,
+                document_type,
+                data.get('is_active', instance.is_active),
+                **save_kwargs
+            )
+            if old_type.id != document_type.id and not document.is_deleted:
+                DocumentService.adjust_document_counts({old_type.id: -1, document_type.id: 1})
+            DocumentService.invalidate_cache(old_type, document_type)
+            DocumentService.refresh_uploaded_text(
+                document, was_active, document.file.name != old_file or old_type.id != document_type.id
+            )
+
+        return document
+
+    @staticmethod
+    def refresh_uploaded_text(document, was_active, source_changed):
+        # Extraction replaces the existing text in one transaction, so a changed source
+        # only queues the extraction: a separate delete could run after it on another
+        # worker and drop the new text.
+        if document.is_active and (source_changed or not was_active):
+            DocumentService.save_uploaded_text(document)
+        elif was_active and not document.is_active:
+            DocumentService.delete_uploaded_texts([document.id])
 
     @staticmethod
     def save_uploaded_text(document):
-        extract_and_save_pdf_text.delay(document.id)
+        TaskBatcher.enqueue('extract', [document.id])
+
+    @staticmethod
+    def save_uploaded_texts(documents):
+        TaskBatcher.enqueue('extract', [document.id for document in documents])
+
+    @staticmethod
+    def delete_uploaded_texts(document_ids):
+        TaskBatcher.enqueue('delete', document_ids)
+
+    @staticmethod
+    def bulk_create_documents(items):
+        document_types = {item['document_type'].id: item['document_type'] for item in items}
+
+        with transaction.atomic():
+            DocumentService.lock_document_types(document_types)
+
+            active_types = set(
+                Document.objects.filter(
+                    document_type_id__in=document_types,
+                    is_active=True,
+                    is_deleted=False
+                ).values_list('document_type_id', flat=True)
+            )
+
+            # Same outcome as uploading the items one by one: the last item asking to be
+            # active wins, and a type with no active document activates its first item.
+            winners = {}
+            for index, item in enumerate(items):
+                type_id = item['document_type'].id
+                if item['is_active'] or (type_id not in active_types and type_id not in winners):
+                    winners[type_id] = index
+
+            replaced = DocumentService.deactivate_active(
+                [type_id for type_id in winners if type_id in active_types]
+            )
+
+            uploads = ContentService.prepare_uploads([item['file'] for item in items])
+            documents = Document.objects.bulk_create([
+                Document(
+                    company=item['company'],
+                    participant=item['participant'],
+                    document_type=item['document_type'],
+                    file=file,
+                    content_hash=content_hash,
+                    is_active=winners.get(item['document_type'].id) == index
+                )
+                for index, (item, (content_hash, file)) in enumerate(zip(items, uploads))
+            ])
+
+            visible_replaced = [
+                document_id for document_id, type_id in replaced
+                if document_types[type_id].public_visible or document_types[type_id].private_visible
+            ]
+            DocumentService.adjust_document_counts(
+                Counter(item['document_type'].id for item in items)
+            )
+            DocumentService.invalidate_cache(*document_types.values())
+
+            with TaskBatcher():
+                DocumentService.delete_uploaded_texts(visible_replaced)
+                DocumentService.save_uploaded_texts(documents)
+
+        return documents
 
     @staticmethod
     def soft_delete(document):
+        now = timezone.now()
+        with transaction.atomic():
+            updated = Document.objects.filter(id=document.id, is_deleted=False).update(
+                is_deleted=True, deleted_at=now, updated_at=now
+            )
+            if updated:
+                DocumentService.adjust_document_counts({document.document_type_id: -1})
+                DocumentService.invalidate_cache(document.document_type)
         document.is_deleted = True
-        document.save()
+        document.deleted_at = now
+
+    @staticmethod
+    def soft_delete_documents(queryset, deleted_at):
+        # Used when a type or category goes away: one UPDATE for all of its documents,
+        # whose counter the caller resets.
+        updated = queryset.filter(is_deleted=False).update(
+            is_deleted=True, deleted_at=deleted_at, updated_at=deleted_at
+        )
+        if updated:
+            ResponseCacheService.invalidate('documents')
+        return updated
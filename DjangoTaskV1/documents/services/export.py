@@ -0,0 +1,116 @@
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery
+
+from documents.models import Document, UploadedTextFile
+
+
+class EchoBuffer:
+    def write(self, value):
+        return value
+
+
+class DocumentExportService:
+    FORMATS = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    FIELDS = [
+        'id',
+        'company',
+        'participant_id',
+        'participant_first_name',
+        'participant_last_name',
+        'document_type_id',
+        'document_type_title',
+        'category_id',
+        'category_title',
+        'file',
+        'is_active',
+    ]
+
+    @staticmethod
+    def get_chunk_size():
+        return getattr(settings, 'DOCUMENTS_EXPORT_CHUNK_SIZE', 2000)
+
+    @staticmethod
+    def get_text_chunk_size():
+        return getattr(settings, 'DOCUMENTS_EXPORT_TEXT_CHUNK_SIZE', 50)
+
+    @staticmethod
+    def get_fields(include_text=False):
+        return DocumentExportService.FIELDS + (['text'] if include_text else [])
+
+    @staticmethod
+    def get_queryset(company=None, participant_id=None, include_text=False):
+        queryset = Document.objects.filter(is_deleted=False)
+
+        if company is not None:
+            queryset = queryset.filter(company=company)
+
+        if participant_id is not None:
+            queryset = queryset.filter(participant_id=participant_id)
+
+        annotations = {
+            'participant_first_name': F('participant__first_name'),
+            'participant_last_name': F('participant__last_name'),
+            'document_type_title': F('document_type__title'),
+            'category_id': F('document_type__category_id'),
+            'category_title': F('document_type__category__title'),
+        }
+        fields = DocumentExportService.get_fields()
+        if include_text:
+            annotations['text_file_id'] = Subquery(
+                UploadedTextFile.objects.filter(document_id=OuterRef('id')).order_by('-id').values('id')[:1]
+            )
+            fields.append('text_file_id')
+
+        return queryset.annotate(**annotations).order_by('id').values(*fields)
+
+    @staticmethod
+    def iter_rows(queryset):
+        # iterator() streams from a server-side cursor, so memory stays bounded by
+        # one chunk whatever the number of exported rows.
+        return queryset.iterator(chunk_size=DocumentExportService.get_chunk_size())
+
+    @staticmethod
+    def attach_texts(rows):
+        # Texts may be stored compressed, so they are loaded and decoded a few rows at a
+        # time; each is dropped once its row is out, so memory stays around one text chunk.
+        rows = iter(rows)
+        while chunk := list(islice(rows, DocumentExportService.get_text_chunk_size())):
+            text_files = UploadedTextFile.objects.only('raw_text', 'compressed_text', 'compression').in_bulk(
+                [row['text_file_id'] for row in chunk if row['text_file_id'] is not None]
+            )
+            for row in chunk:
+                text_file = text_files.pop(row.pop('text_file_id'), None)
+                row['text'] = text_file.text if text_file else None
+                yield row
+
+    @staticmethod
+    def iter_ndjson(rows):
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def iter_csv(rows, fields):
+        writer = csv.DictWriter(EchoBuffer(), fieldnames=fields)
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+
+    @staticmethod
+    def stream(export_format, company=None, participant_id=None, include_text=False):
+        fields = DocumentExportService.get_fields(include_text)
+        rows = DocumentExportService.iter_rows(
+            DocumentExportService.get_queryset(company, participant_id, include_text)
+        )
+        if include_text:
+            rows = DocumentExportService.attach_texts(rows)
+        if export_format == 'csv':
+            return DocumentExportService.iter_csv(rows, fields)
+        return DocumentExportService.iter_ndjson(rows)
@@ -0,0 +1,111 @@
+import time
+
+from django.conf import settings
+from PyPDF2 import PageObject, PdfReader
+from PyPDF2.generic import NameObject
+
+INHERITABLE_PAGE_ATTRIBUTES = tuple(NameObject(name) for name in ('/Resources', '/MediaBox', '/CropBox', '/Rotate'))
+
+
+class PdfExtractionService:
+    @staticmethod
+    def get_chunk_pages():
+        return getattr(settings, 'PDF_EXTRACTION_CHUNK_PAGES', 50)
+
+    @staticmethod
+    def get_parallel_threshold():
+        return getattr(settings, 'PDF_PARALLEL_PAGE_THRESHOLD', 500)
+
+    @staticmethod
+    def get_range_pages():
+        return getattr(settings, 'PDF_PARALLEL_RANGE_PAGES', 200)
+
+    @staticmethod
+    def get_page_ranges(page_count, range_pages=None):
+        range_pages = range_pages or PdfExtractionService.get_range_pages()
+        return [(start, min(start + range_pages, page_count)) for start in range(0, page_count, range_pages)]
+
+    @staticmethod
+    def get_page_count(reader: PdfReader):
+        return int(reader.trailer['/Root']['/Pages']['/Count'])
+
+    @staticmethod
+    def iter_pages(reader: PdfReader, start=0):
+        # reader.pages parses and keeps a dictionary for every page of the document.
+        # Walking the page tree holds only the pending kid references instead, and
+        # skips whole subtrees before `start` by their /Count. /Type is optional on
+        # page objects, so a node with /Kids is a page tree node and any other one a page.
+        stack = [(reader.trailer['/Root'].raw_get('/Pages'), {})]
+        skip = start
+        while stack:
+            reference, inherited = stack.pop()
+            node = reference.get_object()
+            if '/Kids' in node:
+                count = int(node.get('/Count', 0))
+                if skip >= count:
+                    skip -= count
+                    continue
+                inherited = dict(inherited)
+                inherited.update((name, node[name]) for name in INHERITABLE_PAGE_ATTRIBUTES if name in node)
+                stack.extend((kid, inherited) for kid in reversed(node.raw_get('/Kids')))
+            elif skip:
+                skip -= 1
+            else:
+                page = PageObject(reader, reference)
+                page.update(inherited)
+                page.update(node)
+                yield page
+
+    @staticmethod
+    def iter_page_texts(reader: PdfReader, start=0, end=None):
+        chunk_pages = PdfExtractionService.get_chunk_pages()
+        page_count = PdfExtractionService.get_page_count(reader)
+        end = page_count if end is None else min(end, page_count)
+
+        for number, page in enumerate(PdfExtractionService.iter_pages(reader, start), start):
+            if number >= end:
+                break
+            yield number + 1, page.extract_text() or ""
+
+            # PdfReader keeps every object it has parsed; dropping the cache once per
+            # chunk keeps memory bounded by the chunk instead of the whole document.
+            if (number + 1 - start) % chunk_pages == 0:
+                reader.resolved_objects.clear()
+
+    @staticmethod
+    def get_page_offsets(page_texts):
+        offsets = []
+        offset = 0
+        for page_text in page_texts:
+            offsets.append(offset)
+            offset += len(page_text)
+        return offsets
+
+    @staticmethod
+    def extract_range_pages(file, start, end):
+        reader = PdfReader(file)
+        return [page_text for _, page_text in PdfExtractionService.iter_page_texts(reader, start, end)]
+
+    @staticmethod
+    def extract_range(file, start, end):
+        return "".join(PdfExtractionService.extract_range_pages(file, start, end))
+
+    @staticmethod
+    def extract_pages(file, reader=None):
+        started = time.perf_counter()
+        reader = reader or PdfReader(file)
+        page_texts = [page_text for _, page_text in PdfExtractionService.iter_page_texts(reader)]
+
+        elapsed = time.perf_counter() - started
+        stats = {
+            'pages': len(page_texts),
+            'seconds': elapsed,
+            'pages_per_second': len(page_texts) / elapsed if elapsed else 0.0,
+        }
+        return page_texts, stats
+
+    @staticmethod
+    def extract_text(file, reader=None):
+        page_texts, stats = PdfExtractionService.extract_pages(file, reader)
+        stats['page_offsets'] = PdfExtractionService.get_page_offsets(page_texts)
+        return "".join(page_texts), stats
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db import transaction
+
+from documents.models import TaskOutbox
+from documents.tasks import delete_uploaded_text_batch, extract_and_save_pdf_text_batch
+
+
+class OutboxService:
+    # Workers may run the two in any order: an extraction replaces a document's text
+    # in one transaction, and a delete is only queued for a document that stops
+    # showing one.
+    TASKS = {
+        'delete': delete_uploaded_text_batch,
+        'extract': extract_and_save_pdf_text_batch,
+    }
+
+    @staticmethod
+    def is_enabled():
+        return getattr(settings, 'DOCUMENTS_TASK_OUTBOX', True)
+
+    @staticmethod
+    def get_batch_size():
+        return getattr(settings, 'DOCUMENTS_TASK_BATCH_SIZE', 100)
+
+    @staticmethod
+    def send(kind, document_ids, batch_size=None):
+        batch_size = batch_size or OutboxService.get_batch_size()
+        document_ids = list(document_ids)
+        for start in range(0, len(document_ids), batch_size):
+            OutboxService.TASKS[kind].delay(document_ids[start:start + batch_size])
+
+    @staticmethod
+    def add(kind, document_ids):
+        TaskOutbox.objects.bulk_create([
+            TaskOutbox(kind=kind, document_id=document_id) for document_id in document_ids
+        ])
+
+    @staticmethod
+    def relay(limit=1000, batch_size=None):
+        with transaction.atomic():
+            rows = list(
+                TaskOutbox.objects.select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', 'kind', 'document_id')[:limit]
+            )
+            if not rows:
+                return 0
+
+            pending = {kind: {} for kind in OutboxService.TASKS}
+            for _, kind, document_id in rows:
+                pending[kind][document_id] = None
+
+            # Rows are only removed if every send succeeds; a broker error rolls
+            # back and the rows are relayed again, so delivery is at least once.
+            TaskOutbox.objects.filter(id__in=[row_id for row_id, _, _ in rows]).delete()
+            for kind, document_ids in pending.items():
+                OutboxService.send(kind, document_ids, batch_size)
+
+        return len(rows)
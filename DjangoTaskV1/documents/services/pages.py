@@ -0,0 +1,23 @@
+from django.conf import settings
+
+from documents.models import UploadedTextFile
+
+
+class TextPageService:
+    @staticmethod
+    def get_max_pages():
+        return getattr(settings, 'DOCUMENTS_TEXT_MAX_PAGES', 50)
+
+    @staticmethod
+    def get_latest_text_file(document_id):
+        return (
+            UploadedTextFile.objects.filter(document_id=document_id, document__is_deleted=False)
+            .order_by('-id')
+            .only('id', 'document_id', 'page_count')
+            .first()
+        )
+
+    @staticmethod
+    def get_pages(text_file, first_page, last_page):
+        # Only the requested page rows are read, whatever the size of the document.
+        return text_file.pages.filter(number__range=(first_page, last_page)).order_by('number')
@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from documents.models import Document, DocumentCategory, DocumentType, UploadedTextFile, UploadSession
+from documents.services.cache import ResponseCacheService
+from documents.services.search import SearchService
+from documents.services.upload import UploadService
+
+
+class PurgeService:
+    @staticmethod
+    def get_retention():
+        return timedelta(days=getattr(settings, 'DOCUMENTS_PURGE_RETENTION_DAYS', 30))
+
+    @staticmethod
+    def get_batch_size():
+        return getattr(settings, 'DOCUMENTS_PURGE_BATCH_SIZE', 500)
+
+    @staticmethod
+    def stamp_undated():
+        # Rows soft deleted before deleted_at existed start their retention now.
+        now = timezone.now()
+        for model in (Document, DocumentType, DocumentCategory):
+            model.objects.filter(is_deleted=True, deleted_at__isnull=True).update(deleted_at=now)
+
+    @staticmethod
+    def delete_files(names):
+        storage = Document._meta.get_field('file').storage
+        for name in sorted(names):
+            storage.delete(name)
+
+    @staticmethod
+    def discard_uploads(session_ids):
+        for session_id in session_ids:
+            UploadService.discard_parts(session_id)
+
+    @staticmethod
+    def purge_documents(cutoff, batch_size):
+        with transaction.atomic():
+            rows = list(
+                Document.objects.select_for_update(skip_locked=True)
+                .filter(is_deleted=True, deleted_at__lt=cutoff)
+                .order_by('id')
+                .values_list('id', 'file')[:batch_size]
+            )
+            if not rows:
+                return 0
+
+            document_ids = [document_id for document_id, _ in rows]
+            UploadedTextFile.objects.filter(document_id__in=document_ids).delete()
+            SearchService.remove_documents(document_ids)
+            Document.objects.filter(id__in=document_ids).delete()
+
+            # Deduplicated uploads share a file; only files no remaining document
+            # points at go.
+            names = {name for _, name in rows if name}
+            names -= set(Document.objects.filter(file__in=names).values_list('file', flat=True))
+
+            transaction.on_commit(lambda: PurgeService.delete_files(names))
+
+        return len(rows)
+
+    @staticmethod
+    def purge_types(cutoff, batch_size):
+        with transaction.atomic():
+            rows = list(
+                DocumentType.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(is_deleted=True, deleted_at__lt=cutoff, document__isnull=True)
+                .order_by('id')
+                .values_list('id', 'category_id')[:batch_size]
+            )
+            if not rows:
+                return 0
+
+            type_ids = [type_id for type_id, _ in rows]
+            pending_uploads = list(
+                UploadSession.objects.filter(document_type_id__in=type_ids, document__isnull=True)
+                .values_list('id', flat=True)
+            )
+            DocumentType.objects.filter(id__in=type_ids).delete()
+
+            # Category details list deleted types too.
+            ResponseCacheService.invalidate(
+                'categories', 'types', *{ResponseCacheService.category_scope(category_id) for _, category_id in rows}
+            )
+            transaction.on_commit(lambda: PurgeService.discard_uploads(pending_uploads))
+
+        return len(rows)
+
+    @staticmethod
+    def purge_categories(cutoff, batch_size):
+        with transaction.atomic():
+            category_ids = list(
+                DocumentCategory.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(is_deleted=True, deleted_at__lt=cutoff, types__isnull=True)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            DocumentCategory.objects.filter(id__in=category_ids).delete()
+
+        return len(category_ids)
+
+    @staticmethod
+    def purge(retention=None, batch_size=None, max_batches=None):
+        cutoff = timezone.now() - (PurgeService.get_retention() if retention is None else retention)
+        batch_size = batch_size or PurgeService.get_batch_size()
+        PurgeService.stamp_undated()
+
+        # Children first: a type goes once its documents are gone, a category once its types are.
+        purged = {}
+        for kind, purge_batch in (
+            ('documents', PurgeService.purge_documents),
+            ('types', PurgeService.purge_types),
+            ('categories', PurgeService.purge_categories),
+        ):
+            purged[kind] = 0
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                count = purge_batch(cutoff, batch_size)
+                purged[kind] += count
+                batches += 1
+                if count < batch_size:
+                    break
+        return purged
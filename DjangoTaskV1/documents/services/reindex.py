@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from documents.models import Document, DocumentType, ReindexJob, UploadedTextFile
+from documents.services.search import SearchService
+from documents.tasks import extract_documents, run_reindex_job
+
+
+class ReindexService:
+    ACTIVE = ('pending', 'running')
+
+    @staticmethod
+    def get_chunk_size():
+        return getattr(settings, 'DOCUMENTS_REINDEX_CHUNK_SIZE', 500)
+
+    @staticmethod
+    def get_retry_delay():
+        return getattr(settings, 'DOCUMENTS_REINDEX_RETRY_SECONDS', 5)
+
+    @staticmethod
+    def is_extractable(document_type):
+        return document_type.is_active and (document_type.private_visible or document_type.public_visible)
+
+    @staticmethod
+    def schedule_visibility_changes(changes):
+        # One insert per request however many types changed; the work itself runs
+        # in chunks on the workers.
+        jobs = ReindexJob.objects.bulk_create([
+            ReindexJob(
+                document_type_id=new.id,
+                action='extract' if ReindexService.is_extractable(new) else 'delete',
+            )
+            for old, new in changes
+            if ReindexService.is_extractable(old) != ReindexService.is_extractable(new)
+        ])
+        job_ids = [job.id for job in jobs]
+        if job_ids:
+            transaction.on_commit(lambda: ReindexService.dispatch(job_ids))
+        return jobs
+
+    @staticmethod
+    def dispatch(job_ids):
+        for job_id in job_ids:
+            run_reindex_job.delay(job_id)
+
+    @staticmethod
+    def get_queryset(job):
+        if job.action == 'delete':
+            return UploadedTextFile.objects.filter(document_type_id=job.document_type_id)
+        return Document.objects.filter(
+            document_type_id=job.document_type_id, is_active=True, is_deleted=False
+        ).exclude(Exists(UploadedTextFile.objects.filter(document_id=OuterRef('id'))))
+
+    @staticmethod
+    def start_chunk(job_id):
+        # The type row lock is held only for this check, so a request saving the type
+        # waits at most for it, never for a chunk of work.
+        with transaction.atomic():
+            job = ReindexJob.objects.filter(id=job_id, status__in=ReindexService.ACTIVE).first()
+            if job is None:
+                return None, False
+            DocumentType.objects.select_for_update().filter(id=job.document_type_id).first()
+
+            # The newest transition wins, even if it already ran.
+            jobs = ReindexJob.objects.filter(document_type_id=job.document_type_id)
+            if jobs.filter(id__gt=job.id).exists():
+                ReindexJob.objects.filter(id=job.id).update(status='superseded', finished_at=timezone.now())
+                return None, False
+            # An older job finishing its current chunk would undo this one's work.
+            if jobs.filter(id__lt=job.id, status='running').exists():
+                return None, True
+
+            ReindexJob.objects.filter(id=job.id).update(status='running')
+            job.status = 'running'
+        return job, False
+
+    @staticmethod
+    def run_chunk(job_id):
+        job, deferred = ReindexService.start_chunk(job_id)
+        if deferred:
+            run_reindex_job.apply_async((job_id,), countdown=ReindexService.get_retry_delay())
+            return None
+        if job is None:
+            return None
+
+        queryset = ReindexService.get_queryset(job)
+        if job.total is None:
+            job.total = queryset.count()
+
+        rows = list(
+            queryset.filter(id__gt=job.last_id).order_by('id').values_list('id', 'document_id' if job.action == 'delete' else 'id')
+            [:ReindexService.get_chunk_size()]
+        )
+        if job.action == 'delete':
+            UploadedTextFile.objects.filter(id__in=[row_id for row_id, _ in rows]).delete()
+            SearchService.remove_documents({document_id for _, document_id in rows})
+        else:
+            extract_documents([row_id for row_id, _ in rows])
+
+        finished = len(rows) < ReindexService.get_chunk_size()
+        ReindexJob.objects.filter(id=job.id, status='running').update(
+            total=job.total,
+            processed=job.processed + len(rows),
+            last_id=rows[-1][0] if rows else job.last_id,
+            status='done' if finished else 'pending',
+            finished_at=timezone.now() if finished else None,
+            updated_at=timezone.now(),
+        )
+        if not finished:
+            run_reindex_job.delay(job.id)
+        return len(rows)
+
+    @staticmethod
+    def resume_stale(older_than=timedelta(minutes=10)):
+        # A job whose worker died, or whose message was lost, picks up at its cursor.
+        stale = list(
+            ReindexJob.objects.filter(status__in=ReindexService.ACTIVE, updated_at__lt=timezone.now() - older_than)
+            .values_list('id', flat=True)
+        )
+        ReindexJob.objects.filter(id__in=stale).update(status='pending', updated_at=timezone.now())
+        ReindexService.dispatch(stale)
+        return stale
@@ -0,0 +1,228 @@
+import base64
+import json
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from documents.models import Document, UploadedTextFile
+
+INDEX_TABLE = 'documents_search_index'
+
+logger = logging.getLogger('documents.search')
+
+
+class SearchUnavailable(APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "Full-text search is not available on this database."
+    default_code = 'search_unavailable'
+
+
+class SearchService:
+    @staticmethod
+    def get_connection():
+        return connections[router.db_for_write(UploadedTextFile)]
+
+    @staticmethod
+    def get_config():
+        return getattr(settings, 'DOCUMENTS_SEARCH_CONFIG', 'simple')
+
+    @staticmethod
+    def get_max_bytes():
+        return getattr(settings, 'DOCUMENTS_SEARCH_MAX_BYTES', 1_000_000)
+
+    @staticmethod
+    def ensure_schema(using='default'):
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+                    "text_file_id bigint PRIMARY KEY, "
+                    "document_id bigint NOT NULL, "
+                    "vector tsvector NOT NULL)"
+                )
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_vector_gin "
+                    f"ON {INDEX_TABLE} USING gin (vector)"
+                )
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document_id "
+                    f"ON {INDEX_TABLE} (document_id)"
+                )
+            elif connection.vendor == 'sqlite':
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} "
+                    "USING fts5(text, document_id UNINDEXED, tokenize='unicode61')"
+                )
+
+    @staticmethod
+    def clamp(text, max_bytes):
+        # The tsvector limit is in bytes, and a character can take up to four of them.
+        if len(text) * 4 <= max_bytes:
+            return text
+        return text.encode()[:max_bytes].decode(errors='ignore')
+
+    @staticmethod
+    def write_rows(connection, rows):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.executemany(
+                    f"INSERT INTO {INDEX_TABLE} (text_file_id, document_id, vector) "
+                    "VALUES (%s, %s, to_tsvector(%s::regconfig, %s)) "
+                    "ON CONFLICT (text_file_id) DO UPDATE "
+                    "SET document_id = EXCLUDED.document_id, vector = EXCLUDED.vector",
+                    [
+                        (text_file_id, document_id, SearchService.get_config(), text)
+                        for text_file_id, document_id, text in rows
+                    ],
+                )
+            elif connection.vendor == 'sqlite':
+                cursor.executemany(
+                    f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", [(text_file_id,) for text_file_id, _, _ in rows]
+                )
+                cursor.executemany(
+                    f"INSERT INTO {INDEX_TABLE} (rowid, text, document_id) VALUES (%s, %s, %s)",
+                    [(text_file_id, text, document_id) for text_file_id, document_id, text in rows],
+                )
+
+    @staticmethod
+    def index_text_files(text_files):
+        connection = SearchService.get_connection()
+        max_bytes = SearchService.get_max_bytes()
+        rows = [
+            (text_file.id, text_file.document_id, SearchService.clamp(text_file.text, max_bytes))
+            for text_file in text_files
+        ]
+        if not rows:
+            return
+
+        try:
+            with transaction.atomic(using=connection.alias):
+                SearchService.write_rows(connection, rows)
+        except DatabaseError:
+            # A text the index rejects must not fail the extraction of the whole batch:
+            # the rows are retried one by one and a rejected text stays stored but
+            # unsearchable until rebuild_search_index is run.
+            for row in rows:
+                try:
+                    with transaction.atomic(using=connection.alias):
+                        SearchService.write_rows(connection, [row])
+                except DatabaseError as e:
+                    logger.warning("Search index rejected text file %s: %s", row[0], e)
+
+    @staticmethod
+    def index_text_file(text_file):
+        SearchService.index_text_files([text_file])
+
+    @staticmethod
+    def remove_documents(document_ids):
+        document_ids = list(document_ids)
+        if not document_ids:
+            return
+
+        connection = SearchService.get_connection()
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            return
+
+        placeholders = ', '.join(['%s'] * len(document_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {INDEX_TABLE} WHERE document_id IN ({placeholders})",
+                document_ids,
+            )
+
+    @staticmethod
+    def remove_document_type(document_type_id):
+        SearchService.remove_documents(
+            Document.objects.filter(document_type_id=document_type_id).values_list('id', flat=True)
+        )
+
+    @staticmethod
+    def encode_cursor(rank, text_file_id):
+        payload = json.dumps([rank, text_file_id]).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            rank, text_file_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return float(rank), int(text_file_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def build_match_query(query):
+        terms = [term.replace('"', '') for term in query.split()]
+        return ' '.join(f'"{term}"' for term in terms if term)
+
+    @staticmethod
+    def search(query, participant_id=None, company=None, document_type_id=None, cursor=None, size=20):
+        connection = SearchService.get_connection()
+        document_table = Document._meta.db_table
+        text_table = UploadedTextFile._meta.db_table
+
+        if connection.vendor == 'postgresql':
+            text_file_column = 'text_file_id'
+            rank_sql = "ts_rank(si.vector, query)::float8"
+            source_sql = (
+                f"FROM {INDEX_TABLE} si, websearch_to_tsquery(%s::regconfig, %s) query "
+                "WHERE si.vector @@ query"
+            )
+            params = [SearchService.get_config(), query]
+        elif connection.vendor == 'sqlite':
+            text_file_column = 'rowid'
+            rank_sql = f"-bm25({INDEX_TABLE})"
+            source_sql = f"FROM {INDEX_TABLE} si WHERE si.text MATCH %s"
+            params = [SearchService.build_match_query(query)]
+            if not params[0]:
+                return [], None
+        else:
+            raise SearchUnavailable(f"Full-text search is not supported on {connection.vendor}.")
+
+        filters = [f"EXISTS (SELECT 1 FROM {text_table} t WHERE t.id = si.{text_file_column})"]
+        document_filters = ["d.is_deleted = %s"]
+        document_params = [False]
+        if participant_id:
+            document_filters.append("d.participant_id = %s")
+            document_params.append(participant_id)
+        if company:
+            document_filters.append("d.company = %s")
+            document_params.append(company)
+        if document_type_id:
+            document_filters.append("d.document_type_id = %s")
+            document_params.append(document_type_id)
+        filters.append(
+            f"EXISTS (SELECT 1 FROM {document_table} d WHERE d.id = si.document_id AND "
+            + " AND ".join(document_filters) + ")"
+        )
+        params += document_params
+
+        sql = (
+            f"SELECT * FROM (SELECT si.{text_file_column} AS text_file_id, si.document_id AS document_id, "
+            f"{rank_sql} AS score {source_sql} AND " + " AND ".join(filters) + ") ranked"
+        )
+
+        if cursor:
+            last_rank, last_id = cursor
+            sql += " WHERE score < %s OR (score = %s AND text_file_id < %s)"
+            params += [last_rank, last_rank, last_id]
+
+        sql += " ORDER BY score DESC, text_file_id DESC LIMIT %s"
+        params.append(size + 1)
+
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(sql, params)
+            rows = db_cursor.fetchall()
+
+        hits = [
+            {'text_file_id': row[0], 'document_id': row[1], 'rank': float(row[2])}
+            for row in rows[:size]
+        ]
+        next_cursor = None
+        if len(rows) > size:
+            last = hits[-1]
+            next_cursor = SearchService.encode_cursor(last['rank'], last['text_file_id'])
+        return hits, next_cursor
@@ -1,4 +1,10 @@
-from documents.models import DocumentType, UploadedTextFile
+from django.db import transaction
+from django.utils import timezone
+
+from documents.models import Document, DocumentType
+from documents.services.cache import ResponseCacheService
+from documents.services.document import DocumentService
+from documents.services.reindex import ReindexService
 
 
 class DocumentTypeService:
@@ -8,22 +14,43 @@ class DocumentTypeService:
         return DocumentCategory.objects.filter(id=category_id, is_deleted=False).exists()
 
     @staticmethod
-    def soft_delete(document_type: DocumentType):
-        document_type.is_deleted = True
-        document_type.save()
+    def invalidate_cache(*category_ids):
+        ResponseCacheService.invalidate(
+            'types', *[ResponseCacheService.category_scope(category_id) for category_id in set(category_ids)]
+        )
 
     @staticmethod
-    def cleanup_uploaded_text_if_visibility_removed(old_instance: DocumentType, new_instance: DocumentType):
-        visibility_changed = (
-            old_instance.is_active != new_instance.is_active or
-            old_instance.private_visible != new_instance.private_visible or
-            old_instance.public_visible != new_instance.public_visible
-        )
+    def create(serializer):
+        document_type = serializer.save()
+        DocumentTypeService.invalidate_cache(document_type.category_id)
+        return document_type
 
-        should_cleanup = not (
-            new_instance.is_active and
-            (new_instance.private_visible or new_instance.public_visible)
-        )
+    @staticmethod
+    def update(serializer, old_instance: DocumentType):
+        new_instance = serializer.save()
+        ReindexService.schedule_visibility_changes([(old_instance, new_instance)])
+        DocumentTypeService.invalidate_cache(old_instance.category_id, new_instance.category_id)
+        return new_instance
 
-        if visibility_changed and should_cleanup:
-            UploadedTextFile.objects.filter(document_type=new_instance).delete()
\ No newline at end of file
+    @staticmethod
+    def soft_delete(document_type: DocumentType):
+        DocumentTypeService.soft_delete_types([document_type])
+
+    @staticmethod
+    def soft_delete_types(document_types):
+        # One UPDATE for the types and one for their documents, whatever their number.
+        document_types = [document_type for document_type in document_types if not document_type.is_deleted]
+        if not document_types:
+            return
+        now = timezone.now()
+        with transaction.atomic():
+            DocumentType.objects.filter(id__in=[document_type.id for document_type in document_types]).update(
+                is_deleted=True, deleted_at=now, updated_at=now, document_count=0
+            )
+            for document_type in document_types:
+                document_type.is_deleted = True
+                document_type.deleted_at = now
+                document_type.updated_at = now
+                document_type.document_count = 0
+            DocumentService.soft_delete_documents(Document.objects.filter(document_type__in=document_types), now)
+            DocumentTypeService.invalidate_cache(*[document_type.category_id for document_type in document_types])
@@ -0,0 +1,223 @@
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.db import transaction
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from documents.models import Document, UploadSession
+from documents.services.content import ContentService
+from documents.services.document import DocumentService
+
+
+class UploadConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The upload is not in the expected state."
+    default_code = 'conflict'
+
+
+class UploadedPartsFile(File):
+    # Reads the stored parts in order as one file and hashes them on the way, so
+    # assembling the final file is a single pass that never holds more than one
+    # chunk. Storages that read() the content (S3 and most remote ones) and those
+    # that iterate chunks() both work. Only the start and the end can be sought,
+    # which is what storages use to rewind and to measure the content; the hash is
+    # kept once a pass has read every part.
+    def __init__(self, storage, part_names, name, size):
+        super().__init__(None, name)
+        self.storage = storage
+        self.part_names = part_names
+        self.size = size
+        self.part = None
+        self.pending = list(part_names)
+        self.position = 0
+        self.digest = hashlib.sha256()
+        self.content_hash = None
+
+    @property
+    def closed(self):
+        return False
+
+    def open(self, mode=None):
+        self.seek(0)
+        return self
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        target = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size}[whence] + offset
+        if target == self.position:
+            return target
+        if target not in (0, self.size):
+            raise io.UnsupportedOperation("Stored parts can only be sought to the start or the end.")
+        self.close()
+        self.pending = list(self.part_names) if target == 0 else []
+        self.position = target
+        self.digest = hashlib.sha256()
+        return target
+
+    def read(self, size=-1):
+        size = -1 if size is None else size
+        data = []
+        while size != 0:
+            if self.part is None:
+                if not self.pending:
+                    break
+                self.part = self.storage.open(self.pending.pop(0), 'rb')
+            chunk = self.part.read(size)
+            if not chunk:
+                self.part.close()
+                self.part = None
+                if not self.pending and self.position == self.size:
+                    self.content_hash = self.digest.hexdigest()
+                continue
+            self.digest.update(chunk)
+            self.position += len(chunk)
+            data.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b''.join(data)
+
+    def close(self):
+        if self.part is not None:
+            self.part.close()
+            self.part = None
+
+    def get_content_hash(self):
+        if self.content_hash is None:
+            for _ in self.chunks():
+                pass
+        return self.content_hash
+
+
+class UploadService:
+    @staticmethod
+    def get_max_chunk_size():
+        return getattr(settings, 'DOCUMENTS_UPLOAD_MAX_CHUNK_SIZE', 8 * 2 ** 20)
+
+    @staticmethod
+    def get_storage():
+        return Document._meta.get_field('file').storage
+
+    @staticmethod
+    def part_dir(session_id):
+        return f'files/uploads/{session_id}'
+
+    @staticmethod
+    def part_name(session_id, offset):
+        return f'{UploadService.part_dir(session_id)}/{offset:015d}.part'
+
+    @staticmethod
+    def append_chunk(session_id, offset, data, checksum=None):
+        if len(data) > UploadService.get_max_chunk_size():
+            raise serializers.ValidationError(
+                {"chunk": [f"Chunks may not exceed {UploadService.get_max_chunk_size()} bytes."]}
+            )
+        if not data:
+            raise serializers.ValidationError({"chunk": ["Empty chunk."]})
+        if checksum and hashlib.sha256(data).hexdigest() != checksum.lower():
+            raise serializers.ValidationError({"chunk": ["Checksum mismatch."]})
+
+        storage = UploadService.get_storage()
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(id=session_id)
+            if session.document_id is not None:
+                raise UploadConflict("The upload is already finalized.")
+            if offset != session.received:
+                raise UploadConflict(f"Expected offset {session.received}.")
+            if session.received + len(data) > session.size:
+                raise serializers.ValidationError({"chunk": ["The chunk exceeds the declared size."]})
+
+            # A part left by a request that failed after writing it is replaced.
+            name = UploadService.part_name(session.id, offset)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(data))
+
+            session.received += len(data)
+            session.save(update_fields=['received'])
+
+        return session
+
+    @staticmethod
+    def assemble(session):
+        # Returns the stored name, the content hash and whether a new file was written.
+        storage = UploadService.get_storage()
+        field = Document._meta.get_field('file')
+        _, part_names = storage.listdir(UploadService.part_dir(session.id))
+
+        content = UploadedPartsFile(
+            storage,
+            [f'{UploadService.part_dir(session.id)}/{name}' for name in sorted(part_names)],
+            session.file_name,
+            session.size,
+        )
+        if ContentService.storage_dedup_enabled():
+            # Hashed before writing, so bytes that are already stored are never copied.
+            content_hash = content.get_content_hash()
+            stored = ContentService.find_stored(content_hash)
+            if stored:
+                return stored, content_hash, False
+
+        name = storage.save(field.generate_filename(None, session.file_name), content, max_length=field.max_length)
+        return name, content.get_content_hash(), True
+
+    @staticmethod
+    def discard_parts(session_id):
+        storage = UploadService.get_storage()
+        directory = UploadService.part_dir(session_id)
+        if not storage.exists(directory):
+            return
+        _, part_names = storage.listdir(directory)
+        for name in part_names:
+            storage.delete(f'{directory}/{name}')
+        storage.delete(directory)
+
+    @staticmethod
+    def finalize(session_id, serializer_class, context):
+        session = UploadSession.objects.get(id=session_id)
+        if session.document_id is not None:
+            return session.document, False
+        # A complete session accepts no more chunks, so its parts can be read unlocked.
+        if session.received != session.size:
+            raise UploadConflict(f"Received {session.received} of {session.size} bytes.")
+
+        serializer = serializer_class(data={
+            'company': session.company,
+            'participant': session.participant_id,
+            'document_type': session.document_type_id,
+            'is_active': session.is_active,
+        }, context=context)
+        serializer.is_valid(raise_exception=True)
+
+        # Copying the parts can take a while, so it happens before the session row is
+        # locked; the lock only guards against two finalizes creating two documents.
+        name, content_hash, written = UploadService.assemble(session)
+        try:
+            with transaction.atomic():
+                session = UploadSession.objects.select_for_update().get(id=session_id)
+                created = session.document_id is None
+                if created:
+                    session.document = DocumentService.create_document(
+                        serializer, file=name, content_hash=content_hash
+                    )
+                    session.save(update_fields=['document'])
+                    transaction.on_commit(lambda: UploadService.discard_parts(session.id))
+        except Exception:
+            if written:
+                UploadService.get_storage().delete(name)
+            raise
+
+        if written and not created:
+            # A concurrent finalize created the document first.
+            UploadService.get_storage().delete(name)
+        return session.document, created
@@ -0,0 +1,33 @@
+import io
+
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+
+def build_pdf(page_count, words_per_page=200, seed=0):
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    }))
+
+    for page_number in range(page_count):
+        lines = []
+        for line in range(max(words_per_page // 10, 1)):
+            words = ' '.join(f"w{seed}p{page_number}l{line}n{n}" for n in range(10))
+            lines.append(f"({words}) Tj 0 -14 Td")
+
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 10 Tf 40 760 Td {' '.join(lines)} ET".encode())
+
+        page = PageObject.create_blank_page(None, 612, 792)
+        page[NameObject('/Contents')] = writer._add_object(content)
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/Font'): DictionaryObject({NameObject('/F1'): font}),
+        })
+        writer.add_page(page)
+
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
@@ -1,33 +1,237 @@
-from celery import shared_task
+from celery import chord, shared_task
+from django.db import transaction
 from PyPDF2 import PdfReader
-from documents.models import UploadedTextFile, Document
+
+from documents.models import UploadedTextFile, UploadedTextPage, Document
+from documents.services.content import ContentService
+from documents.services.extraction import PdfExtractionService
+from documents.services.search import SearchService
+
+
+def is_extractable(document):
+    doc_type = document.document_type
+    return (
+        document.is_active and
+        (doc_type.public_visible or doc_type.private_visible) and
+        document.file.name.endswith(".pdf")
+    )
+
+
+def build_text_file(document, content_hash, text, page_texts):
+    return UploadedTextFile(
+        document=document,
+        document_type=document.document_type,
+        content_hash=content_hash,
+        text=text,
+        page_count=len(page_texts)
+    )
+
+
+def save_text_pages(text_files, texts):
+    UploadedTextPage.objects.bulk_create([
+        UploadedTextPage(text_file=text_file, number=number, start=start, text=page_text)
+        for text_file, (text, page_texts) in zip(text_files, texts)
+        for number, (start, page_text) in enumerate(
+            zip(PdfExtractionService.get_page_offsets(page_texts), page_texts), start=1
+        )
+    ])
+
+
+def replace_texts(document_ids, text_files, texts):
+    # The old texts go in the transaction that writes the new ones, so an extraction
+    # replaces a document's text whatever order its tasks run in on the workers.
+    with transaction.atomic():
+        UploadedTextFile.objects.filter(document_id__in=document_ids).delete()
+        SearchService.remove_documents(document_ids)
+        text_files = UploadedTextFile.objects.bulk_create(text_files)
+        save_text_pages(text_files, texts)
+        SearchService.index_text_files(text_files)
+
+
+def save_extracted_texts(documents, content_hash, text, page_texts):
+    replace_texts(
+        [document.id for document in documents],
+        [build_text_file(document, content_hash, text, page_texts) for document in documents],
+        [(text, page_texts)] * len(documents)
+    )
+
+
+def extract_document_text(document, content_hash, document_ids):
+    reader = PdfReader(document.file)
+    page_count = PdfExtractionService.get_page_count(reader)
+
+    if page_count > PdfExtractionService.get_parallel_threshold():
+        ranges = PdfExtractionService.get_page_ranges(page_count)
+        chord(
+            extract_pdf_page_range.s(document.id, start, end) for start, end in ranges
+        )(save_pdf_page_ranges.s(document_ids, content_hash, page_count, ranges))
+        print(
+            f"[Celery] PDF extract: document {document.id}, {page_count} pages "
+            f"split into {len(ranges)} ranges, saved for documents {document_ids}"
+        )
+        return None
+
+    page_texts, stats = PdfExtractionService.extract_pages(document.file, reader)
+    print(
+        f"[Celery] PDF extract: document {document.id}, {stats['pages']} pages "
+        f"in {stats['seconds']:.2f}s ({stats['pages_per_second']:.1f} pages/s)"
+    )
+    # The pages are saved as they are; the full text is joined from them once.
+    return "".join(page_texts), page_texts
+
+
+def extract_documents(document_ids):
+    documents = [
+        document for document in
+        Document.objects.select_related('document_type').filter(id__in=document_ids).order_by('id')
+        if is_extractable(document)
+    ]
+    # A document that is no longer extractable, e.g. moved to a hidden type, keeps no text.
+    extractable_ids = {document.id for document in documents}
+    replaced_ids = [document_id for document_id in document_ids if document_id not in extractable_ids]
+
+    hashes = {}
+    for document in documents:
+        try:
+            hashes[document.id] = ContentService.ensure_hash(document)
+        except Exception as e:
+            print(f"[Celery] PDF extract error: document {document.id}: {e}")
+
+    # The chord of a large PDF saves the text for every document of the batch that
+    # shares its bytes.
+    hash_documents = {}
+    for document_id, content_hash in hashes.items():
+        hash_documents.setdefault(content_hash, []).append(document_id)
+
+    texts = ContentService.get_cached_texts(hashes.values())
+    text_files = []
+    saved_texts = []
+    for document in documents:
+        content_hash = hashes.get(document.id)
+        if content_hash is None:
+            continue
+
+        try:
+            if content_hash not in texts:
+                texts[content_hash] = extract_document_text(document, content_hash, hash_documents[content_hash])
+            elif texts[content_hash] is None:
+                continue
+            else:
+                print(f"[Celery] PDF extract: document {document.id} reused text of {content_hash[:12]}")
+        except Exception as e:
+            print(f"[Celery] PDF extract error: document {document.id}: {e}")
+            continue
+
+        if texts[content_hash] is not None:
+            text_files.append(build_text_file(document, content_hash, *texts[content_hash]))
+            saved_texts.append(texts[content_hash])
+            replaced_ids.append(document.id)
+
+    replace_texts(replaced_ids, text_files, saved_texts)
+
 
 @shared_task
 def extract_and_save_pdf_text(document_id):
     try:
-        document = Document.objects.get(id=document_id)
-        file = document.file
-        doc_type = document.document_type
-
-        if (
-            document.is_active and
-            (doc_type.public_visible or doc_type.private_visible) and
-            file.name.endswith(".pdf")
-        ):
-            reader = PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() or ""
-
-            UploadedTextFile.objects.create(
-                document=document,
-                document_type=doc_type,
-                text=text
-            )
+        extract_documents([document_id])
     except Exception as e:
         print(f"[Celery] PDF extract error: {e}")
 
 
+@shared_task
+def extract_and_save_pdf_text_batch(document_ids):
+    try:
+        extract_documents(document_ids)
+    except Exception as e:
+        print(f"[Celery] PDF extract error: {e}")
+
+
+@shared_task
+def extract_pdf_page_range(document_id, start, end):
+    # A header task that raises keeps the chord callback from ever running, so a
+    # failed range returns None and the callback extracts it again.
+    try:
+        document = Document.objects.get(id=document_id)
+        return PdfExtractionService.extract_range_pages(document.file, start, end)
+    except Exception as e:
+        print(f"[Celery] PDF extract error: document {document_id}, pages {start}-{end}: {e}")
+        return None
+
+
+@shared_task
+def save_pdf_page_ranges(parts, document_ids, content_hash, page_count, ranges=None):
+    if isinstance(document_ids, int):
+        # Chords dispatched before callbacks took every document sharing the bytes.
+        document_ids = [document_ids]
+    try:
+        # A document whose file was replaced meanwhile has its own extraction queued.
+        documents = [
+            document for document in
+            Document.objects.select_related('document_type')
+            .filter(id__in=document_ids, content_hash=content_hash)
+            .order_by('id')
+            if is_extractable(document)
+        ]
+        if not documents:
+            return
+
+        # Ranges whose task failed are extracted once more here; if that fails too
+        # the error is logged and the documents keep their previous text.
+        ranges = ranges or PdfExtractionService.get_page_ranges(page_count)
+        parts = list(parts)
+        for index, part in enumerate(parts):
+            if part is None:
+                start, end = ranges[index]
+                print(f"[Celery] PDF extract retry: document {documents[0].id}, pages {start}-{end}")
+                parts[index] = PdfExtractionService.extract_range_pages(documents[0].file, start, end)
+
+        # Chord results arrive in the order of the header, i.e. page order.
+        page_texts = [page_text for part in parts for page_text in part]
+        save_extracted_texts(documents, content_hash, "".join(page_texts), page_texts)
+    except Exception as e:
+        print(f"[Celery] PDF extract error: documents {document_ids}: {e}")
+
+
 @shared_task
 def delete_uploaded_text(document_id):
-    UploadedTextFile.objects.filter(document_id=document_id).delete()
+    delete_uploaded_text_batch([document_id])
+
+
+@shared_task
+def delete_uploaded_text_batch(document_ids):
+    UploadedTextFile.objects.filter(document_id__in=document_ids).delete()
+    SearchService.remove_documents(document_ids)
+
+
+@shared_task
+def purge_deleted_rows():
+    # Imported here: the purge reaches the document services, which dispatch these tasks.
+    from documents.services.purge import PurgeService
+
+    purged = PurgeService.purge()
+    print(
+        f"[Celery] Purge: {purged['documents']} documents, {purged['types']} types, "
+        f"{purged['categories']} categories"
+    )
+    return purged
+
+
+@shared_task
+def run_reindex_job(job_id):
+    # Imported here: the reindex service dispatches this task.
+    from documents.services.reindex import ReindexService
+
+    processed = ReindexService.run_chunk(job_id)
+    if processed is not None:
+        print(f"[Celery] Reindex: job {job_id}, {processed} rows")
+    return processed
+
+
+@shared_task
+def resume_reindex_jobs():
+    from documents.services.reindex import ReindexService
+
+    resumed = ReindexService.resume_stale()
+    if resumed:
+        print(f"[Celery] Reindex: resumed jobs {resumed}")
+    return resumed
@@ -0,0 +1,100 @@
+import json
+
+import msgpack
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from documents.models import Document, DocumentCategory, DocumentType, Participant
+
+
+class AsyncReadAPITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.participant = Participant.objects.create(
+            first_name="Dan", last_name="Gray", status="active"
+        )
+        self.category = DocumentCategory.objects.create(
+            company=1,
+            participant=self.participant,
+            title="Async Category"
+        )
+        self.type = DocumentType.objects.create(
+            category=self.category,
+            title="Async Type",
+            private_visible=True,
+            public_visible=False,
+            is_active=True
+        )
+        self.documents = [
+            Document.objects.create(
+                company=1,
+                participant=self.participant,
+                document_type=self.type,
+                file=f'files/documents/async{n}.pdf',
+                is_active=n == 0
+            )
+            for n in range(7)
+        ]
+
+    async def assertSameAsSync(self, sync_name, async_name, kwargs=None, params=None):
+        response = await self.async_client.get(reverse(async_name, kwargs=kwargs), params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = await self.async_client.get(reverse(sync_name, kwargs=kwargs), params or {})
+        # Pagination links differ only by the async/ prefix.
+        self.assertEqual(
+            json.loads(response.content.decode().replace('/documents/async/', '/documents/')),
+            expected.json()
+        )
+        return response.json()
+
+    async def test_async_lists_match_sync_lists(self):
+        data = await self.assertSameAsSync('document-list-create', 'async-document-list', params={'size': 5})
+        self.assertEqual(data['count'], 7)
+        self.assertIsNotNone(data['next'])
+
+        data = await self.assertSameAsSync(
+            'document-list-create', 'async-document-list', params={'size': 5, 'page': 2}
+        )
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['previous'])
+
+        await self.assertSameAsSync('document-type-list-create', 'async-document-type-list')
+        await self.assertSameAsSync('document-category-list-create', 'async-document-category-list')
+
+    async def test_async_retrieve_matches_sync_retrieve(self):
+        await self.assertSameAsSync('document-detail', 'async-document-detail', {'pk': self.documents[0].id})
+        await self.assertSameAsSync('document-type-detail', 'async-document-type-detail', {'pk': self.type.id})
+        await self.assertSameAsSync(
+            'document-category-detail', 'async-document-category-detail', {'pk': self.category.id}
+        )
+
+    async def test_async_views_negotiate_the_api_renderers_and_fields(self):
+        data = await self.assertSameAsSync(
+            'document-list-create', 'async-document-list', params={'fields': 'id,company'}
+        )
+        self.assertEqual(
+            [document['id'] for document in data['results']], [document.id for document in self.documents[:5]]
+        )
+        self.assertEqual(set(data['results'][0]), {'id', 'company'})
+
+        url = reverse('async-document-detail', kwargs={'pk': self.documents[0].id})
+        response = await self.async_client.get(url, headers={'Accept': 'application/msgpack'})
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        expected = await self.async_client.get(reverse('document-detail', kwargs={'pk': self.documents[0].id}))
+        self.assertEqual(msgpack.unpackb(response.content), expected.json())
+
+        response = await self.async_client.get(url, {'format': 'msgpack'})
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+
+        response = await self.async_client.get(url, headers={'Accept': 'text/csv'})
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+    async def test_async_not_found(self):
+        response = await self.async_client.get(reverse('async-document-detail', kwargs={'pk': 0}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = await self.async_client.get(reverse('async-document-list'), {'page': 9})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,10 +1,16 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
 from django.urls import reverse
-from documents.models import Participant, DocumentCategory, DocumentType
+from documents.models import Participant, DocumentCategory, DocumentType, Document
+from documents.serializers import DocumentCategorySerializer
+from documents.tests.utils import QueryBudgetMixin
 
-class DocumentCategoryAPITestCase(APITestCase):
+class DocumentCategoryAPITestCase(QueryBudgetMixin, APITestCase):
     def setUp(self):
+        cache.clear()
         self.participant = Participant.objects.create(
             first_name="John", last_name="Doe", status="active"
         )
@@ -35,10 +41,27 @@ class DocumentCategoryAPITestCase(APITestCase):
 
     def test_list_categories(self):
         url = reverse('document-category-list-create')
-        response = self.client.get(url)
+        with self.assertQueryBudget(3):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(len(response.data['results']) >= 1)
 
+    def test_list_categories_query_count(self):
+        for page_size in (1, 20):
+            for n in range(page_size):
+                category = DocumentCategory.objects.create(
+                    company=1, participant=self.participant, title=f"Category {n}"
+                )
+                DocumentType.objects.create(
+                    category=category, title="Type", private_visible=True,
+                    public_visible=False, is_active=True
+                )
+            cache.clear()
+            with self.assertNumQueries(3):
+                response = self.client.get(reverse('document-category-list-create'), {'size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+            self.assertEqual(len(response.data['results'][0]['document_types']), 1)
+
     def test_create_category_with_types(self):
         url = reverse('document-category-list-create')
         response = self.client.post(url, self.category_data, format='json')
@@ -51,10 +74,23 @@ class DocumentCategoryAPITestCase(APITestCase):
 
     def test_retrieve_category(self):
         url = reverse('document-category-detail', kwargs={'pk': self.category.id})
-        response = self.client.get(url)
+        with self.assertQueryBudget(2):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['title'], self.category.title)
 
+    def test_category_etag_follows_its_types(self):
+        url = reverse('document-category-detail', kwargs={'pk': self.category.id})
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(
+            reverse('document-type-detail', kwargs={'pk': self.type.id}), {"title": "Renamed"}, format='json'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['document_types'][0]['title'], "Renamed")
+
     def test_update_category(self):
         url = reverse('document-category-detail', kwargs={'pk': self.category.id})
         new_data = {
@@ -91,3 +127,72 @@ class DocumentCategoryAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.category.refresh_from_db()
         self.assertTrue(self.category.is_deleted)
+
+    def test_soft_delete_category_cascades_to_types_and_documents(self):
+        document = Document.objects.create(
+            company=1, participant=self.participant, document_type=self.type,
+            file='files/documents/cascade.pdf', is_active=True
+        )
+        response = self.client.delete(reverse('document-category-detail', kwargs={'pk': self.category.id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.type.refresh_from_db()
+        document.refresh_from_db()
+        self.assertTrue(self.type.is_deleted and document.is_deleted)
+        self.assertIsNotNone(document.deleted_at)
+        self.assertEqual(self.client.get(reverse('document-detail', kwargs={'pk': document.id})).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def sync_types_queries(self, type_count):
+        category = DocumentCategory.objects.create(
+            company=1, participant=self.participant, title="Sync Category"
+        )
+        existing = DocumentType.objects.bulk_create([
+            DocumentType(category=category, title=f"Old {n}", private_visible=True,
+                         public_visible=False, is_active=True)
+            for n in range(type_count * 2)
+        ])
+        types = [
+            {"id": doc_type.id, "title": f"Kept {n}", "private_visible": False,
+             "public_visible": True, "is_active": False}
+            for n, doc_type in enumerate(existing[:type_count])
+        ] + [
+            {"title": f"New {n}", "private_visible": True, "public_visible": True, "is_active": True}
+            for n in range(type_count)
+        ]
+        data = {"company": 1, "participant": self.participant.id, "title": "Synced", "types": types}
+
+        serializer = DocumentCategorySerializer(category, data=data)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            serializer.save()
+
+        titles = sorted(category.types.filter(is_deleted=False).values_list('title', flat=True))
+        self.assertEqual(titles, sorted(t["title"] for t in types))
+        omitted = category.types.filter(id__in=[doc_type.id for doc_type in existing[type_count:]])
+        self.assertEqual(omitted.filter(is_deleted=True, deleted_at__isnull=False).count(), type_count)
+        return len(queries)
+
+    def test_update_category_types_query_count_is_constant(self):
+        self.assertEqual(self.sync_types_queries(1), self.sync_types_queries(100))
+
+    def test_update_category_soft_deletes_omitted_types(self):
+        document = Document.objects.create(
+            company=1, participant=self.participant, document_type=self.type,
+            file='files/documents/omitted.pdf', is_active=True
+        )
+        DocumentType.objects.filter(id=self.type.id).update(document_count=1)
+        data = {"company": 1, "participant": self.participant.id, "title": "Synced", "types": []}
+
+        serializer = DocumentCategorySerializer(self.category, data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        self.type.refresh_from_db()
+        document.refresh_from_db()
+        self.assertTrue(self.type.is_deleted and document.is_deleted)
+        self.assertIsNotNone(self.type.deleted_at)
+        self.assertEqual(self.type.document_count, 0)
+        response = self.client.get(reverse('document-type-detail', kwargs={'pk': self.type.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
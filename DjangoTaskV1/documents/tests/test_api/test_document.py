@@ -1,11 +1,25 @@
-from rest_framework.test import APITestCase
+import json
+import os
+import threading
+import unittest
+
+import msgpack
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.core.cache import cache
 from django.urls import reverse
-from documents.models import Document, DocumentType, Participant, DocumentCategory
+from documents.models import (
+    Document, DocumentType, Participant, DocumentCategory, TaskOutbox, UploadedTextFile, UploadedTextPage
+)
 from django.core.files.uploadedfile import SimpleUploadedFile
+from documents.tests.utils import QueryBudgetMixin
 
-class DocumentAPITestCase(APITestCase):
+class DocumentAPITestCase(QueryBudgetMixin, APITestCase):
     def setUp(self):
+        cache.clear()
         self.participant = Participant.objects.create(
             first_name="Bob", last_name="Brown", status="active"
         )
@@ -40,10 +54,99 @@ class DocumentAPITestCase(APITestCase):
 
     def test_list_documents(self):
         url = reverse('document-list-create')
-        response = self.client.get(url)
+        with self.assertQueryBudget(2):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(any(d['id'] == self.document.id for d in response.data['results']))
 
+    def test_list_documents_cursor_pagination(self):
+        for _ in range(6):
+            Document.objects.create(
+                company=1,
+                participant=self.participant,
+                document_type=self.type,
+                file='files/documents/testfile.pdf',
+                is_active=False
+            )
+        url = reverse('document-list-create')
+        response = self.client.get(url, {'pagination': 'cursor', 'size': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        first_page = [d['id'] for d in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        second_page = [d['id'] for d in response.data['results']]
+
+        self.assertEqual(first_page + second_page, sorted(first_page + second_page))
+        self.assertEqual(len(first_page + second_page), 7)
+        self.assertIsNone(response.data['next'])
+
+    def test_list_documents_is_cached_until_write(self):
+        url = reverse('document-list-create')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['count'], 1)
+
+        test_file = SimpleUploadedFile("cached.pdf", b"file_content", content_type="application/pdf")
+        self.client.post(url, dict(self.document_data, file=test_file), format='multipart')
+
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+
+    @override_settings(DOCUMENTS_METRICS_HEADERS=True)
+    def test_request_metrics_headers(self):
+        response = self.client.get(reverse('document-list-create'))
+        self.assertEqual(response['X-Query-Count'], '2')
+        for header in ('X-DB-Time-ms', 'X-Serializer-Time-ms', 'X-Total-Time-ms'):
+            self.assertGreaterEqual(float(response[header]), 0)
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(reverse('document-list-create'), {'fields': 'id,file'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'file'})
+
+        response = self.client.get(reverse('document-detail', args=[self.document.id]), {'omit': 'file,is_deleted'})
+        self.assertNotIn('file', response.data)
+        self.assertNotIn('is_deleted', response.data)
+        self.assertEqual(response.data['id'], self.document.id)
+
+        response = self.client.get(reverse('category-doc-type-stats'), {'omit': 'types'})
+        self.assertNotIn('types', response.data['results'][0])
+
+    def test_msgpack_rendering(self):
+        url = reverse('document-list-create')
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), self.client.get(url).json())
+
+    def test_conditional_get(self):
+        list_url = reverse('document-list-create')
+        detail_url = reverse('document-detail', args=[self.document.id])
+
+        etag = self.client.get(list_url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(detail_url)
+        detail_etag = response['ETag']
+        response = self.client.get(detail_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # The new active document deactivates this one with a set-based update.
+        test_file = SimpleUploadedFile("newer.pdf", b"file_content", content_type="application/pdf")
+        self.client.post(list_url, dict(self.document_data, file=test_file), format='multipart')
+
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_active'])
+
     def test_create_document(self):
         url = reverse('document-list-create')
         test_file = SimpleUploadedFile("test.pdf", b"file_content", content_type="application/pdf")
@@ -53,12 +156,232 @@ class DocumentAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['participant'], self.participant.id)
 
+    def test_bulk_create_documents(self):
+        url = reverse('document-bulk-create')
+        files = [
+            SimpleUploadedFile(f"bulk{n}.pdf", b"file_content", content_type="application/pdf")
+            for n in range(3)
+        ]
+        data = {
+            "files": files,
+            "company": 1,
+            "participant": self.participant.id,
+            "document_type": self.type.id,
+            "metadata": json.dumps([{}, {"is_active": True}, {"company": 2}]),
+        }
+        response = self.client.post(url, data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual([d['is_active'] for d in response.data], [False, True, False])
+        self.assertEqual(response.data[2]['company'], 2)
+        self.assertIn('bulk0', response.data[0]['file'])
+
+        self.document.refresh_from_db()
+        self.assertFalse(self.document.is_active)
+        self.assertEqual(
+            Document.objects.filter(document_type=self.type, is_active=True, is_deleted=False).count(), 1
+        )
+
+    @override_settings(DOCUMENTS_STORAGE_DEDUP=True)
+    def test_identical_uploads_share_stored_file(self):
+        url = reverse('document-bulk-create')
+        data = {
+            "files": [
+                SimpleUploadedFile(f"dup{n}.pdf", b"same bytes", content_type="application/pdf")
+                for n in range(2)
+            ],
+            "company": 1,
+            "participant": self.participant.id,
+            "document_type": self.type.id,
+        }
+        response = self.client.post(url, data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        data = self.document_data.copy()
+        data['file'] = SimpleUploadedFile("again.pdf", b"same bytes", content_type="application/pdf")
+        response = self.client.post(reverse('document-list-create'), data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        uploads = Document.objects.exclude(id=self.document.id)
+        self.assertEqual(len({document.file.name for document in uploads}), 1)
+        self.assertEqual(len({document.content_hash for document in uploads}), 1)
+        self.assertEqual(len(uploads[0].content_hash), 64)
+
+    def test_bulk_create_parses_string_booleans(self):
+        data = {
+            "files": [
+                SimpleUploadedFile(f"bulk{n}.pdf", b"file_content", content_type="application/pdf")
+                for n in range(2)
+            ],
+            "company": 1,
+            "participant": self.participant.id,
+            "document_type": self.type.id,
+            "metadata": json.dumps([{"is_active": "false"}, {"is_active": "0"}]),
+        }
+        response = self.client.post(reverse('document-bulk-create'), data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([d['is_active'] for d in response.data], [False, False])
+        self.document.refresh_from_db()
+        self.assertTrue(self.document.is_active)
+
+        data['files'] = [SimpleUploadedFile("bulk.pdf", b"file_content", content_type="application/pdf")]
+        data['metadata'] = json.dumps([{"is_active": "maybe"}])
+        response = self.client.post(reverse('document-bulk-create'), data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('metadata', response.data)
+
+    def test_bulk_create_documents_rejects_invalid_type(self):
+        url = reverse('document-bulk-create')
+        data = {
+            "files": [SimpleUploadedFile("bulk.pdf", b"file_content", content_type="application/pdf")],
+            "company": 1,
+            "participant": self.participant.id,
+            "document_type": 9999,
+        }
+        response = self.client.post(url, data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('metadata', response.data)
+        self.assertEqual(Document.objects.count(), 1)
+
+    def test_document_counts_follow_create_move_and_delete(self):
+        other_type = DocumentType.objects.create(
+            category=self.category,
+            title="Other Type",
+            private_visible=False,
+            public_visible=False,
+            is_active=True
+        )
+        call_command('rebuild_document_counts', stdout=open(os.devnull, 'w'))
+        self.type.refresh_from_db()
+        self.assertEqual(self.type.document_count, 1)
+
+        test_file = SimpleUploadedFile("count.pdf", b"file_content", content_type="application/pdf")
+        data = dict(self.document_data, file=test_file)
+        response = self.client.post(reverse('document-list-create'), data, format='multipart')
+        document_id = response.data['id']
+        self.type.refresh_from_db()
+        self.assertEqual(self.type.document_count, 2)
+
+        url = reverse('document-detail', kwargs={'pk': document_id})
+        self.client.patch(url, {"document_type": other_type.id}, format='json')
+        self.type.refresh_from_db()
+        other_type.refresh_from_db()
+        self.assertEqual((self.type.document_count, other_type.document_count), (1, 1))
+
+        self.client.delete(url)
+        other_type.refresh_from_db()
+        self.assertEqual(other_type.document_count, 0)
+
+        stats = self.client.get(reverse('category-doc-type-stats'), {'category_id': self.category.id})
+        counts = {t['id']: t['document_count'] for t in stats.data['results'][0]['types']}
+        self.assertEqual(counts, {self.type.id: 1, other_type.id: 0})
+
+    def test_rebuild_document_counts_fixes_drift_and_cached_responses(self):
+        url = reverse('category-doc-type-stats')
+        DocumentType.objects.filter(id=self.type.id).update(document_count=5)
+        response = self.client.get(url, {'category_id': self.category.id})
+        self.assertEqual(response.data['results'][0]['types'][0]['document_count'], 5)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_document_counts', verify=True, stdout=open(os.devnull, 'w'))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_document_counts', stdout=open(os.devnull, 'w'))
+
+        self.type.refresh_from_db()
+        self.assertEqual(self.type.document_count, 1)
+        response = self.client.get(url, {'category_id': self.category.id})
+        self.assertEqual(response.data['results'][0]['types'][0]['document_count'], 1)
+
+    def test_export_documents_ndjson_with_text(self):
+        UploadedTextFile.objects.create(document=self.document, document_type=self.type, text="exported text")
+        Document.objects.create(
+            company=2,
+            participant=self.participant,
+            document_type=self.type,
+            file='files/documents/other.pdf',
+            is_active=False
+        )
+
+        response = self.client.get(reverse('document-export'), {'company': 1, 'include_text': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], self.document.id)
+        self.assertEqual(rows[0]['category_title'], "Doc Category")
+        self.assertEqual(rows[0]['participant_first_name'], "Bob")
+        self.assertEqual(rows[0]['text'], "exported text")
+
+    @override_settings(DOCUMENTS_EXPORT_TEXT_CHUNK_SIZE=2)
+    def test_export_loads_texts_in_small_chunks(self):
+        UploadedTextFile.objects.create(document=self.document, document_type=self.type, text="text 0")
+        for n in range(1, 5):
+            document = Document.objects.create(
+                company=1,
+                participant=self.participant,
+                document_type=self.type,
+                file=f'files/documents/export{n}.pdf',
+                is_active=False
+            )
+            UploadedTextFile.objects.create(document=document, document_type=self.type, text=f"text {n}")
+
+        response = self.client.get(reverse('document-export'), {'company': 1, 'include_text': 'true'})
+        # One query streams the rows, then one per chunk of two texts.
+        with self.assertNumQueries(4):
+            content = b''.join(response.streaming_content).decode()
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['text'] for row in rows], [f"text {n}" for n in range(5)])
+
+    def test_export_documents_csv(self):
+        response = self.client.get(
+            reverse('document-export'), {'export_format': 'csv', 'participant_id': self.participant.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith('id,company,participant_id'))
+        self.assertNotIn('text', lines[0].split(','))
+        self.assertEqual(len(lines), 2)
+
+        response = self.client.get(reverse('document-export'), {'export_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_retrieve_document(self):
         url = reverse('document-detail', kwargs={'pk': self.document.id})
-        response = self.client.get(url)
+        with self.assertQueryBudget(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['id'], self.document.id)
 
+    def test_text_page_range(self):
+        text_file = UploadedTextFile.objects.create(
+            document=self.document, document_type=self.type, text="one two three ", page_count=3
+        )
+        UploadedTextPage.objects.bulk_create([
+            UploadedTextPage(text_file=text_file, number=number, start=start, text=text)
+            for number, start, text in ((1, 0, "one "), (2, 4, "two "), (3, 8, "three "))
+        ])
+        url = reverse('document-text-pages', kwargs={'pk': self.document.id})
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'start_page': 2, 'end_page': 9})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['page_count'], 3)
+        self.assertEqual(
+            [(page['number'], page['start'], page['end'], page['text']) for page in response.data['pages']],
+            [(2, 4, 8, "two "), (3, 8, 14, "three ")]
+        )
+
+        response = self.client.get(url, {'start_page': 3, 'end_page': 1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(DOCUMENTS_TEXT_MAX_PAGES=2):
+            response = self.client.get(url, {'start_page': 1, 'end_page': 3})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Document.objects.filter(id=self.document.id).update(is_deleted=True)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
     def test_update_document(self):
         url = reverse('document-detail', kwargs={'pk': self.document.id})
         update_data = {
@@ -73,9 +396,110 @@ class DocumentAPITestCase(APITestCase):
         self.assertEqual(self.document.company, 2)
         self.assertFalse(self.document.is_active)
 
+    def test_activating_document_deactivates_previous(self):
+        other = Document.objects.create(
+            company=1,
+            participant=self.participant,
+            document_type=self.type,
+            file='files/documents/other.pdf',
+            is_active=False
+        )
+        url = reverse('document-detail', kwargs={'pk': other.id})
+        response = self.client.patch(url, {"is_active": True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_active'])
+
+        self.document.refresh_from_db()
+        self.assertFalse(self.document.is_active)
+
+    @override_settings(DOCUMENTS_TASK_OUTBOX=True)
+    def test_activating_document_queues_its_text_extraction(self):
+        other = Document.objects.create(
+            company=1,
+            participant=self.participant,
+            document_type=self.type,
+            file='files/documents/other.pdf',
+            is_active=False
+        )
+        response = self.client.patch(
+            reverse('document-detail', kwargs={'pk': other.id}), {"is_active": True}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            TaskOutbox.objects.values_list('kind', 'document_id'),
+            [('delete', self.document.id), ('extract', other.id)]
+        )
+
+        TaskOutbox.objects.all().delete()
+        response = self.client.patch(
+            reverse('document-detail', kwargs={'pk': other.id}),
+            {"file": SimpleUploadedFile("new.pdf", b"%PDF-1.4 new")},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            TaskOutbox.objects.values_list('kind', 'document_id'), [('extract', other.id)]
+        )
+
     def test_soft_delete_document(self):
         url = reverse('document-detail', kwargs={'pk': self.document.id})
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.document.refresh_from_db()
-        self.assertTrue(self.document.is_deleted)
\ No newline at end of file
+        self.assertTrue(self.document.is_deleted)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "needs concurrent row locking")
+class DocumentConcurrentCreateTestCase(TransactionTestCase):
+    threads = 16
+
+    def setUp(self):
+        self.participant = Participant.objects.create(
+            first_name="Carl", last_name="Stone", status="active"
+        )
+        self.category = DocumentCategory.objects.create(
+            company=1,
+            participant=self.participant,
+            title="Concurrent Category"
+        )
+        self.type = DocumentType.objects.create(
+            category=self.category,
+            title="Concurrent Type",
+            private_visible=False,
+            public_visible=False,
+            is_active=True
+        )
+
+    def upload(self, index, barrier, statuses):
+        client = APIClient()
+        data = {
+            "company": 1,
+            "participant": self.participant.id,
+            "document_type": self.type.id,
+            "file": SimpleUploadedFile(f"race{index}.pdf", b"file_content", content_type="application/pdf"),
+            "is_active": index % 2 == 0,
+        }
+        try:
+            barrier.wait()
+            statuses.append(client.post(reverse('document-list-create'), data, format='multipart').status_code)
+        finally:
+            connection.close()
+
+    def test_concurrent_creates_keep_single_active_document(self):
+        barrier = threading.Barrier(self.threads)
+        statuses = []
+        workers = [
+            threading.Thread(target=self.upload, args=(index, barrier, statuses))
+            for index in range(self.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(statuses, [status.HTTP_201_CREATED] * self.threads)
+        self.assertEqual(Document.objects.filter(document_type=self.type).count(), self.threads)
+        self.assertEqual(
+            Document.objects.filter(document_type=self.type, is_active=True, is_deleted=False).count(), 1
+        )
+
@@ -1,11 +1,14 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
+from django.core.cache import cache
 from django.urls import reverse
-from documents.models import Document, DocumentType, Participant, DocumentCategory
+from documents.models import DocumentType, Participant, DocumentCategory, ReindexJob
+from documents.tests.utils import QueryBudgetMixin
 
 
-class DocumentTypeAPITestCase(APITestCase):
+class DocumentTypeAPITestCase(QueryBudgetMixin, APITestCase):
     def setUp(self):
+        cache.clear()
         self.participant = Participant.objects.create(
             first_name="Alice", last_name="Smith", status="active"
         )
@@ -32,10 +35,24 @@ class DocumentTypeAPITestCase(APITestCase):
 
     def test_list_document_types(self):
         url = reverse('document-type-list-create')
-        response = self.client.get(url)
+        with self.assertQueryBudget(2):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(any(d['id'] == self.type.id for d in response.data['results']))
 
+    def test_list_document_types_query_count(self):
+        for page_size in (1, 20):
+            DocumentType.objects.bulk_create([
+                DocumentType(category=self.category, title=f"Type {n}", private_visible=True,
+                             public_visible=False, is_active=True)
+                for n in range(page_size)
+            ])
+            cache.clear()
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse('document-type-list-create'), {'size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+            self.assertEqual(response.data['results'][0]['category'], str(self.category))
+
     def test_create_document_type_with_valid_category(self):
         url = reverse('document-type-list-create')
         response = self.client.post(url, self.type_data, format='json')
@@ -52,7 +69,8 @@ class DocumentTypeAPITestCase(APITestCase):
 
     def test_retrieve_document_type(self):
         url = reverse('document-type-detail', kwargs={'pk': self.type.id})
-        response = self.client.get(url)
+        with self.assertQueryBudget(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['title'], self.type.title)
 
@@ -69,6 +87,22 @@ class DocumentTypeAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['title'], "Updated Type")
 
+    def test_visibility_change_queues_a_reindex_job(self):
+        url = reverse('document-type-detail', kwargs={'pk': self.type.id})
+        self.client.patch(url, {"title": "Renamed"}, format='json')
+        self.assertFalse(ReindexJob.objects.exists())
+
+        response = self.client.patch(url, {"private_visible": False}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse('reindex-job-list', kwargs={'pk': self.type.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        job = response.data['results'][0]
+        self.assertEqual((job['action'], job['status'], job['processed']), ('delete', 'pending', 0))
+
+        response = self.client.get(reverse('reindex-job-detail', kwargs={'pk': job['id']}))
+        self.assertEqual(response.data['document_type'], self.type.id)
+
     def test_partial_update_document_type(self):
         url = reverse('document-type-detail', kwargs={'pk': self.type.id})
         response = self.client.patch(url, {"title": "Partial Updated"}, format='json')
@@ -80,4 +114,25 @@ class DocumentTypeAPITestCase(APITestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.type.refresh_from_db()
-        self.assertTrue(self.type.is_deleted)
\ No newline at end of file
+        self.assertTrue(self.type.is_deleted)
+    def test_writes_outside_the_services_change_the_validators(self):
+        list_url = reverse('document-type-list-create')
+        detail_url = reverse('document-type-detail', kwargs={'pk': self.type.id})
+        etags = {url: self.client.get(url)['ETag'] for url in (list_url, detail_url)}
+
+        # The participant's name is part of the category string shown for each type.
+        self.participant.first_name = "Alicia"
+        self.participant.save()
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.data if url == detail_url else response.data['results'][0]
+            self.assertIn("Alicia", data['category'])
+            etags[url] = response['ETag']
+            self.assertNotEqual(etags[url], etag)
+
+        self.type.title = "Saved Elsewhere"
+        self.type.save()
+        response = self.client.get(list_url, HTTP_IF_NONE_MATCH=etags[list_url])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['title'], "Saved Elsewhere")
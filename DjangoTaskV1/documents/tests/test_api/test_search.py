@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from documents.models import Document, DocumentType, Participant, DocumentCategory, UploadedTextFile
+from documents.services.search import SearchService
+
+
+class DocumentSearchAPITestCase(APITestCase):
+    def setUp(self):
+        self.participant = Participant.objects.create(
+            first_name="Dana", last_name="White", status="active"
+        )
+        self.other_participant = Participant.objects.create(
+            first_name="Omid", last_name="Karimi", status="active"
+        )
+        self.category = DocumentCategory.objects.create(
+            company=1,
+            participant=self.participant,
+            title="Search Category"
+        )
+        self.type = DocumentType.objects.create(
+            category=self.category,
+            title="Contracts",
+            private_visible=True,
+            public_visible=True,
+            is_active=True
+        )
+        self.contract = self.create_document(self.participant, "lease contract for the warehouse contract")
+        self.invoice = self.create_document(self.participant, "invoice for warehouse rent")
+        self.other = self.create_document(self.other_participant, "contract signed by another participant", company=2)
+
+    def create_document(self, participant, text, company=1):
+        document = Document.objects.create(
+            company=company,
+            participant=participant,
+            document_type=self.type,
+            file='files/documents/search.pdf',
+            is_active=False
+        )
+        text_file = UploadedTextFile.objects.create(document=document, document_type=self.type, text=text)
+        SearchService.index_text_file(text_file)
+        return document
+
+    def search(self, **params):
+        return self.client.get(reverse('document-search'), params)
+
+    def test_search_returns_ranked_matches(self):
+        response = self.search(q="contract")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [result['document']['id'] for result in response.data['results']]
+        self.assertCountEqual(ids, [self.contract.id, self.other.id])
+        ranks = [result['rank'] for result in response.data['results']]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_search_filters_by_participant_and_company(self):
+        response = self.search(q="contract", participant_id=self.participant.id)
+        self.assertEqual([r['document']['id'] for r in response.data['results']], [self.contract.id])
+
+        response = self.search(q="contract", company=2)
+        self.assertEqual([r['document']['id'] for r in response.data['results']], [self.other.id])
+
+    def test_search_excludes_deleted_documents_and_removed_text(self):
+        self.contract.is_deleted = True
+        self.contract.save()
+        UploadedTextFile.objects.filter(document=self.other).delete()
+
+        response = self.search(q="contract")
+        self.assertEqual(response.data['results'], [])
+
+    def test_search_keyset_paging(self):
+        first = self.search(q="contract", size=1)
+        self.assertEqual(len(first.data['results']), 1)
+        self.assertIsNotNone(first.data['next'])
+
+        second = self.client.get(first.data['next'])
+        self.assertEqual(len(second.data['results']), 1)
+        self.assertIsNone(second.data['next'])
+        self.assertNotEqual(
+            first.data['results'][0]['document']['id'],
+            second.data['results'][0]['document']['id']
+        )
+
+    def test_search_requires_query(self):
+        response = self.search()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('q', response.data)
+
+    def test_search_rejects_invalid_filters_and_cursor(self):
+        for param in ('participant_id', 'company', 'document_type_id'):
+            response = self.search(q="contract", **{param: "abc"})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(param, response.data)
+
+        response = self.search(q="contract", cursor="not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.data)
+
+    def test_search_is_unavailable_on_other_databases(self):
+        connection = mock.Mock(vendor='mysql')
+        with mock.patch.object(SearchService, 'get_connection', return_value=connection):
+            response = self.search(q="contract")
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    def test_index_is_clamped_by_bytes(self):
+        self.assertEqual(SearchService.clamp("abc", 8), "abc")
+        self.assertEqual(SearchService.clamp("\u00e9" * 10, 5), "\u00e9\u00e9")
+        self.assertEqual(SearchService.clamp("\u00e9" * 10, 20), "\u00e9" * 10)
+
+    def test_rejected_text_does_not_fail_the_batch(self):
+        write_rows = SearchService.write_rows
+
+        def reject_bad_text(connection, rows):
+            if any("rejected" in text for _, _, text in rows):
+                raise DatabaseError("string is too long for tsvector")
+            write_rows(connection, rows)
+
+        documents = [
+            Document.objects.create(
+                company=1, participant=self.participant, document_type=self.type,
+                file='files/documents/search.pdf', is_active=False
+            )
+            for _ in range(2)
+        ]
+        text_files = [
+            UploadedTextFile.objects.create(document=document, document_type=self.type, text=text)
+            for document, text in zip(documents, ("rejected pamphlet", "accepted pamphlet"))
+        ]
+        with mock.patch.object(SearchService, 'write_rows', side_effect=reject_bad_text), \
+                self.assertLogs('documents.search', 'WARNING'):
+            SearchService.index_text_files(text_files)
+
+        response = self.search(q="pamphlet")
+        self.assertEqual([r['document']['id'] for r in response.data['results']], [documents[1].id])
@@ -0,0 +1,170 @@
+import hashlib
+import os
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from documents.models import Document, DocumentCategory, DocumentType, Participant, TaskOutbox
+from documents.services.document import DocumentService
+from documents.services.upload import UploadService
+
+
+class UploadSessionAPITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.participant = Participant.objects.create(
+            first_name="Uma", last_name="Reed", status="active"
+        )
+        self.category = DocumentCategory.objects.create(
+            company=1,
+            participant=self.participant,
+            title="Upload Category"
+        )
+        self.type = DocumentType.objects.create(
+            category=self.category,
+            title="Upload Type",
+            private_visible=True,
+            public_visible=False,
+            is_active=True
+        )
+        self.content = b"%PDF-" + bytes(range(256)) * 40
+
+    def start(self, size=None):
+        response = self.client.post(reverse('upload-session-create'), {
+            "company": 1,
+            "participant": self.participant.id,
+            "document_type": self.type.id,
+            "is_active": True,
+            "file_name": "scan.pdf",
+            "size": size or len(self.content),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def put_chunk(self, session_id, offset, data, **headers):
+        return self.client.put(
+            reverse('upload-session-detail', kwargs={'pk': session_id}),
+            data,
+            content_type='application/octet-stream',
+            headers={'Upload-Offset': str(offset), **headers},
+        )
+
+    def test_chunked_upload_creates_document_on_finalize(self):
+        session_id = self.start()
+        chunks = [self.content[start:start + 4000] for start in range(0, len(self.content), 4000)]
+
+        offset = 0
+        for chunk in chunks[:2]:
+            response = self.put_chunk(session_id, offset, chunk)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            offset += len(chunk)
+        self.assertEqual(response['Upload-Offset'], str(offset))
+
+        response = self.put_chunk(session_id, 0, chunks[0])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.post(reverse('upload-session-finalize', kwargs={'pk': session_id}))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Document.objects.exists())
+
+        response = self.client.get(reverse('upload-session-detail', kwargs={'pk': session_id}))
+        self.assertEqual(response.data['received'], offset)
+        for chunk in chunks[2:]:
+            response = self.put_chunk(
+                session_id, offset, chunk, **{'Upload-Checksum': hashlib.sha256(chunk).hexdigest()}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            offset += len(chunk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('upload-session-finalize', kwargs={'pk': session_id}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        document = Document.objects.get(id=response.data['id'])
+        self.assertTrue(document.is_active)
+        self.assertEqual(document.content_hash, hashlib.sha256(self.content).hexdigest())
+        with document.file.open('rb') as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertTrue(TaskOutbox.objects.filter(kind='extract', document_id=document.id).exists())
+        self.assertFalse(default_storage.exists(UploadService.part_dir(session_id)))
+
+        response = self.client.post(reverse('upload-session-finalize', kwargs={'pk': session_id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], document.id)
+
+    def upload(self, session_id):
+        for offset in range(0, len(self.content), 4000):
+            response = self.put_chunk(session_id, offset, self.content[offset:offset + 4000])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_finalize_works_with_storages_that_read_the_content(self):
+        session_id = self.start()
+        self.upload(session_id)
+
+        storage = UploadService.get_storage()
+        save = storage._save
+
+        def remote_save(name, content):
+            # Measures and reads the content like S3 and other remote storages do.
+            content.seek(0, os.SEEK_END)
+            self.assertEqual(content.tell(), len(self.content))
+            content.seek(0)
+            data = b"".join(iter(lambda: content.read(3000), b""))
+            return save(name, ContentFile(data))
+
+        with mock.patch.object(storage, '_save', side_effect=remote_save):
+            response = self.client.post(reverse('upload-session-finalize', kwargs={'pk': session_id}))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        document = Document.objects.get(id=response.data['id'])
+        self.assertEqual(document.content_hash, hashlib.sha256(self.content).hexdigest())
+        with document.file.open('rb') as file:
+            self.assertEqual(file.read(), self.content)
+
+    def test_failed_finalize_removes_the_assembled_file(self):
+        session_id = self.start()
+        self.upload(session_id)
+        _, stored_before = default_storage.listdir('files/documents')
+
+        with mock.patch.object(DocumentService, 'create_document', side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('upload-session-finalize', kwargs={'pk': session_id}))
+
+        self.assertFalse(Document.objects.exists())
+        self.assertEqual(default_storage.listdir('files/documents')[1], stored_before)
+
+    @override_settings(DOCUMENTS_STORAGE_DEDUP=True)
+    def test_finalize_reuses_stored_bytes_without_copying_them(self):
+        existing = Document.objects.create(
+            company=1, participant=self.participant, document_type=self.type, is_active=False,
+            file='files/documents/existing.pdf', content_hash=hashlib.sha256(self.content).hexdigest()
+        )
+        session_id = self.start()
+        self.upload(session_id)
+
+        storage = UploadService.get_storage()
+        with mock.patch.object(storage, 'save', wraps=storage.save) as save:
+            response = self.client.post(reverse('upload-session-finalize', kwargs={'pk': session_id}))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        save.assert_not_called()
+        document = Document.objects.get(id=response.data['id'])
+        self.assertEqual(document.file.name, existing.file.name)
+
+    def test_rejects_bad_chunks(self):
+        session_id = self.start(size=10)
+
+        response = self.put_chunk(session_id, 0, b"abcde", **{'Upload-Checksum': '0' * 64})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.put_chunk(session_id, 0, b"abcdefghijk")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.put_chunk(session_id, 'x', b"abc")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,519 @@
+import io
+import re
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from documents.models import (
+    Document, DocumentCategory, DocumentType, Participant, ReindexJob, TaskOutbox, UploadedTextFile
+)
+from documents.services.batching import TaskBatcher
+from documents.services.category import DocumentCategoryService
+from documents.services.content import ContentService
+from documents.services.document import DocumentService
+from documents.services.extraction import PdfExtractionService
+from documents.services.outbox import OutboxService
+from documents.services.reindex import ReindexService
+from documents.services.search import SearchService
+from documents.services.type import DocumentTypeService
+from documents.serializers import DocumentSerializer
+from documents.synthetic import build_pdf
+from documents.tasks import (
+    delete_uploaded_text_batch,
+    extract_and_save_pdf_text,
+    extract_and_save_pdf_text_batch,
+    extract_pdf_page_range,
+    purge_deleted_rows,
+    run_reindex_job,
+)
+
+
+class ExtractPdfTextTaskTestCase(TestCase):
+    def setUp(self):
+        self.participant = Participant.objects.create(
+            first_name="Eve", last_name="Adams", status="active"
+        )
+        self.category = DocumentCategory.objects.create(
+            company=1,
+            participant=self.participant,
+            title="Task Category"
+        )
+        self.type = DocumentType.objects.create(
+            category=self.category,
+            title="Task Type",
+            private_visible=True,
+            public_visible=False,
+            is_active=True
+        )
+
+    def create_document(self, page_count):
+        return Document.objects.create(
+            company=1,
+            participant=self.participant,
+            document_type=self.type,
+            file=SimpleUploadedFile("scan.pdf", build_pdf(page_count, words_per_page=20)),
+            is_active=True
+        )
+
+    def test_extracts_every_page_in_order(self):
+        document = self.create_document(120)
+
+        extract_and_save_pdf_text(document.id)
+
+        text_file = UploadedTextFile.objects.get(document=document)
+        text = text_file.text
+        self.assertIn("w0p0l0n0", text)
+        self.assertIn("w0p119l1n9", text)
+        self.assertLess(text.index("w0p0l0n0"), text.index("w0p60l0n0"))
+        self.assertLess(text.index("w0p60l0n0"), text.index("w0p119l0n0"))
+
+        pages = list(text_file.pages.order_by('number'))
+        self.assertEqual((text_file.page_count, len(pages)), (120, 120))
+        self.assertEqual("".join(page.text for page in pages), text)
+        self.assertTrue(pages[37].text.startswith("w0p37l0n0"))
+        self.assertEqual(text[pages[37].start:pages[38].start], pages[37].text)
+
+    # Celery reads its CELERY_* settings lazily, so the chord runs in process here.
+    @override_settings(
+        PDF_PARALLEL_PAGE_THRESHOLD=10, PDF_PARALLEL_RANGE_PAGES=7,
+        CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True,
+    )
+    def test_large_document_is_extracted_in_ordered_ranges(self):
+        document = self.create_document(30)
+
+        with mock.patch.object(
+            extract_pdf_page_range, 'run', wraps=extract_pdf_page_range.run
+        ) as extract_range:
+            extract_and_save_pdf_text(document.id)
+
+        self.assertEqual(extract_range.call_count, 5)
+        text_file = UploadedTextFile.objects.get(document=document)
+        with document.file.storage.open(document.file.name, 'rb') as file:
+            expected, stats = PdfExtractionService.extract_text(file)
+        self.assertEqual(text_file.text, expected)
+        self.assertEqual(
+            list(text_file.pages.order_by('number').values_list('start', flat=True)), stats['page_offsets']
+        )
+
+    # Celery reads its CELERY_* settings lazily, so the chord runs in process here.
+    @override_settings(
+        PDF_PARALLEL_PAGE_THRESHOLD=10, PDF_PARALLEL_RANGE_PAGES=7,
+        CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True,
+    )
+    def test_large_document_text_is_saved_for_every_copy_in_a_batch(self):
+        data = build_pdf(30, words_per_page=20)
+        other_type = DocumentType.objects.create(
+            category=self.category, title="Other", private_visible=True, public_visible=False, is_active=True
+        )
+        documents = [
+            Document.objects.create(
+                company=1, participant=self.participant, document_type=doc_type,
+                file=SimpleUploadedFile("copy.pdf", data), is_active=True
+            )
+            for doc_type in (self.type, other_type)
+        ]
+
+        with mock.patch.object(
+            extract_pdf_page_range, 'run', wraps=extract_pdf_page_range.run
+        ) as extract_range:
+            extract_and_save_pdf_text_batch([document.id for document in documents])
+
+        self.assertEqual(extract_range.call_count, 5)
+        for document in documents:
+            text_file = UploadedTextFile.objects.get(document=document)
+            self.assertIn("w0p29l1n9", text_file.text)
+            self.assertEqual(text_file.pages.count(), 30)
+
+    # Celery reads its CELERY_* settings lazily, so the chord runs in process here.
+    @override_settings(
+        PDF_PARALLEL_PAGE_THRESHOLD=10, PDF_PARALLEL_RANGE_PAGES=7,
+        CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True,
+    )
+    def test_failed_range_is_extracted_again_by_the_chord_callback(self):
+        document = self.create_document(30)
+        extract_range_pages = PdfExtractionService.extract_range_pages
+        failures = []
+
+        def fail_once(file, start, end):
+            if start == 7 and not failures:
+                failures.append(start)
+                raise ValueError("broken range")
+            return extract_range_pages(file, start, end)
+
+        with mock.patch.object(PdfExtractionService, 'extract_range_pages', side_effect=fail_once):
+            extract_and_save_pdf_text(document.id)
+
+        self.assertEqual(failures, [7])
+        text_file = UploadedTextFile.objects.get(document=document)
+        self.assertEqual(text_file.pages.count(), 30)
+        self.assertIn("w0p10l0n0", text_file.text)
+        self.assertLess(text_file.text.index("w0p6l0n0"), text_file.text.index("w0p7l0n0"))
+
+    # Celery reads its CELERY_* settings lazily, so the chord runs in process here.
+    @override_settings(
+        PDF_PARALLEL_PAGE_THRESHOLD=10, PDF_PARALLEL_RANGE_PAGES=7,
+        CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True,
+    )
+    def test_range_that_keeps_failing_is_logged_and_saves_nothing(self):
+        document = self.create_document(30)
+        extract_range_pages = PdfExtractionService.extract_range_pages
+
+        def fail_range(file, start, end):
+            if start == 14:
+                raise ValueError("broken range")
+            return extract_range_pages(file, start, end)
+
+        with mock.patch.object(PdfExtractionService, 'extract_range_pages', side_effect=fail_range), \
+                mock.patch('builtins.print') as log:
+            extract_and_save_pdf_text(document.id)
+
+        self.assertFalse(UploadedTextFile.objects.filter(document=document).exists())
+        messages = [call.args[0] for call in log.call_args_list]
+        self.assertIn(f"[Celery] PDF extract error: document {document.id}, pages 14-21: broken range", messages)
+        self.assertIn(f"[Celery] PDF extract error: documents [{document.id}]: broken range", messages)
+
+    def test_text_file_without_pages_is_extracted_again(self):
+        first = self.create_document(3)
+        UploadedTextFile.objects.create(
+            document=first, document_type=self.type, content_hash=ContentService.ensure_hash(first),
+            text="legacy text", page_count=3
+        )
+        Document.objects.filter(id=first.id).update(is_active=False)
+        second = self.create_document(3)
+
+        extract_and_save_pdf_text(second.id)
+
+        text_file = UploadedTextFile.objects.get(document=second)
+        self.assertIn("w0p2l1n9", text_file.text)
+        self.assertEqual((text_file.page_count, text_file.pages.count()), (3, 3))
+
+    def test_replaced_file_is_not_given_the_old_text(self):
+        document = self.create_document(2)
+        extract_and_save_pdf_text(document.id)
+        document.file = SimpleUploadedFile("new.pdf", build_pdf(2, words_per_page=20, seed=1))
+        document.content_hash = ''
+        document.save()
+        UploadedTextFile.objects.filter(document=document).delete()
+
+        extract_and_save_pdf_text(document.id)
+
+        self.assertIn("w1p1l0n0", UploadedTextFile.objects.get(document=document).text)
+
+    def test_replaced_file_keeps_its_new_text_whatever_order_tasks_run_in(self):
+        document = self.create_document(2)
+        extract_and_save_pdf_text(document.id)
+        TaskOutbox.objects.all().delete()
+
+        serializer = DocumentSerializer(document, data={
+            'file': SimpleUploadedFile("new.pdf", build_pdf(2, words_per_page=20, seed=1))
+        }, partial=True)
+        serializer.is_valid(raise_exception=True)
+        DocumentService.update_document(serializer)
+
+        # Run the queued extraction before any queued delete, as another worker may.
+        queued = {kind: [] for kind in ('extract', 'delete')}
+        for kind, document_id in TaskOutbox.objects.values_list('kind', 'document_id'):
+            queued[kind].append(document_id)
+        self.assertEqual(queued, {'extract': [document.id], 'delete': []})
+        extract_and_save_pdf_text_batch(queued['extract'])
+        delete_uploaded_text_batch(queued['delete'])
+
+        text_file = UploadedTextFile.objects.get(document=document)
+        self.assertIn("w1p1l0n0", text_file.text)
+        self.assertNotIn("w0p1l0n0", text_file.text)
+        self.assertEqual(text_file.pages.count(), 2)
+        self.assertEqual([hit['document_id'] for hit in SearchService.search("w1p1l0n0")[0]], [document.id])
+        self.assertEqual(SearchService.search("w0p1l0n0")[0], [])
+
+    def test_extraction_drops_the_text_of_a_document_no_longer_extractable(self):
+        document = self.create_document(2)
+        extract_and_save_pdf_text(document.id)
+        DocumentType.objects.filter(id=self.type.id).update(private_visible=False)
+
+        extract_and_save_pdf_text(document.id)
+
+        self.assertFalse(UploadedTextFile.objects.filter(document=document).exists())
+
+    def test_extracts_pages_without_a_type_entry(self):
+        # /Type is optional on page objects; PyPDF2's own page list fails on them.
+        data = re.sub(rb'/Type /Page(?!s)', lambda match: b' ' * len(match.group()), build_pdf(3, words_per_page=20))
+        document = Document.objects.create(
+            company=1, participant=self.participant, document_type=self.type,
+            file=SimpleUploadedFile("untyped.pdf", data), is_active=True
+        )
+
+        extract_and_save_pdf_text(document.id)
+
+        text_file = UploadedTextFile.objects.get(document=document)
+        self.assertEqual(text_file.page_count, 3)
+        self.assertIn("w0p2l1n9", text_file.text)
+
+    def test_skips_inactive_document(self):
+        document = self.create_document(2)
+        document.is_active = False
+        document.save()
+
+        extract_and_save_pdf_text(document.id)
+
+        self.assertFalse(UploadedTextFile.objects.filter(document=document).exists())
+
+    def test_identical_content_reuses_extracted_text(self):
+        first = self.create_document(3)
+        extract_and_save_pdf_text(first.id)
+        Document.objects.filter(id=first.id).update(is_active=False)
+        second = self.create_document(3)
+
+        with mock.patch.object(PdfExtractionService, 'extract_pages') as extract_pages:
+            extract_and_save_pdf_text(second.id)
+
+        extract_pages.assert_not_called()
+        self.assertEqual(UploadedTextFile.objects.get(document=second).pages.count(), 3)
+        second.refresh_from_db()
+        self.assertEqual(second.content_hash, Document.objects.get(id=first.id).content_hash)
+        self.assertEqual(
+            list(UploadedTextFile.objects.get(document=second).pages.values_list('start', flat=True)),
+            list(UploadedTextFile.objects.get(document=first).pages.values_list('start', flat=True))
+        )
+        self.assertEqual(
+            UploadedTextFile.objects.get(document=second).text,
+            UploadedTextFile.objects.get(document=first).text
+        )
+
+
+class BatchTaskTestCase(TestCase):
+    def setUp(self):
+        participant = Participant.objects.create(first_name="Ann", last_name="Lee", status="active")
+        category = DocumentCategory.objects.create(company=1, participant=participant, title="Batch")
+        self.documents = []
+        for n in range(3):
+            doc_type = DocumentType.objects.create(
+                category=category, title=f"Batch {n}", private_visible=True, public_visible=False, is_active=True
+            )
+            self.documents.append(Document.objects.create(
+                company=1,
+                participant=participant,
+                document_type=doc_type,
+                file=SimpleUploadedFile(f"batch{n}.pdf", build_pdf(2, words_per_page=10, seed=n)),
+                is_active=True
+            ))
+        self.ids = [document.id for document in self.documents]
+
+    def test_batch_extracts_and_deletes_texts(self):
+        extract_and_save_pdf_text_batch(self.ids)
+        texts = {text_file.document_id: text_file.text for text_file in UploadedTextFile.objects.all()}
+        self.assertEqual(set(texts), set(self.ids))
+        self.assertIn("w2p1l0n0", texts[self.ids[2]])
+
+        delete_uploaded_text_batch(self.ids[:2])
+        self.assertEqual(list(UploadedTextFile.objects.values_list('document_id', flat=True)), self.ids[2:])
+
+    @override_settings(DOCUMENTS_TASK_OUTBOX=False)
+    def test_batcher_coalesces_enqueue_calls(self):
+        with mock.patch.object(extract_and_save_pdf_text_batch, 'delay') as extract, \
+                mock.patch.object(delete_uploaded_text_batch, 'delay') as delete, \
+                self.captureOnCommitCallbacks(execute=True):
+            with TaskBatcher(batch_size=2):
+                for document in self.documents:
+                    DocumentService.save_uploaded_text(document)
+                DocumentService.delete_uploaded_texts(self.ids[:1])
+                DocumentService.save_uploaded_text(self.documents[0])
+                extract.assert_not_called()
+
+        self.assertEqual([c.args[0] for c in extract.call_args_list], [self.ids[:2], self.ids[2:]])
+        delete.assert_called_once_with(self.ids[:1])
+
+    def test_outbox_relays_deduplicated_batches(self):
+        with TaskBatcher():
+            DocumentService.save_uploaded_texts(self.documents)
+        DocumentService.save_uploaded_text(self.documents[0])
+        DocumentService.delete_uploaded_texts(self.ids[1:2])
+        self.assertEqual(TaskOutbox.objects.count(), 5)
+
+        sent = mock.Mock()
+        with mock.patch.object(extract_and_save_pdf_text_batch, 'delay', sent.extract), \
+                mock.patch.object(delete_uploaded_text_batch, 'delay', sent.delete):
+            self.assertEqual(OutboxService.relay(batch_size=10), 5)
+
+        self.assertEqual(sent.mock_calls, [mock.call.delete(self.ids[1:2]), mock.call.extract(self.ids)])
+        self.assertFalse(TaskOutbox.objects.exists())
+        self.assertEqual(OutboxService.relay(), 0)
+
+
+class PurgeTaskTestCase(TestCase):
+    def setUp(self):
+        participant = Participant.objects.create(first_name="Ray", last_name="Moss", status="active")
+        self.category = DocumentCategory.objects.create(company=1, participant=participant, title="Purge")
+        self.type = DocumentType.objects.create(
+            category=self.category, title="Purge", private_visible=True, public_visible=False, is_active=True
+        )
+        self.storage = Document._meta.get_field('file').storage
+        self.shared = self.storage.save('files/documents/purge-shared.pdf', ContentFile(b"shared"))
+        self.unique = self.storage.save('files/documents/purge-unique.pdf', ContentFile(b"unique"))
+
+        # Two documents share a deduplicated file; the second and a third one are deleted.
+        self.documents = [
+            Document.objects.create(
+                company=1, participant=participant, document_type=self.type, file=name,
+                content_hash=content_hash, is_active=False
+            )
+            for name, content_hash in ((self.shared, 'a' * 64), (self.shared, 'a' * 64), (self.unique, 'b' * 64))
+        ]
+        for document in self.documents:
+            UploadedTextFile.objects.create(document=document, document_type=self.type, text="text")
+
+    def test_purges_expired_documents_but_keeps_shared_files(self):
+        deleted = self.documents[1:]
+        Document.objects.filter(id=deleted[0].id).update(
+            is_deleted=True, deleted_at=timezone.now() - timedelta(days=31)
+        )
+        Document.objects.filter(id=deleted[1].id).update(
+            is_deleted=True, deleted_at=timezone.now() - timedelta(days=31)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purged = purge_deleted_rows()
+
+        self.assertEqual(purged, {'documents': 2, 'types': 0, 'categories': 0})
+        self.assertEqual(list(Document.objects.values_list('id', flat=True)), [self.documents[0].id])
+        self.assertEqual(list(UploadedTextFile.objects.values_list('document_id', flat=True)), [self.documents[0].id])
+        self.assertTrue(self.storage.exists(self.shared))
+        self.assertFalse(self.storage.exists(self.unique))
+
+    def test_category_delete_cascades_and_is_purged_after_retention(self):
+        DocumentCategoryService.soft_delete_category(self.category)
+
+        self.type.refresh_from_db()
+        self.assertTrue(self.type.is_deleted)
+        self.assertEqual(self.type.document_count, 0)
+        self.assertEqual(Document.objects.filter(is_deleted=True, deleted_at__isnull=False).count(), 3)
+
+        self.assertEqual(purge_deleted_rows(), {'documents': 0, 'types': 0, 'categories': 0})
+
+        with override_settings(DOCUMENTS_PURGE_RETENTION_DAYS=0), self.captureOnCommitCallbacks(execute=True):
+            purged = purge_deleted_rows()
+
+        self.assertEqual(purged, {'documents': 3, 'types': 1, 'categories': 1})
+        self.assertFalse(DocumentCategory.objects.exists())
+        self.assertFalse(UploadedTextFile.objects.exists())
+        self.assertFalse(self.storage.exists(self.shared))
+
+
+@override_settings(DOCUMENTS_REINDEX_CHUNK_SIZE=2)
+class ReindexTaskTestCase(TestCase):
+    def setUp(self):
+        participant = Participant.objects.create(first_name="Kim", last_name="Park", status="active")
+        category = DocumentCategory.objects.create(company=1, participant=participant, title="Reindex")
+        self.type = DocumentType.objects.create(
+            category=category, title="Reindex", private_visible=True, public_visible=False, is_active=True
+        )
+        # A type has one active document; older versions keep their texts until it is hidden.
+        self.documents = [
+            Document.objects.create(
+                company=1,
+                participant=participant,
+                document_type=self.type,
+                file=SimpleUploadedFile(f"reindex{n}.pdf", build_pdf(1, words_per_page=10, seed=n)),
+                is_active=n == 4
+            )
+            for n in range(5)
+        ]
+        UploadedTextFile.objects.bulk_create([
+            UploadedTextFile(document=document, document_type=self.type, text="text")
+            for document in self.documents
+        ])
+
+    def set_visibility(self, **values):
+        serializer = mock.Mock()
+        old_instance = DocumentType.objects.get(id=self.type.id)
+        DocumentType.objects.filter(id=self.type.id).update(**values)
+        serializer.save.return_value = DocumentType.objects.get(id=self.type.id)
+
+        dispatched = []
+        with mock.patch.object(run_reindex_job, 'delay', side_effect=dispatched.append):
+            with self.captureOnCommitCallbacks(execute=True):
+                DocumentTypeService.update(serializer, old_instance)
+            # Run the queued chunks the way a worker would.
+            while dispatched:
+                run_reindex_job(dispatched.pop(0))
+        return ReindexJob.objects.filter(document_type=self.type).latest('id')
+
+    def test_hiding_a_type_deletes_texts_in_chunks(self):
+        with mock.patch.object(ReindexService, 'run_chunk', wraps=ReindexService.run_chunk) as run_chunk:
+            job = self.set_visibility(private_visible=False)
+
+        self.assertEqual(run_chunk.call_count, 3)
+        self.assertEqual((job.action, job.status, job.total, job.processed), ('delete', 'done', 5, 5))
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(UploadedTextFile.objects.filter(document_type=self.type).exists())
+
+    def test_showing_a_type_again_re_extracts_texts(self):
+        self.set_visibility(is_active=False)
+        job = self.set_visibility(is_active=True)
+
+        self.assertEqual((job.action, job.status, job.total, job.processed), ('extract', 'done', 1, 1))
+        text_file = UploadedTextFile.objects.get(document_type=self.type)
+        self.assertEqual(text_file.document_id, self.documents[4].id)
+        self.assertIn("w4p0l0n0", text_file.text)
+
+    def test_unrelated_change_queues_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ReindexService.schedule_visibility_changes([(self.type, self.type)])
+        self.assertFalse(ReindexJob.objects.exists())
+
+    def test_newer_job_supersedes_older_one(self):
+        older = ReindexJob.objects.create(document_type=self.type, action='delete')
+        newer = ReindexJob.objects.create(document_type=self.type, action='extract')
+
+        self.assertIsNone(run_reindex_job(older.id))
+        older.refresh_from_db()
+        self.assertEqual(older.status, 'superseded')
+        self.assertEqual(UploadedTextFile.objects.count(), 5)
+
+        self.assertEqual(run_reindex_job(newer.id), 0)
+        newer.refresh_from_db()
+        self.assertEqual(newer.status, 'done')
+
+
+class CompressedTextTestCase(TestCase):
+    def setUp(self):
+        participant = Participant.objects.create(first_name="Lou", last_name="Reed", status="active")
+        category = DocumentCategory.objects.create(company=1, participant=participant, title="Compressed")
+        doc_type = DocumentType.objects.create(
+            category=category, title="Compressed", private_visible=True, public_visible=False, is_active=True
+        )
+        self.document = Document.objects.create(
+            company=1,
+            participant=participant,
+            document_type=doc_type,
+            file=SimpleUploadedFile("compressed.pdf", build_pdf(3, words_per_page=20)),
+            is_active=True
+        )
+
+    @override_settings(DOCUMENTS_TEXT_COMPRESSION='zlib')
+    def test_extracted_text_is_stored_compressed(self):
+        extract_and_save_pdf_text(self.document.id)
+
+        text_file = UploadedTextFile.objects.get(document=self.document)
+        self.assertEqual((text_file.compression, text_file.raw_text), ('zlib', ''))
+        self.assertIn("w0p2l1n9", text_file.text)
+        self.assertLess(len(text_file.compressed_text), len(text_file.text))
+        self.assertEqual({page.compression for page in text_file.pages.all()}, {'zlib'})
+        self.assertEqual("".join(page.text for page in text_file.pages.order_by('number')), text_file.text)
+
+    def test_command_converts_existing_rows(self):
+        extract_and_save_pdf_text(self.document.id)
+        text = UploadedTextFile.objects.get().text
+
+        call_command('compress_texts', compression='zlib', batch_size=1, stdout=io.StringIO())
+        text_file = UploadedTextFile.objects.get()
+        self.assertEqual((text_file.compression, text_file.raw_text, text_file.text), ('zlib', '', text))
+        self.assertEqual(set(text_file.pages.values_list('compression', flat=True)), {'zlib'})
+
+        call_command('compress_texts', compression='none', stdout=io.StringIO())
+        text_file = UploadedTextFile.objects.get()
+        self.assertEqual((text_file.compression, text_file.compressed_text, text_file.raw_text), ('', None, text))
@@ -1,5 +1,13 @@
 from django.urls import path
 
+from .async_views import (
+    AsyncDocumentCategoryListView,
+    AsyncDocumentCategoryRetrieveView,
+    AsyncDocumentTypeListView,
+    AsyncDocumentTypeRetrieveView,
+    AsyncDocumentListView,
+    AsyncDocumentRetrieveView,
+)
 from .views import (
     DocumentCategoryListCreateAPIView,
     DocumentCategoryRetrieveUpdateDestroyAPIView,
@@ -7,6 +15,9 @@ from .views import (
     DocumentTypeRetrieveUpdateDestroyAPIView,
     DocumentListCreateAPIView,
     DocumentRetrieveUpdateDestroyAPIView, CategoryWithTypeAndDocCountAPIView,
+    DocumentSearchAPIView, DocumentBulkCreateAPIView, DocumentExportAPIView,
+    UploadSessionCreateAPIView, UploadSessionAPIView, UploadSessionFinalizeAPIView,
+    ReindexJobListAPIView, ReindexJobRetrieveAPIView, DocumentTextPagesAPIView,
 )
 
 urlpatterns = [
@@ -16,8 +27,27 @@ urlpatterns = [
 
     path("document-types/", DocumentTypeListCreateAPIView.as_view(), name="document-type-list-create"),
     path("document-types/<int:pk>/", DocumentTypeRetrieveUpdateDestroyAPIView.as_view(), name="document-type-detail"),
+    path("document-types/<int:pk>/reindex-jobs/", ReindexJobListAPIView.as_view(), name="reindex-job-list"),
+    path("reindex-jobs/<int:pk>/", ReindexJobRetrieveAPIView.as_view(), name="reindex-job-detail"),
 
     path("documents/", DocumentListCreateAPIView.as_view(), name="document-list-create"),
+    path("documents/bulk/", DocumentBulkCreateAPIView.as_view(), name="document-bulk-create"),
+    path("documents/export/", DocumentExportAPIView.as_view(), name="document-export"),
+    path("documents/uploads/", UploadSessionCreateAPIView.as_view(), name="upload-session-create"),
+    path("documents/uploads/<uuid:pk>/", UploadSessionAPIView.as_view(), name="upload-session-detail"),
+    path("documents/uploads/<uuid:pk>/finalize/", UploadSessionFinalizeAPIView.as_view(),
+         name="upload-session-finalize"),
     path("documents/<int:pk>/", DocumentRetrieveUpdateDestroyAPIView.as_view(), name="document-detail"),
+    path("documents/<int:pk>/text/", DocumentTextPagesAPIView.as_view(), name="document-text-pages"),
     path('category-doc-type-stats/', CategoryWithTypeAndDocCountAPIView.as_view(), name='category-doc-type-stats'),
+    path('search/', DocumentSearchAPIView.as_view(), name='document-search'),
+
+    path("async/document-categories/", AsyncDocumentCategoryListView.as_view(), name="async-document-category-list"),
+    path("async/document-categories/<int:pk>/", AsyncDocumentCategoryRetrieveView.as_view(),
+         name="async-document-category-detail"),
+    path("async/document-types/", AsyncDocumentTypeListView.as_view(), name="async-document-type-list"),
+    path("async/document-types/<int:pk>/", AsyncDocumentTypeRetrieveView.as_view(),
+         name="async-document-type-detail"),
+    path("async/documents/", AsyncDocumentListView.as_view(), name="async-document-list"),
+    path("async/documents/<int:pk>/", AsyncDocumentRetrieveView.as_view(), name="async-document-detail"),
 ]
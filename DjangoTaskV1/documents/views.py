@@ -1,10 +1,15 @@
 from django.db.models import Count, Q, Prefetch
+from django.http import StreamingHttpResponse
 from drf_spectacular.types import OpenApiTypes
 from rest_framework import generics, status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from PyPDF2 import PdfReader
-from .models import DocumentCategory, DocumentType, Document, UploadedTextFile
+from .mixins import CachedResponseMixin, ConditionalGetMixin
+from .parsers import ChunkParser
+from .models import DocumentCategory, DocumentType, Document, ReindexJob, UploadedTextFile, UploadSession
 from .pagination import CustomPagination
 from .schemas.type import  (
     document_type_list_schema,
@@ -16,7 +21,8 @@ from .schemas.type import  (
     document_type_delete_schema,
 )
 from .serializers import DocumentCategorySerializer, DocumentTypeSerializer, DocumentSerializer, \
-    CategoryWithDocTypeStatsSerializer
+    CategoryWithDocTypeStatsSerializer, DocumentSearchResultSerializer, DocumentBulkUploadSerializer, \
+    UploadSessionSerializer, UploadedDocumentSerializer, ReindexJobSerializer, DocumentTextPagesSerializer
 from .services.category import DocumentCategoryService, CategoryService
 from .schemas.category import (
     category_list_create_schema,
@@ -34,15 +40,36 @@ from .schemas.document import (
     document_update_schema,
     document_partial_update_schema,
     document_delete_schema,
+    document_bulk_create_schema,
+    document_export_schema,
 )
+from .schemas.pages import document_text_pages_schema
+from .schemas.reindex import reindex_job_list_schema, reindex_job_retrieve_schema
+from .schemas.search import document_search_schema
+from .schemas.upload import (
+    upload_session_create_schema,
+    upload_session_retrieve_schema,
+    upload_session_chunk_schema,
+    upload_session_finalize_schema,
+)
+from .services.cache import ResponseCacheService
 from .services.document import DocumentService
+from .services.export import DocumentExportService
+from .services.pages import TextPageService
+from .services.search import SearchService
 from .services.type import DocumentTypeService
+from .services.upload import UploadService
 
 
-class DocumentCategoryListCreateAPIView(generics.ListCreateAPIView):
-    queryset = DocumentCategory.objects.filter(is_deleted=False)
+class DocumentCategoryListCreateAPIView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
+    queryset = (
+        DocumentCategory.objects.filter(is_deleted=False)
+        .select_related('participant').prefetch_related('types').order_by('id')
+    )
     serializer_class = DocumentCategorySerializer
     pagination_class = CustomPagination
+    cache_scopes = ('categories', 'types', 'documents')
+    modified_fields = ('updated_at', 'types__updated_at', 'participant__updated_at')
 
     @category_list_create_schema
     def get(self, request, *args, **kwargs):
@@ -52,9 +79,13 @@ class DocumentCategoryListCreateAPIView(generics.ListCreateAPIView):
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
 
-class DocumentCategoryRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = DocumentCategory.objects.filter(is_deleted=False)
+class DocumentCategoryRetrieveUpdateDestroyAPIView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = DocumentCategory.objects.filter(is_deleted=False).select_related('participant').prefetch_related('types')
     serializer_class = DocumentCategorySerializer
+    modified_fields = ('updated_at', 'types__updated_at', 'participant__updated_at')
+
+    def get_cache_scopes(self):
+        return (ResponseCacheService.category_scope(self.kwargs['pk']),)
 
     @category_retrieve_schema
     def get(self, request, *args, **kwargs):
@@ -75,10 +106,12 @@ class DocumentCategoryRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestro
     def perform_destroy(self, instance):
         DocumentCategoryService.soft_delete_category(instance)
 
-class DocumentTypeListCreateAPIView(generics.ListCreateAPIView):
-    queryset = DocumentType.objects.filter(is_deleted=False)
+class DocumentTypeListCreateAPIView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
+    queryset = DocumentType.objects.filter(is_deleted=False).select_related('category__participant').order_by('id')
     serializer_class = DocumentTypeSerializer
     pagination_class = CustomPagination
+    cache_scopes = ('categories', 'types', 'documents')
+    modified_fields = ('updated_at', 'category__updated_at', 'category__participant__updated_at')
 
 
     @document_type_list_schema
@@ -92,9 +125,14 @@ class DocumentTypeListCreateAPIView(generics.ListCreateAPIView):
             return Response({"category_id": ["Invalid or deleted category"]}, status=status.HTTP_400_BAD_REQUEST)
         return super().post(request, *args, **kwargs)
 
-class DocumentTypeRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = DocumentType.objects.filter(is_deleted=False)
+    def perform_create(self, serializer):
+        DocumentTypeService.create(serializer)
+
+class DocumentTypeRetrieveUpdateDestroyAPIView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = DocumentType.objects.filter(is_deleted=False).select_related('category__participant')
     serializer_class = DocumentTypeSerializer
+    cache_scopes = ('categories', 'types', 'documents')
+    modified_fields = ('updated_at', 'category__updated_at', 'category__participant__updated_at')
 
     @document_type_retrieve_schema
     def get(self, request, *args, **kwargs):
@@ -116,14 +154,34 @@ class DocumentTypeRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPI
         DocumentTypeService.soft_delete(instance)
 
     def perform_update(self, serializer):
-        old_instance = self.get_object()
-        new_instance = serializer.save()
-        DocumentTypeService.cleanup_uploaded_text_if_visibility_removed(old_instance, new_instance)
+        DocumentTypeService.update(serializer, self.get_object())
 
-class DocumentListCreateAPIView(generics.ListCreateAPIView):
-    queryset = Document.objects.filter(is_deleted=False)
+class ReindexJobListAPIView(generics.ListAPIView):
+    serializer_class = ReindexJobSerializer
+    pagination_class = CustomPagination
+
+    def get_queryset(self):
+        return ReindexJob.objects.filter(document_type_id=self.kwargs['pk']).order_by('-id')
+
+    @reindex_job_list_schema
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class ReindexJobRetrieveAPIView(generics.RetrieveAPIView):
+    queryset = ReindexJob.objects.all()
+    serializer_class = ReindexJobSerializer
+
+    @reindex_job_retrieve_schema
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class DocumentListCreateAPIView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
+    queryset = Document.objects.filter(is_deleted=False).order_by('id')
     serializer_class = DocumentSerializer
     pagination_class = CustomPagination
+    cache_scopes = ('documents',)
 
     @document_list_schema
     def get(self, request, *args, **kwargs):
@@ -134,19 +192,105 @@ class DocumentListCreateAPIView(generics.ListCreateAPIView):
         return super().post(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        doc_type = serializer.validated_data['document_type']
-        is_active = serializer.validated_data.get('is_active', False)
+        DocumentService.create_document(serializer)
+
 
-        if is_active:
-            DocumentService.ensure_single_active(doc_type)
+class DocumentBulkCreateAPIView(generics.GenericAPIView):
+    serializer_class = DocumentBulkUploadSerializer
+    parser_classes = [MultiPartParser]
 
-        document = serializer.save()
-        DocumentService.save_uploaded_text(document)
+    @document_bulk_create_schema
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        documents = DocumentService.bulk_create_documents(serializer.validated_data['items'])
+        data = DocumentSerializer(documents, many=True, context=self.get_serializer_context()).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class DocumentExportAPIView(generics.GenericAPIView):
+    filter_params = ('company', 'participant_id')
 
+    @document_export_schema
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in DocumentExportService.FORMATS:
+            return Response(
+                {"export_format": [f"Expected one of: {', '.join(DocumentExportService.FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        filters = {}
+        for param in self.filter_params:
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                filters[param] = int(value)
+            except ValueError:
+                return Response({param: ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        include_text = request.query_params.get('include_text', '').lower() in ('1', 'true')
+        response = StreamingHttpResponse(
+            DocumentExportService.stream(export_format, include_text=include_text, **filters),
+            content_type=DocumentExportService.FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="documents.{export_format}"'
+        return response
+
+
+class UploadSessionCreateAPIView(generics.CreateAPIView):
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+
+    @upload_session_create_schema
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
 
-class DocumentRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+
+class UploadSessionAPIView(generics.RetrieveAPIView):
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    parser_classes = [ChunkParser]
+
+    @upload_session_retrieve_schema
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @upload_session_chunk_schema
+    def put(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return Response({"Upload-Offset": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        session = UploadService.append_chunk(
+            session.id, offset, request.data, checksum=request.headers.get('Upload-Checksum')
+        )
+        response = Response(self.get_serializer(session).data)
+        response['Upload-Offset'] = str(session.received)
+        return response
+
+
+class UploadSessionFinalizeAPIView(generics.GenericAPIView):
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadedDocumentSerializer
+
+    @upload_session_finalize_schema
+    def post(self, request, *args, **kwargs):
+        session = self.get_object()
+        document, created = UploadService.finalize(session.id, self.get_serializer_class(), self.get_serializer_context())
+        return Response(
+            self.get_serializer(document).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class DocumentRetrieveUpdateDestroyAPIView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Document.objects.filter(is_deleted=False)
     serializer_class = DocumentSerializer
+    cache_scopes = ('documents',)
 
     @document_retrieve_schema
     def get(self, request, *args, **kwargs):
@@ -164,14 +308,66 @@ class DocumentRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView
     def delete(self, request, *args, **kwargs):
         return super().delete(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        DocumentService.update_document(serializer)
+
     def perform_destroy(self, instance):
         DocumentService.soft_delete(instance)
 
 
 
-class CategoryWithTypeAndDocCountAPIView(generics.ListAPIView):
+class DocumentTextPagesAPIView(generics.GenericAPIView):
+    serializer_class = DocumentTextPagesSerializer
+
+    @document_text_pages_schema
+    def get(self, request, *args, **kwargs):
+        errors = {}
+        pages = {}
+        for param, default in (('start_page', 1), ('end_page', None)):
+            try:
+                value = request.query_params.get(param, default)
+                pages[param] = None if value is None else int(value)
+            except ValueError:
+                errors[param] = ["A valid integer is required."]
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        first_page = pages['start_page']
+        last_page = first_page if pages['end_page'] is None else pages['end_page']
+        if first_page < 1 or last_page < first_page:
+            return Response(
+                {"end_page": ["Pages start at 1 and end_page cannot precede start_page."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_pages = TextPageService.get_max_pages()
+        if last_page - first_page + 1 > max_pages:
+            return Response(
+                {"end_page": [f"At most {max_pages} pages can be requested at once."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        text_file = TextPageService.get_latest_text_file(kwargs['pk'])
+        if text_file is None or not text_file.page_count:
+            return Response({"detail": "No page text for this document."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(self.get_serializer({
+            'document': text_file.document_id,
+            'text_file': text_file.id,
+            'page_count': text_file.page_count,
+            'pages': TextPageService.get_pages(text_file, first_page, last_page),
+        }).data)
+
+
+class CategoryWithTypeAndDocCountAPIView(ConditionalGetMixin, CachedResponseMixin, generics.ListAPIView):
     serializer_class = CategoryWithDocTypeStatsSerializer
     pagination_class = CustomPagination
+    modified_fields = ('updated_at', 'types__updated_at')
+
+    def get_cache_scopes(self):
+        category_id = self.request.query_params.get('category_id')
+        if category_id:
+            return (ResponseCacheService.category_scope(category_id),)
+        return ('categories', 'types', 'documents')
 
 
     @category_with_type_and_count_schema
@@ -187,4 +383,56 @@ class CategoryWithTypeAndDocCountAPIView(generics.ListAPIView):
             participant_id=participant_id,
             category_id=category_id,
             has_active_type=has_active_type
-        )
\ No newline at end of file
+        )
+
+
+class DocumentSearchAPIView(generics.GenericAPIView):
+    serializer_class = DocumentSearchResultSerializer
+    page_size = 20
+    filter_params = ('participant_id', 'company', 'document_type_id')
+
+    @document_search_schema
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"q": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            size = min(int(request.query_params.get('size', self.page_size)), CustomPagination.max_page_size)
+        except ValueError:
+            return Response({"size": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        filters = {}
+        for param in self.filter_params:
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                filters[param] = int(value)
+            except ValueError:
+                return Response({param: ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                cursor = SearchService.decode_cursor(cursor)
+            except ValueError:
+                return Response({"cursor": ["Invalid cursor"]}, status=status.HTTP_400_BAD_REQUEST)
+
+        hits, next_cursor = SearchService.search(query, cursor=cursor, size=max(size, 1), **filters)
+
+        documents = Document.objects.in_bulk([hit['document_id'] for hit in hits])
+        results = [
+            dict(hit, document=documents[hit['document_id']])
+            for hit in hits if hit['document_id'] in documents
+        ]
+
+        next_url = None
+        if next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+
+        return Response({
+            'next': next_url,
+            'results': self.get_serializer(results, many=True).data,
+        })
+